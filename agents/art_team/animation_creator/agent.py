@@ -17,6 +17,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from shared.llm import LLMService
 from shared.context import ContextManager
 from shared.event_bus import EventBus, Event, EventType
+from art_team.animation_creator.frame_engine import FrameGenerationEngine
 
 
 class AnimationCreatorAgent:
@@ -31,50 +32,58 @@ class AnimationCreatorAgent:
     """
 
     # Standard animation types
+    # "poses" name each frame; animations sharing a pose key reuse the frame
     STANDARD_ANIMATIONS = {
         "idle": {
             "frames": 4,
             "fps": 8,
             "loop": True,
-            "description": "character standing still, slight breathing motion"
+            "description": "character standing still, slight breathing motion",
+            "poses": ["stand", "breathe_in", "stand", "breathe_out"]
         },
         "walk": {
             "frames": 6,
             "fps": 12,
             "loop": True,
-            "description": "character walking forward, natural gait cycle"
+            "description": "character walking forward, natural gait cycle",
+            "poses": ["walk_contact_r", "walk_down_r", "walk_pass_r", "walk_contact_l", "walk_down_l", "walk_pass_l"]
         },
         "run": {
             "frames": 6,
             "fps": 16,
             "loop": True,
-            "description": "character running, faster and more dynamic"
+            "description": "character running, faster and more dynamic",
+            "poses": ["run_contact_r", "run_push_r", "run_flight_r", "run_contact_l", "run_push_l", "run_flight_l"]
         },
         "jump": {
             "frames": 4,
             "fps": 12,
             "loop": False,
-            "description": "character jumping upward, take-off to peak"
+            "description": "character jumping upward, take-off to peak",
+            "poses": ["crouch", "takeoff", "rise", "apex"]
         },
         "fall": {
             "frames": 2,
             "fps": 8,
             "loop": True,
-            "description": "character falling downward"
+            "description": "character falling downward",
+            "poses": ["apex", "descend"]
         },
         "attack": {
             "frames": 5,
             "fps": 14,
             "loop": False,
-            "description": "character performing attack action"
+            "description": "character performing attack action",
+            "poses": ["attack_windup", "attack_swing", "attack_strike", "attack_follow", "stand"]
         }
     }
 
     def __init__(self):
         """Initialize the Animation Creator Agent."""
-        self.llm = LLMService()
+        self.llm = LLMService(agent="AnimationCreatorAgent")
         self.context = ContextManager()
         self.event_bus = EventBus()
+        self.frame_engine = FrameGenerationEngine()
 
     def create_animations(
         self,
@@ -98,6 +107,7 @@ class AnimationCreatorAgent:
 
         animations = []
         total_frames = 0
+        stats_before = dict(self.frame_engine.stats)
 
         for anim_name in animation_list:
             if anim_name in self.STANDARD_ANIMATIONS:
@@ -117,16 +127,29 @@ class AnimationCreatorAgent:
             else:
                 print(f"   ⚠️  Unknown animation: {anim_name}")
 
+        sprite_sheet = self._create_sprite_sheet(animations, base_sprite, style_guide)
+        engine_stats = {
+            key: value - stats_before[key]
+            for key, value in self.frame_engine.stats.items()
+        }
+
         result = {
             "character": base_sprite.get("name", "unknown"),
             "animations": animations,
-            "sprite_sheet": self._create_sprite_sheet(animations, base_sprite),
+            "sprite_sheet": sprite_sheet,
             "summary": {
                 "total_animations": len(animations),
-                "total_frames": total_frames
+                "total_frames": total_frames,
+                "unique_frames": sprite_sheet["total_frames"],
+                "image_calls": engine_stats["image_calls"],
+                "pose_cache_hits": engine_stats["pose_cache_hits"],
+                "duplicate_frames": engine_stats["duplicate_frames"]
             }
         }
 
+        print(f"   🧩 {sprite_sheet['total_frames']} unique frames, "
+              f"{engine_stats['image_calls']} image calls for {total_frames} frames")
+
         # Update context
         self.context.update_nested("assets", {
             "animations": result
@@ -144,38 +167,55 @@ class AnimationCreatorAgent:
         """
         Create a single animation.
 
-        In Phase 2 with Mock mode, this returns simulated data.
-        In production, this will generate actual frames using Imagen 4.
+        Frames come from the frame engine, which conditions each frame on the
+        base sprite and the previous frame and reuses poses already generated
+        for this character. In Mock mode the frames are placeholder silhouettes.
         """
+        poses = anim_def.get("poses") or [f"{anim_name}_{i}" for i in range(anim_def["frames"])]
+
+        frames = self.frame_engine.generate_sequence(
+            base_sprite,
+            anim_name,
+            poses,
+            anim_def["description"],
+            style_guide
+        )
+
         return {
             "name": anim_name,
             "frames": anim_def["frames"],
             "fps": anim_def["fps"],
             "loop": anim_def["loop"],
             "description": anim_def["description"],
-            "frame_paths": [
-                f"generated-assets/animations/{base_sprite.get('name', 'character')}_{anim_name}_frame_{i}.mock.txt"
-                for i in range(anim_def["frames"])
-            ]
+            "frame_paths": [frame.path for frame in frames],
+            "frame_indices": [frame.sheet_index for frame in frames]
         }
 
     def _create_sprite_sheet(
         self,
         animations: List[Dict[str, Any]],
-        base_sprite: Dict[str, Any]
+        base_sprite: Dict[str, Any],
+        style_guide: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Assemble animations into a sprite sheet.
 
+        Shared and duplicate frames occupy a single cell; each animation
+        references its cells through "frame_indices".
+
         Args:
             animations: List of animation data
             base_sprite: Base sprite information
+            style_guide: Art style guide the frames were generated in
 
         Returns:
             Sprite sheet data
         """
-        # Calculate total frames
-        total_frames = sum(anim["frames"] for anim in animations)
+        # Only unique frames are packed
+        total_frames = len(self.frame_engine.unique_frames(
+            base_sprite.get("name", "character"),
+            style_guide
+        ))
 
         # Assume 8 frames per row for sprite sheet layout
         frames_per_row = 8
@@ -198,12 +238,12 @@ class AnimationCreatorAgent:
             "animations_metadata": [
                 {
                     "name": anim["name"],
-                    "start_frame": sum(animations[j]["frames"] for j in range(i)),
+                    "frame_indices": anim["frame_indices"],
                     "frame_count": anim["frames"],
                     "fps": anim["fps"],
                     "loop": anim["loop"]
                 }
-                for i, anim in enumerate(animations)
+                for anim in animations
             ]
         }
 
@@ -259,7 +299,7 @@ def main():
     print("=" * 80)
     for anim_meta in sheet["animations_metadata"]:
         print(f"\n{anim_meta['name'].upper()}")
-        print(f"  Frames: {anim_meta['start_frame']} - {anim_meta['start_frame'] + anim_meta['frame_count'] - 1}")
+        print(f"  Frames: {anim_meta['frame_indices']}")
         print(f"  FPS: {anim_meta['fps']}")
         print(f"  Loop: {anim_meta['loop']}")
 
@@ -0,0 +1,266 @@
+"""
+Frame Generation Engine - Coherent animation frames with pose reuse
+
+Frames are generated one after another, each conditioned on the base sprite
+and the previous frame so the character stays consistent across a sequence.
+Every image-model call is expensive, so the engine avoids them where it can:
+
+- Pose cache: frames are keyed by (character, pose, style). Animations that
+  share a pose (e.g. "fall" starting from the "apex" of "jump") reuse the
+  cached frame; the same pose under another style guide is generated anew.
+- Perceptual dedup: a freshly generated frame whose dHash matches an existing
+  frame of the same character is aliased to that frame instead of being
+  stored again, and later requests for its pose hit the cache.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from shared.imaging import difference_hash, hamming_distance
+
+
+MOCK_FRAME_SIZE = 32
+
+# Silhouette parameters for the standard poses (mock renderer only):
+# (vertical bob, horizontal lean, leg stride, arm raise)
+POSE_GEOMETRY: Dict[str, Tuple[int, int, int, int]] = {
+    "stand": (0, 0, 0, 0),
+    "breathe_in": (-1, 0, 0, 0),
+    "breathe_out": (1, 0, 0, 0),
+    "walk_contact_r": (0, 1, 3, 1),
+    "walk_down_r": (1, 1, 2, 1),
+    "walk_pass_r": (-1, 1, 0, 0),
+    "walk_contact_l": (0, 1, -3, -1),
+    "walk_down_l": (1, 1, -2, -1),
+    "walk_pass_l": (-1, 1, 0, 0),
+    "run_contact_r": (0, 2, 4, 2),
+    "run_push_r": (1, 2, 3, 2),
+    "run_flight_r": (-2, 2, 5, 2),
+    "run_contact_l": (0, 2, -4, -2),
+    "run_push_l": (1, 2, -3, -2),
+    "run_flight_l": (-2, 2, -5, -2),
+    "crouch": (3, 0, 1, 0),
+    "takeoff": (-2, 1, 2, 3),
+    "rise": (-4, 1, 1, 3),
+    "apex": (-5, 0, 1, 2),
+    "descend": (-3, 0, 2, 1),
+    "attack_windup": (0, -2, 1, -3),
+    "attack_swing": (0, 1, 2, 3),
+    "attack_strike": (0, 3, 3, 4),
+    "attack_follow": (0, 2, 2, 2),
+}
+
+
+@dataclass
+class FrameImage:
+    """Grayscale frame buffer (row-major, 0-255)."""
+
+    pixels: bytes
+    width: int
+    height: int
+
+
+@dataclass
+class FrameRequest:
+    """Everything the image model is conditioned on for one frame."""
+
+    character: str
+    animation: str
+    index: int
+    pose: str
+    description: str
+    base_sprite: Dict[str, Any]
+    style_guide: Dict[str, Any]
+    previous_frame: Optional["GeneratedFrame"] = None
+
+
+@dataclass
+class GeneratedFrame:
+    """A stored frame (one sprite sheet cell)."""
+
+    pose: str
+    image: FrameImage
+    phash: int
+    path: str
+    sheet_index: int
+    aliases: List[str] = field(default_factory=list)
+
+
+FrameGenerator = Callable[[FrameRequest], FrameImage]
+
+
+def style_key(style_guide: Dict[str, Any]) -> str:
+    """Stable key of a style guide (part of the pose cache key)."""
+    canonical = json.dumps(style_guide, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def render_mock_frame(request: FrameRequest) -> FrameImage:
+    """
+    Render a deterministic placeholder silhouette for a pose.
+
+    In production this is replaced by an Imagen 4 call that receives the
+    base sprite and previous frame as reference images.
+    """
+    size = MOCK_FRAME_SIZE
+    geometry = POSE_GEOMETRY.get(request.pose)
+    if geometry is None:
+        digest = hashlib.sha1(request.pose.encode("utf-8")).digest()
+        geometry = tuple((b % 7) - 3 for b in digest[:4])
+    bob, lean, stride, arm = geometry
+
+    canvas = bytearray([255]) * (size * size)
+
+    def fill(x0: int, y0: int, x1: int, y1: int, shade: int):
+        x0, x1 = max(0, x0), min(size, x1)
+        if x1 <= x0:
+            return
+        run = bytes([shade]) * (x1 - x0)
+        for y in range(max(0, y0), min(size, y1)):
+            canvas[y * size + x0:y * size + x1] = run
+
+    cx = size // 2 + lean
+    top = 8 + bob
+    fill(cx - 4, top - 6, cx + 4, top, 40)               # head
+    fill(cx - 5, top, cx + 5, top + 12, 60)              # body
+    fill(cx + 5, top + 2 - arm, cx + 8, top + 8 - arm, 90)  # arm
+    fill(cx - 4 - stride, top + 12, cx - 1 - stride, size - 2, 20)  # back leg
+    fill(cx + 1 + stride, top + 12, cx + 4 + stride, size - 2, 20)  # front leg
+
+    return FrameImage(pixels=bytes(canvas), width=size, height=size)
+
+
+class FrameGenerationEngine:
+    """
+    Generates animation frames sequentially with pose caching and
+    perceptual-hash deduplication.
+    """
+
+    def __init__(
+        self,
+        generator: Optional[FrameGenerator] = None,
+        hash_threshold: int = 0,
+        hash_size: int = 16,
+        output_dir: str = "generated-assets/animations",
+    ):
+        """
+        Args:
+            generator: Frame generator (defaults to the mock renderer)
+            hash_threshold: Max dHash Hamming distance treated as duplicate
+            hash_size: dHash grid size (16 keeps 1px pose shifts distinct)
+            output_dir: Directory used for frame paths
+        """
+        self.generator = generator or render_mock_frame
+        self.hash_threshold = hash_threshold
+        self.hash_size = hash_size
+        self.output_dir = output_dir
+
+        # (character, pose, style key) -> frame
+        self._pose_cache: Dict[Tuple[str, str, str], GeneratedFrame] = {}
+        # (character, style key) -> unique frames in sprite sheet order
+        self._frames: Dict[Tuple[str, str], List[GeneratedFrame]] = {}
+
+        self.stats = {
+            "image_calls": 0,
+            "pose_cache_hits": 0,
+            "duplicate_frames": 0,
+        }
+
+    def generate_sequence(
+        self,
+        base_sprite: Dict[str, Any],
+        anim_name: str,
+        poses: List[str],
+        description: str,
+        style_guide: Dict[str, Any],
+    ) -> List[GeneratedFrame]:
+        """
+        Produce the frames for one animation.
+
+        Args:
+            base_sprite: Base sprite data (name, path, size)
+            anim_name: Animation name (e.g. "walk")
+            poses: Pose key per frame
+            description: Animation description for the prompt
+            style_guide: Art style guide
+
+        Returns:
+            One GeneratedFrame per requested frame (shared frames repeat)
+        """
+        character = base_sprite.get("name", "character")
+        style = style_key(style_guide)
+        sequence: List[GeneratedFrame] = []
+        previous: Optional[GeneratedFrame] = None
+
+        for index, pose in enumerate(poses):
+            cached = self._pose_cache.get((character, pose, style))
+            if cached is not None:
+                self.stats["pose_cache_hits"] += 1
+                frame = cached
+            else:
+                frame = self._generate_frame(FrameRequest(
+                    character=character,
+                    animation=anim_name,
+                    index=index,
+                    pose=pose,
+                    description=description,
+                    base_sprite=base_sprite,
+                    style_guide=style_guide,
+                    previous_frame=previous,
+                ))
+
+            sequence.append(frame)
+            previous = frame
+
+        return sequence
+
+    def unique_frames(self, character: str, style_guide: Dict[str, Any]) -> List[GeneratedFrame]:
+        """Frames stored for a character in one style, in sprite sheet order."""
+        return list(self._frames.get((character, style_key(style_guide)), []))
+
+    def _generate_frame(self, request: FrameRequest) -> GeneratedFrame:
+        """Call the generator once and store or alias the result."""
+        image = self.generator(request)
+        self.stats["image_calls"] += 1
+        style = style_key(request.style_guide)
+        key = (request.character, request.pose, style)
+
+        # Only frames of the same style may stand in for each other
+        phash = difference_hash(image.pixels, image.width, image.height, self.hash_size)
+        frames = self._frames.setdefault((request.character, style), [])
+
+        duplicate = self._find_duplicate(frames, phash)
+        if duplicate is not None:
+            self.stats["duplicate_frames"] += 1
+            duplicate.aliases.append(request.pose)
+            self._pose_cache[key] = duplicate
+            return duplicate
+
+        frame = GeneratedFrame(
+            pose=request.pose,
+            image=image,
+            phash=phash,
+            path=f"{self.output_dir}/{request.character}_{request.pose}_{style[:8]}.mock.txt",
+            sheet_index=len(frames),
+        )
+        frames.append(frame)
+        self._pose_cache[key] = frame
+        return frame
+
+    def _find_duplicate(
+        self,
+        frames: List[GeneratedFrame],
+        phash: int,
+    ) -> Optional[GeneratedFrame]:
+        """Find a frame of the same character and style within the Hamming threshold."""
+        for frame in frames:
+            if hamming_distance(frame.phash, phash) <= self.hash_threshold:
+                return frame
+        return None
@@ -16,10 +16,15 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from shared.errors import LLMError
 from shared.llm import LLMService
 from shared.context import ContextManager
 from shared.event_bus import EventBus, Event, EventType
-from shared.constants import QUALITY_THRESHOLDS
+from shared.constants import IMAGEN_4_MODEL, QUALITY_THRESHOLDS, SEMANTIC_CACHE_THRESHOLD
+from shared.metering import CallRecord, meter
+from shared.tracing import traced
+from art_team.asset_generator.asset_store import AssetStore, StoredAsset
+from art_team.asset_generator.prompt_cache import SemanticPromptCache
 
 
 class AssetGeneratorAgent:
@@ -136,14 +141,28 @@ Icon requirements:
 """
     }
 
-    def __init__(self):
-        """Initialize the Asset Generator Agent."""
-        self.llm = LLMService()
+    def __init__(self, semantic_threshold: Optional[float] = SEMANTIC_CACHE_THRESHOLD):
+        """
+        Initialize the Asset Generator Agent.
+
+        Args:
+            semantic_threshold: Minimum similarity to reuse an asset generated
+                for a differently worded request (None disables the cache)
+        """
+        self.llm = LLMService(agent="AssetGeneratorAgent")
         self.context = ContextManager()
         self.event_bus = EventBus()
         self.output_dir = Path("generated-assets")
         self.output_dir.mkdir(exist_ok=True)
-
+        self.asset_store = AssetStore(self.output_dir)
+        self.prompt_cache = None
+        if semantic_threshold is not None:
+            self.prompt_cache = SemanticPromptCache(
+                threshold=semantic_threshold,
+                path=self.asset_store.root / "prompt_cache.jsonl"
+            )
+
+    @traced("assets.generate")
     def generate_assets(
         self,
         asset_requests: List[Dict[str, Any]],
@@ -176,6 +195,8 @@ Icon requirements:
         generated_assets = []
         total_cost = 0.0
         total_iterations = 0
+        lookups_before = self.prompt_cache.lookups if self.prompt_cache else 0
+        hits_before = self.prompt_cache.hits if self.prompt_cache else 0
 
         print(f"\n📋 Review Mode: {review_mode.upper()}")
         if review_mode == "manual":
@@ -193,6 +214,19 @@ Icon requirements:
                 total_cost += asset["metadata"].get("cost", 0.0)
                 total_iterations += asset["metadata"].get("iterations", 0)
 
+            except LLMError as e:
+                print(f"❌ Failed to generate asset {request['name']}: {e.kind} error: {e}")
+                generated_assets.append({
+                    "requestId": request.get("id", request["name"]),
+                    "name": request["name"],
+                    "status": "failed",
+                    "error": {
+                        "message": str(e),
+                        "reason": f"llm_{e.kind}",
+                        "retryable": e.retryable
+                    }
+                })
+
             except Exception as e:
                 print(f"❌ Failed to generate asset {request['name']}: {e}")
                 generated_assets.append({
@@ -211,11 +245,25 @@ Icon requirements:
                 "totalAssets": len(asset_requests),
                 "successCount": sum(1 for a in generated_assets if a["status"] == "success"),
                 "failedCount": sum(1 for a in generated_assets if a["status"] == "failed"),
+                "reusedCount": sum(
+                    1 for a in generated_assets
+                    if a.get("metadata", {}).get("cacheHit")
+                ),
                 "totalIterations": total_iterations,
                 "totalCost": round(total_cost, 4)
             }
         }
 
+        if self.prompt_cache is not None:
+            lookups = self.prompt_cache.lookups - lookups_before
+            hits = self.prompt_cache.hits - hits_before
+            result["summary"]["semanticCache"] = {
+                "threshold": self.prompt_cache.threshold,
+                "lookups": lookups,
+                "hits": hits,
+                "hitRate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
         self.event_bus.emit(Event(
             type=EventType.ASSET_GENERATED,
             source_agent="AssetGeneratorAgent",
@@ -255,9 +303,63 @@ Icon requirements:
 
         # Build the prompt
         prompt = self._build_prompt(request, style_guide)
-
-        # Simulate asset generation (Mock mode)
-        asset_path = self._create_mock_asset(request)
+        owner = self._asset_owner(request)
+
+        # Reuse an asset generated earlier (any project) for the same prompt
+        cached = self.asset_store.lookup(prompt)
+        if cached is not None:
+            self.asset_store.add_ref(cached.content_hash, owner)
+            print(f"   ♻️  Reusing stored asset: {cached.path}")
+            return self._asset_result(
+                request, prompt, Path(cached.path), cached.content_hash,
+                cost=0.0, iterations=0, review_mode=review_mode, cache_hit=True
+            )
+
+        # Reuse an asset generated for a near-identical request
+        style_key = self._style_key(request, style_guide)
+        semantic_text = self._semantic_text(request)
+        similar = self._semantic_lookup(style_key, semantic_text)
+        if similar is not None:
+            self.asset_store.add_ref(similar.content_hash, owner)
+            return self._asset_result(
+                request, prompt, Path(similar.path), similar.content_hash,
+                cost=0.0, iterations=0, review_mode=review_mode, cache_hit=True
+            )
+
+        if self.llm.mock_mode:
+            # Simulate asset generation (Mock mode)
+            started = time.perf_counter()
+            image = self._create_mock_asset(request)
+            call = meter.record(CallRecord(
+                agent="AssetGeneratorAgent",
+                model=IMAGEN_4_MODEL,
+                kind="image",
+                images=1,
+                total_ms=(time.perf_counter() - started) * 1000,
+                mock=True,
+            ))
+            suffix = ".mock.txt"
+        else:
+            images = self.llm.generate_image(
+                prompt,
+                aspect_ratio=self._aspect_ratio(request["size"])
+            )
+            if not images:
+                raise RuntimeError("Imagen returned no image")
+            image = images[0]
+            call = self.llm.calls[-1]
+            suffix = ".png"
+
+        stored = self.asset_store.put(
+            image,
+            suffix,
+            prompt=prompt,
+            owner=owner
+        )
+        asset_path = Path(stored.path)
+        print(f"   ✅ {'Mock asset' if self.llm.mock_mode else 'Asset'} stored: {asset_path}")
+        if stored.similar_to:
+            print(f"   ℹ️  Looks like stored asset {stored.similar_to[:12]} (kept separately)")
 
         # Manual Review Mode
         if review_mode == "manual":
@@ -265,6 +367,9 @@ Icon requirements:
 
             if not approved:
                 print(f"   ❌ User rejected asset - regenerating...")
+                # Never serve a rejected asset from the store again
+                self.asset_store.forget_prompt(prompt)
+                self.asset_store.release(owner)
                 # In production, this would regenerate with user feedback
                 # For now, just mark as rejected
                 return {
@@ -284,12 +389,59 @@ Icon requirements:
                         "bestIteration": 1,
                         "qualityScore": 0,  # Rejected
                         "generationTime": 0.5,
-                        "cost": 0.01,
+                        "cost": call.cost_usd,
                         "review_mode": "manual",
                         "user_approved": False
                     }
                 }
 
+        if self.prompt_cache is not None:
+            self.prompt_cache.add(style_key, semantic_text, {"contentHash": stored.content_hash})
+
+        return self._asset_result(
+            request, prompt, asset_path, stored.content_hash,
+            cost=call.cost_usd, iterations=1, review_mode=review_mode, cache_hit=False
+        )
+
+    def _semantic_lookup(self, style_key: str, semantic_text: str) -> Optional[StoredAsset]:
+        """Stored asset for the most similar earlier request, if close enough."""
+        if self.prompt_cache is None:
+            return None
+        hit = self.prompt_cache.lookup(
+            style_key, semantic_text,
+            load=lambda payload: self.asset_store.get(payload["contentHash"])
+        )
+        if hit is None:
+            return None
+        print(f"   ♻️  Reusing similar asset ({hit.similarity:.2f}): \"{hit.description}\"")
+        return hit.asset
+
+    def _style_key(self, request: Dict[str, Any], style_guide: Dict[str, Any]) -> str:
+        """Everything besides the subject that must match for reuse."""
+        return "|".join([
+            request["category"],
+            style_guide.get("artStyle", "pixel_art"),
+            style_guide.get("mood", ""),
+            f"{request['size']['width']}x{request['size']['height']}",
+            ",".join(style_guide.get("colorPalette") or []),
+        ])
+
+    def _semantic_text(self, request: Dict[str, Any]) -> str:
+        """Subject text compared by the semantic cache."""
+        return f"{request['description']} {request.get('purpose', '')}"
+
+    def _asset_result(
+        self,
+        request: Dict[str, Any],
+        prompt: str,
+        asset_path: Path,
+        content_hash: str,
+        cost: float,
+        iterations: int,
+        review_mode: str,
+        cache_hit: bool
+    ) -> Dict[str, Any]:
+        """Build the success result for a generated or reused asset."""
         return {
             "requestId": request.get("id", request["name"]),
             "name": request["name"],
@@ -303,16 +455,32 @@ Icon requirements:
             "metadata": {
                 "prompt": prompt,
                 "model": "imagen-4.0-generate-001",
-                "iterations": 1,  # Mock
+                "iterations": iterations,  # Mock
                 "bestIteration": 1,
                 "qualityScore": 95,  # Mock
-                "generationTime": 0.5,  # Mock
-                "cost": 0.01,  # Mock
+                "generationTime": 0.5 if not cache_hit else 0.0,  # Mock
+                "cost": cost,  # Mock
+                "contentHash": content_hash,
+                "cacheHit": cache_hit,
                 "review_mode": review_mode,
                 "user_approved": True if review_mode == "manual" else None
             }
         }
 
+    def _aspect_ratio(self, size: Dict[str, int]) -> str:
+        """Closest Imagen aspect ratio for a requested size."""
+        ratio = size["width"] / max(size["height"], 1)
+        ratios = {"1:1": 1.0, "16:9": 16 / 9, "9:16": 9 / 16, "4:3": 4 / 3, "3:4": 3 / 4}
+        return min(ratios, key=lambda name: abs(ratios[name] - ratio))
+
+    def _asset_owner(self, request: Dict[str, Any]) -> str:
+        """Store reference owner for a request ("<project_id>/<request id>")."""
+        try:
+            project_id = self.context.get().project_id
+        except RuntimeError:
+            project_id = "default"
+        return f"{project_id}/{request.get('id', request['name'])}"
+
     def _request_user_approval(
         self,
         request: Dict[str, Any],
@@ -430,39 +598,27 @@ gradient background, multiple subjects, blur, soft edges, low quality
 
         return full_prompt.strip()
 
-    def _create_mock_asset(self, request: Dict[str, Any]) -> Path:
+    def _create_mock_asset(self, request: Dict[str, Any]) -> bytes:
         """
-        Create a mock asset file (placeholder for Phase 2).
+        Create mock asset content (placeholder for Phase 2).
 
         Args:
             request: Asset specification
 
         Returns:
-            Path to created mock asset
+            Mock asset file content (stored by the AssetStore)
         """
-        category = request["category"]
-        name = request["name"].replace(" ", "_").lower()
-
-        # Create category directory
-        category_dir = self.output_dir / category
-        category_dir.mkdir(exist_ok=True)
-
-        # Create a simple text file as placeholder
-        # In Phase 2, this will be an actual PNG image
-        asset_path = category_dir / f"{name}.mock.txt"
-
-        with open(asset_path, "w") as f:
-            f.write(f"MOCK ASSET\n")
-            f.write(f"Name: {request['name']}\n")
-            f.write(f"Category: {category}\n")
-            f.write(f"Size: {request['size']['width']}x{request['size']['height']}\n")
-            f.write(f"Description: {request['description']}\n")
-            f.write(f"\nThis is a placeholder. In Phase 2, this will be a real PNG image\n")
-            f.write(f"generated by Gemini Imagen 4.\n")
-
-        print(f"   ✅ Mock asset created: {asset_path}")
-
-        return asset_path
+        lines = [
+            "MOCK ASSET",
+            f"Name: {request['name']}",
+            f"Category: {request['category']}",
+            f"Size: {request['size']['width']}x{request['size']['height']}",
+            f"Description: {request['description']}",
+            "",
+            "This is a placeholder. In Phase 2, this will be a real PNG image",
+            "generated by Gemini Imagen 4.",
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
 
 
 def main():
@@ -0,0 +1,411 @@
+"""
+Asset Store - Content-addressed asset storage shared across projects
+
+Generated files are stored once under generated-assets/.store/objects,
+named by the SHA-256 of their content, so re-running a project never
+overwrites earlier assets and identical outputs are never duplicated.
+
+The index (generated-assets/.store/index.json) maps:
+- content hash  -> object record (path, size, perceptual hash, owners,
+                   closest earlier near-duplicate)
+- prompt key    -> content hash (normalized Imagen prompt)
+- owner         -> content hash (e.g. "game-20260227-132956/player_sprite")
+
+AssetGeneratorAgent consults lookup() before spending an Imagen call.
+Objects are reference-counted by owner; collect_garbage() deletes objects
+no owner references anymore, plus temporary files left by interrupted
+writes.
+
+Several processes may share one store. Every change runs under an
+exclusive lock on .store/index.lock: the index is re-read if another
+process wrote it, the change applied and the index written back, so
+concurrent writers never drop each other's entries. Object files are
+written under the same lock, so garbage collection never sees a file
+whose index entry is still to come.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from shared.imaging import hamming_distance, perceptual_hash
+
+
+INDEX_VERSION = 1
+
+# Near-duplicate threshold (dHash bits out of 64)
+NEAR_DUPLICATE_DISTANCE = 6
+
+# The 64-bit hash is split into 8 bands of 8 bits. Two hashes within
+# distance < 8 must agree on at least one band, so band buckets find every
+# near-duplicate candidate without scanning the whole index.
+PHASH_BANDS = 8
+PHASH_BAND_BITS = 8
+
+# Temporary files older than this are leftovers of interrupted writes
+STALE_TMP_SECONDS = 3600
+
+
+@dataclass
+class StoredAsset:
+    """A stored object as returned by the store API."""
+
+    content_hash: str
+    path: str
+    size: int
+    phash: Optional[int]
+    refs: List[str]
+    similar_to: Optional[str] = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w#]+", " ", prompt.lower())
+    return " ".join(text.split())
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable key for a prompt (hash of its normalized form)."""
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on path (created if missing) across processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AssetStore:
+    """
+    Content-addressed store with prompt and perceptual-hash indexes.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Asset root (e.g. Path("generated-assets"))
+        """
+        self.root = Path(root) / ".store"
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / "index.lock"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._objects: Dict[str, Dict[str, Any]] = {}
+        self._prompts: Dict[str, str] = {}
+        self._owners: Dict[str, str] = {}
+        self._bands: Dict[int, Dict[int, set]] = {band: {} for band in range(PHASH_BANDS)}
+        self._stamp: Optional[Tuple[int, int]] = None   # (mtime_ns, size) of the index read
+        self._lock = threading.RLock()
+        self._depth = 0
+        with self._lock:
+            self._refresh()
+
+    def lookup(self, prompt: str) -> Optional[StoredAsset]:
+        """
+        Find an asset previously generated for an equivalent prompt.
+
+        Args:
+            prompt: Full generation prompt
+
+        Returns:
+            StoredAsset or None
+        """
+        with self._lock:
+            self._refresh()
+            return self._existing(self._prompts.get(prompt_key(prompt)))
+
+    def get(self, content_hash: str) -> Optional[StoredAsset]:
+        """Look up an object by content hash (None if gone)."""
+        with self._lock:
+            self._refresh()
+            return self._existing(content_hash)
+
+    def find_similar(
+        self,
+        phash: int,
+        max_distance: int = NEAR_DUPLICATE_DISTANCE,
+    ) -> Optional[StoredAsset]:
+        """
+        Find the closest stored image within max_distance dHash bits.
+        """
+        best_hash = None
+        best_distance = max_distance + 1
+        for content_hash in self._phash_candidates(phash):
+            distance = hamming_distance(phash, self._objects[content_hash]["phash"])
+            if distance < best_distance:
+                best_hash, best_distance = content_hash, distance
+        return self._asset(best_hash) if best_hash else None
+
+    def put(
+        self,
+        data: bytes,
+        extension: str,
+        prompt: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> StoredAsset:
+        """
+        Store content (once) and register prompt/owner references.
+
+        Args:
+            data: File content
+            extension: File extension including dot (".png", ".mock.txt")
+            prompt: Prompt that produced the content (for lookup())
+            owner: Reference owner (project/asset id)
+
+        Returns:
+            The stored asset. Content is always stored under its exact hash;
+            a perceptually near-identical earlier image is only reported in
+            similar_to (dHash ignores colour, so it is never substituted).
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        with self._transaction():
+            if content_hash not in self._objects:
+                phash = perceptual_hash(data)
+                similar = self.find_similar(phash) if phash is not None else None
+
+                path = self.objects_dir / content_hash[:2] / f"{content_hash}{extension}"
+                path.parent.mkdir(exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+
+                self._objects[content_hash] = {
+                    "path": str(path),
+                    "size": len(data),
+                    "phash": phash,
+                    "refs": [],
+                    "similar_to": similar.content_hash if similar else None,
+                    "created_at": datetime.now().isoformat(),
+                }
+                self._index_phash(content_hash, phash)
+
+            if prompt is not None:
+                self._prompts[prompt_key(prompt)] = content_hash
+            if owner is not None:
+                self._assign(owner, content_hash)
+
+            return self._asset(content_hash)
+
+    def forget_prompt(self, prompt: str):
+        """Stop serving the asset mapped to a prompt (e.g. rejected in review)."""
+        with self._transaction():
+            self._prompts.pop(prompt_key(prompt), None)
+
+    def add_ref(self, content_hash: str, owner: str):
+        """Point an owner at an object (releasing its previous object)."""
+        with self._transaction():
+            if content_hash not in self._objects:
+                raise KeyError(f"Unknown asset: {content_hash}")
+            self._assign(owner, content_hash)
+
+    def release(self, owner: str):
+        """Drop an owner's reference."""
+        with self._transaction():
+            content_hash = self._owners.pop(owner, None)
+            if content_hash and content_hash in self._objects:
+                refs = self._objects[content_hash]["refs"]
+                if owner in refs:
+                    refs.remove(owner)
+
+    def release_project(self, project_id: str):
+        """Drop every reference owned by a project."""
+        prefix = f"{project_id}/"
+        with self._transaction():
+            for owner in [o for o in self._owners if o.startswith(prefix)]:
+                self.release(owner)
+
+    def collect_garbage(self) -> List[str]:
+        """
+        Delete objects no owner references and stale temporary files.
+
+        Files the index does not know are left alone: only the index says
+        what is unreferenced.
+
+        Returns:
+            Paths that were removed
+        """
+        removed = []
+        with self._transaction():
+            for content_hash in [h for h, obj in self._objects.items() if not obj["refs"]]:
+                path = Path(self._objects[content_hash]["path"])
+                self._drop_object(content_hash)
+                if path.exists():
+                    path.unlink()
+                removed.append(str(path))
+
+            cutoff = time.time() - STALE_TMP_SECONDS
+            for path in self.objects_dir.glob("*/*.tmp"):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed.append(str(path))
+            for bucket in self.objects_dir.iterdir():
+                if bucket.is_dir() and not any(bucket.iterdir()):
+                    bucket.rmdir()
+
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size summary."""
+        return {
+            "objects": len(self._objects),
+            "bytes": sum(obj["size"] for obj in self._objects.values()),
+            "prompts": len(self._prompts),
+            "owners": len(self._owners),
+            "orphans": sum(1 for obj in self._objects.values() if not obj["refs"]),
+            "near_duplicates": sum(1 for obj in self._objects.values() if obj.get("similar_to")),
+        }
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Apply a change to the latest index under the store lock, then save."""
+        with self._lock:
+            if self._depth:
+                # Nested call (e.g. release_project -> release)
+                yield
+                return
+            with file_lock(self.lock_path):
+                self._depth = 1
+                try:
+                    self._refresh()
+                    yield
+                    self._save()
+                finally:
+                    self._depth = 0
+
+    def _existing(self, content_hash: Optional[str]) -> Optional[StoredAsset]:
+        """Asset for content_hash, forgetting it if its file is gone."""
+        if content_hash is None or content_hash not in self._objects:
+            return None
+        if not Path(self._objects[content_hash]["path"]).exists():
+            # File removed behind our back - forget it
+            with self._transaction():
+                if content_hash in self._objects:
+                    self._drop_object(content_hash)
+            return None
+        return self._asset(content_hash)
+
+    def _assign(self, owner: str, content_hash: str):
+        """Move an owner's single reference to content_hash."""
+        previous = self._owners.get(owner)
+        if previous == content_hash:
+            return
+        if previous and previous in self._objects:
+            refs = self._objects[previous]["refs"]
+            if owner in refs:
+                refs.remove(owner)
+        self._owners[owner] = content_hash
+        self._objects[content_hash]["refs"].append(owner)
+
+    def _drop_object(self, content_hash: str):
+        """Remove an object and every index entry pointing at it."""
+        obj = self._objects.pop(content_hash)
+        if obj["phash"] is not None:
+            for band, value in self._band_values(obj["phash"]):
+                self._bands[band].get(value, set()).discard(content_hash)
+        self._prompts = {k: v for k, v in self._prompts.items() if v != content_hash}
+        self._owners = {k: v for k, v in self._owners.items() if v != content_hash}
+
+    def _phash_candidates(self, phash: int) -> set:
+        """Objects sharing at least one band with phash."""
+        candidates = set()
+        for band, value in self._band_values(phash):
+            candidates |= self._bands[band].get(value, set())
+        return candidates
+
+    def _index_phash(self, content_hash: str, phash: Optional[int]):
+        if phash is None:
+            return
+        for band, value in self._band_values(phash):
+            self._bands[band].setdefault(value, set()).add(content_hash)
+
+    @staticmethod
+    def _band_values(phash: int):
+        mask = (1 << PHASH_BAND_BITS) - 1
+        for band in range(PHASH_BANDS):
+            yield band, (phash >> (band * PHASH_BAND_BITS)) & mask
+
+    def _asset(self, content_hash: str) -> StoredAsset:
+        obj = self._objects[content_hash]
+        return StoredAsset(
+            content_hash=content_hash,
+            path=obj["path"],
+            size=obj["size"],
+            phash=obj["phash"],
+            refs=list(obj["refs"]),
+            similar_to=obj.get("similar_to"),
+        )
+
+    def _index_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Re-read the index if another process wrote it since we did."""
+        stamp = self._index_stamp()
+        if stamp != self._stamp:
+            self._load()
+            self._stamp = stamp
+
+    def _load(self):
+        self._objects, self._prompts, self._owners = {}, {}, {}
+        self._bands = {band: {} for band in range(PHASH_BANDS)}
+        if not self.index_path.exists():
+            return
+        data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        if data.get("version") != INDEX_VERSION:
+            print(f"⚠️  Warning: Ignoring asset index version {data.get('version')}")
+            return
+        self._objects = data.get("objects", {})
+        self._prompts = data.get("prompts", {})
+        self._owners = data.get("owners", {})
+        for content_hash, obj in self._objects.items():
+            self._index_phash(content_hash, obj["phash"])
+
+    def _save(self):
+        """Write the index atomically (callers hold the store lock)."""
+        payload = {
+            "version": INDEX_VERSION,
+            "objects": self._objects,
+            "prompts": self._prompts,
+            "owners": self._owners,
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+        self._stamp = self._index_stamp()
@@ -0,0 +1,294 @@
+"""
+Semantic Prompt Cache - Reuse assets for near-identical requests
+
+"Glowing memory chip, cyan color" and "cyan memory chip collectible" ask
+for the same sprite but hash to different prompts. This cache embeds the
+normalized request description and looks up the nearest previously
+generated asset; above the similarity threshold the stored asset is reused
+instead of paying for another Imagen call.
+
+Embeddings are hashed bag-of-words vectors (stemmed unigrams plus
+character trigrams), L2-normalized so a dot product is cosine similarity.
+Colour words weigh more (a red chip is not a cyan chip) and presentation
+words like "glowing" or "collectible" less, so paraphrases of one asset
+clear the threshold while assets differing in an attribute do not.
+Vectors live in one flat array('f') matrix per style key and are searched
+by brute force: a project holds hundreds of assets, where a scan takes
+milliseconds and an index needing training would only add stalls.
+
+Entries are appended to a JSON Lines file, one line per generated asset.
+
+The style key (category, art style, mood, size, palette) is an exact
+partition: a background is never reused as a sprite, nor a pixel-art asset
+for a hand-drawn game.
+"""
+
+import json
+import math
+import re
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from shared.constants import SEMANTIC_CACHE_THRESHOLD
+
+
+EMBEDDING_DIM = 256
+TRIGRAM_WEIGHT = 0.35
+
+# Words that describe nothing about the subject itself
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "with", "in", "on", "for", "to",
+    "that", "which", "its", "style", "game", "sprite", "asset", "image", "color", "colour",
+    "animation", "pose", "looking", "very",
+}
+
+# Presentation/purpose words: paraphrases add or drop them freely
+DESCRIPTOR_WORDS = {
+    "glowing", "shiny", "bright", "small", "large", "big", "little",
+    "collectible", "pickup", "item", "icon", "object", "simple", "cute",
+}
+DESCRIPTOR_WEIGHT = 0.3
+
+# Words that make a different asset when they differ ("cyan" vs "red" chip)
+ATTRIBUTE_WORDS = {
+    "red", "orange", "yellow", "gold", "golden", "green", "cyan", "teal",
+    "blue", "purple", "violet", "pink", "magenta", "white", "black", "gray",
+    "silver", "brown",
+}
+ATTRIBUTE_WEIGHT = 2.0
+
+# Spellings of the same attribute
+SYNONYMS = {"golden": "gold", "grey": "gray", "violet": "purple"}
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping ("spiked", "spikes", "spike" -> "spik")."""
+    word = SYNONYMS.get(word, word)
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if suffix in ("ing", "ed") and word[-1] == word[-2] and word[-1] not in "aeiouls":
+                word = word[:-1]    # "spinning" -> "spin"
+            break
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+DESCRIPTOR_STEMS = {stem(word) for word in DESCRIPTOR_WORDS}
+ATTRIBUTE_STEMS = {stem(word) for word in ATTRIBUTE_WORDS}
+
+
+def normalize_description(text: str) -> List[str]:
+    """Lowercase, tokenize, drop stopwords and apply light stemming."""
+    return [
+        stem(word)
+        for word in re.findall(r"[a-z0-9#]+", text.lower())
+        if word not in STOPWORDS and len(word) >= 2
+    ]
+
+
+def token_weight(token: str) -> float:
+    """Weight of a normalized token in the embedding."""
+    if token in ATTRIBUTE_STEMS:
+        return ATTRIBUTE_WEIGHT
+    if token in DESCRIPTOR_STEMS:
+        return DESCRIPTOR_WEIGHT
+    return 1.0
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> Dict[int, float]:
+    """
+    Embed text as a sparse, L2-normalized hashed feature vector.
+
+    Returns:
+        {dimension: weight}
+    """
+    features: Dict[int, float] = {}
+
+    def add(feature: str, weight: float):
+        h = zlib.crc32(feature.encode("utf-8"))
+        index = h % dim
+        sign = 1.0 if (h >> 31) & 1 else -1.0
+        features[index] = features.get(index, 0.0) + sign * weight
+
+    for token in set(normalize_description(text)):
+        weight = token_weight(token)
+        add(f"w:{token}", weight)
+        padded = f"^{token}$"
+        trigrams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+        for trigram in trigrams:
+            add(f"t:{trigram}", weight * TRIGRAM_WEIGHT / math.sqrt(len(trigrams)))
+
+    norm = math.sqrt(sum(v * v for v in features.values()))
+    if norm == 0:
+        return {}
+    return {k: v / norm for k, v in features.items() if v != 0.0}
+
+
+@dataclass
+class CacheHit:
+    """A cached asset returned by lookup()."""
+
+    payload: Dict[str, Any]
+    similarity: float
+    description: str
+    asset: Any = None           # what lookup()'s load returned for payload
+
+
+class VectorIndex:
+    """
+    Flat matrix of normalized vectors, searched by brute force.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.matrix = array("f")
+        self.payloads: List[Dict[str, Any]] = []
+        self.descriptions: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def add(self, vector: Dict[int, float], description: str, payload: Dict[str, Any]):
+        dense = array("f", bytes(4 * self.dim))
+        for index, value in vector.items():
+            dense[index] = value
+        self.matrix.extend(dense)
+        self.payloads.append(payload)
+        self.descriptions.append(description)
+
+    def discard(self, row: int):
+        """Zero a row's vector so it never matches again."""
+        base = row * self.dim
+        self.matrix[base:base + self.dim] = array("f", bytes(4 * self.dim))
+
+    def search(self, vector: Dict[int, float]) -> Optional[Tuple[int, float]]:
+        """Best (row, cosine similarity) or None if empty."""
+        if not self.payloads or not vector:
+            return None
+
+        # Sparse query x dense rows: only the query's non-zero dimensions matter
+        items = list(vector.items())
+        matrix = self.matrix
+        dim = self.dim
+        best_row, best_score = -1, -2.0
+        for row in range(len(self.payloads)):
+            base = row * dim
+            score = sum(value * matrix[base + index] for index, value in items)
+            if score > best_score:
+                best_row, best_score = row, score
+
+        return (best_row, best_score) if best_row >= 0 else None
+
+
+class SemanticPromptCache:
+    """
+    Similarity cache from (style key, description) to stored assets.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        path: Optional[Path] = None,
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a hit (0-1)
+            path: Optional JSON Lines file to persist entries across runs
+        """
+        self.threshold = threshold
+        self.path = Path(path) if path else None
+
+        self._indexes: Dict[str, VectorIndex] = {}
+        self.lookups = 0
+        self.hits = 0
+
+        self._load()
+
+    def lookup(
+        self,
+        style_key: str,
+        description: str,
+        load: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> Optional[CacheHit]:
+        """
+        Nearest cached asset above the threshold, if any.
+
+        Args:
+            load: Fetches the asset for a payload (None if it is gone); a
+                match whose asset cannot be loaded is dropped as a miss
+        """
+        self.lookups += 1
+        index = self._indexes.get(style_key)
+        if index is None:
+            return None
+
+        best = index.search(embed(description))
+        if best is None or best[1] < self.threshold:
+            return None
+
+        row, similarity = best
+        asset = None
+        if load is not None:
+            asset = load(index.payloads[row])
+            if asset is None:
+                index.discard(row)
+                return None
+        self.hits += 1
+        return CacheHit(
+            payload=index.payloads[row],
+            similarity=similarity,
+            description=index.descriptions[row],
+            asset=asset,
+        )
+
+    def add(self, style_key: str, description: str, payload: Dict[str, Any]):
+        """Remember a generated asset (payload must be JSON-serializable)."""
+        self._index(style_key).add(embed(description), description, payload)
+        self._append({"style_key": style_key, "description": description, "payload": payload})
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup/hit counters for the generation summary."""
+        return {
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hitRate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "entries": sum(len(index) for index in self._indexes.values()),
+        }
+
+    def _index(self, style_key: str) -> VectorIndex:
+        index = self._indexes.get(style_key)
+        if index is None:
+            index = self._indexes[style_key] = VectorIndex()
+        return index
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue    # torn final line of an interrupted append
+                # Embeddings are deterministic, so only the text is persisted
+                self._index(entry["style_key"]).add(
+                    embed(entry["description"]), entry["description"], entry["payload"]
+                )
+
+    def _append(self, entry: Dict[str, Any]):
+        """One line per entry: inserts never rewrite the file."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
@@ -1,5 +1,5 @@
 """
-Audio Designer Agent - Game audio generation (placeholder)
+Audio Designer Agent - Game audio generation (procedural synth)
 """
 
 from .agent import AudioDesignerAgent
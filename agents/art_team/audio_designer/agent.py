@@ -1,15 +1,13 @@
 """
-Audio Designer Agent - Game audio generation (PLACEHOLDER)
+Audio Designer Agent - Game audio generation
 
-NOTE: This is a simplified version for Phase 2.
-The actual audio generation API needs to be selected and integrated.
+Sound effects and background loops are rendered offline by the procedural
+synth (see synth.py): parameters are derived from each request description
+and the style guide mood, then rendered without any API call. Batches are
+rendered in parallel and encoded to every target format by pipeline.py.
 
-Options being considered:
-- Option 1: Stable Audio API (music + SFX)
-- Option 2: ElevenLabs (SFX generation)
-- Option 3: Procedural Web Audio synthesis (free, code-based)
-
-Decision required before full implementation.
+External audio APIs (Stable Audio, ElevenLabs) remain an option for
+realistic or voiced audio; procedural synthesis covers retro/arcade SFX.
 """
 
 import os
@@ -24,19 +22,19 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from shared.llm import LLMService
 from shared.context import ContextManager
 from shared.event_bus import EventBus, Event, EventType
+from art_team.audio_designer.pipeline import AudioRenderPipeline, DEFAULT_FORMATS
+from art_team.audio_designer.synth import SAMPLE_RATE
 
 
 class AudioDesignerAgent:
     """
-    Designs and generates game audio (Placeholder for Phase 2).
+    Designs and generates game audio.
 
-    Responsibilities (when implemented):
+    Responsibilities:
     - Generate sound effects (SFX) for game actions
-    - Create background music (BGM) for levels
+    - Create background music (BGM) loops for levels
     - Ensure audio fits game style and mood
-    - Export in web-compatible formats (WAV, MP3, OGG)
-
-    Current Status: PLACEHOLDER - External API not yet selected
+    - Export in web-compatible formats (WAV + OGG)
     """
 
     # Standard game sound categories
@@ -48,11 +46,20 @@ class AudioDesignerAgent:
         "feedback": ["success", "failure", "combo", "power_up"]
     }
 
-    def __init__(self):
-        """Initialize the Audio Designer Agent."""
-        self.llm = LLMService()
+    def __init__(self, formats=DEFAULT_FORMATS, max_workers=None):
+        """
+        Initialize the Audio Designer Agent.
+
+        Args:
+            formats: Target audio formats for every sound
+            max_workers: Render process cap (default: CPU count)
+        """
+        self.llm = LLMService(agent="AudioDesignerAgent")
         self.context = ContextManager()
         self.event_bus = EventBus()
+        self.output_dir = Path("generated-assets") / "audio"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.pipeline = AudioRenderPipeline(self.output_dir, formats, max_workers)
 
     def generate_audio(
         self,
@@ -60,7 +67,7 @@ class AudioDesignerAgent:
         style_guide: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Generate audio assets (Placeholder implementation).
+        Generate audio assets with the procedural synth.
 
         Args:
             audio_requests: List of audio specifications
@@ -68,46 +75,69 @@ class AudioDesignerAgent:
 
         Returns:
             Generated audio metadata
-
-        NOTE: This is a placeholder. Real implementation will:
-        1. Call external audio generation API
-        2. Generate actual WAV/MP3 files
-        3. Validate audio quality
-        4. Export in multiple formats
         """
-        print("\n🔊 Audio Designer Agent - PLACEHOLDER MODE")
-        print("⚠️  External audio API not yet integrated")
+        print("\n🔊 Audio Designer Agent - Procedural synthesis")
         print(f"   Requested sounds: {len(audio_requests)}")
 
-        generated_audio = []
-
-        for request in audio_requests:
-            sound_name = request.get("name", "unknown")
-            category = request.get("category", "sfx")
-            description = request.get("description", "")
+        results, stats = self.pipeline.run(audio_requests, style_guide)
 
-            print(f"   📝 {sound_name} ({category}): {description}")
-
-            # Placeholder result
+        generated_audio = []
+        for rendered in results:
+            if rendered.error:
+                print(f"   ❌ Failed to render {rendered.name}: {rendered.error}")
+                generated_audio.append({
+                    "name": rendered.name,
+                    "category": rendered.category,
+                    "description": rendered.description,
+                    "status": "failed",
+                    "error": {
+                        "message": rendered.error,
+                        "reason": "synthesis_error"
+                    }
+                })
+                continue
+
+            print(f"   🎵 {rendered.name} ({rendered.category}): {rendered.duration_ms}ms "
+                  f"rendered in {rendered.render_ms:.1f}ms → {', '.join(rendered.paths)}")
+
+            primary = next(iter(rendered.paths))
             generated_audio.append({
-                "name": sound_name,
-                "category": category,
-                "description": description,
-                "path": f"generated-assets/audio/{sound_name}.placeholder.txt",
-                "format": "pending",  # Will be WAV/MP3 when implemented
-                "duration_ms": 500,  # Estimated
-                "status": "placeholder"
+                "name": rendered.name,
+                "category": rendered.category,
+                "description": rendered.description,
+                "path": rendered.paths[primary],
+                "format": primary,
+                "files": rendered.paths,
+                "file_sizes": rendered.file_sizes,
+                "sample_rate": SAMPLE_RATE,
+                "duration_ms": rendered.duration_ms,
+                "loop": rendered.loop,
+                "synth": rendered.synth,
+                "render_ms": round(rendered.render_ms, 2),
+                "encode_ms": round(rendered.encode_ms, 2),
+                "status": "generated"
             })
 
+        fallbacks = {r.name: r.fallbacks for r in results if r.fallbacks}
+        if fallbacks:
+            print("   ⚠️  ffmpeg not found - compressed formats fell back to 8-bit WAV")
+
+        generated_count = sum(1 for a in generated_audio if a["status"] == "generated")
+
         result = {
             "generated_audio": generated_audio,
             "summary": {
                 "total_sounds": len(audio_requests),
-                "generated": 0,  # None actually generated yet
-                "placeholder": len(audio_requests),
-                "api_status": "not_configured"
-            },
-            "note": "Audio generation requires external API selection. See agent documentation for options."
+                "generated": generated_count,
+                "failed": len(audio_requests) - generated_count,
+                "placeholder": 0,
+                "api_status": "procedural",
+                "workers": stats["workers"],
+                "wall_ms": stats["wall_ms"],
+                "render_times_ms": stats["render_times_ms"],
+                "encode_times_ms": stats["encode_times_ms"],
+                "format_fallbacks": fallbacks
+            }
         }
 
         # Update context
@@ -119,10 +149,10 @@ class AudioDesignerAgent:
 
 
 def main():
-    """Test the Audio Designer Agent (Placeholder)."""
+    """Test the Audio Designer Agent."""
     # Initialize context
     context_manager = ContextManager()
-    context_manager.initialize("test-audio", "Test audio generation placeholder")
+    context_manager.initialize("test-audio", "Test procedural audio generation")
 
     agent = AudioDesignerAgent()
 
@@ -158,7 +188,7 @@ def main():
     }
 
     print("=" * 80)
-    print("AUDIO DESIGNER AGENT - PLACEHOLDER TEST")
+    print("AUDIO DESIGNER AGENT - TEST RUN")
     print("=" * 80)
 
     result = agent.generate_audio(audio_requests, style_guide)
@@ -169,30 +199,11 @@ def main():
     print(json.dumps(result["summary"], indent=2))
 
     print("\n" + "=" * 80)
-    print("NEXT STEPS FOR AUDIO IMPLEMENTATION")
+    print("GENERATED FILES")
     print("=" * 80)
-    print("""
-1. Select External Audio API:
-   - Stable Audio: Good for music + SFX, paid
-   - ElevenLabs: Good for SFX, paid
-   - Web Audio Synthesis: Free, requires code generation
-
-2. Implement API Integration:
-   - Add Vercel serverless function for audio proxy
-   - Update agent to call external API
-   - Handle audio file downloads and conversions
-
-3. Quality Validation:
-   - Check audio duration
-   - Validate file format
-   - Ensure web compatibility
-
-4. Cost Optimization:
-   - Cache generated sounds
-   - Use procedural generation for simple sounds
-   - Limit API calls per project
-""")
-
+    for audio in result["generated_audio"]:
+        if audio["status"] == "generated":
+            print(f"  {audio['path']} ({audio['duration_ms']}ms, rendered in {audio['render_ms']}ms)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,306 @@
+"""
+Audio Render Pipeline - Parallel batch rendering and encoding
+
+A full game needs dozens of SFX plus looping BGM, each in several formats.
+The pipeline fans render jobs out to a process pool (capped by CPU count),
+renders every sound exactly once and encodes all target formats from that
+single PCM buffer:
+
+- "wav":  16-bit PCM, written straight from the buffer (header + memoryview)
+- "wav8": 8-bit PCM, half the size, always available
+- "ogg"/"mp3": compressed web formats, piped from the buffer into ffmpeg
+  when it is installed (falls back to "wav8" otherwise)
+
+Workers write their own files with a single vectored write per file, so
+only small result records travel back to the parent process.
+"""
+
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from art_team.audio_designer.synth import (
+    MUSIC_CATEGORIES,
+    SAMPLE_RATE,
+    design_params,
+    render_loop,
+    render_sfx,
+    to_pcm16,
+)
+
+
+DEFAULT_FORMATS = ("wav", "ogg")
+
+# ffmpeg codec arguments for compressed formats
+FFMPEG_CODECS = {
+    "ogg": ["-c:a", "libvorbis", "-q:a", "4"],
+    "mp3": ["-c:a", "libmp3lame", "-q:a", "5"],
+}
+
+# Used when a compressed format cannot be encoded on this machine
+FORMAT_FALLBACK = "wav8"
+
+
+@dataclass
+class RenderJob:
+    """One sound to render (and encode to every target format)."""
+
+    name: str
+    category: str
+    description: str
+    style_guide: Dict[str, Any]
+    formats: Tuple[str, ...]
+    output_dir: str
+    file_stem: str = ""         # output file name without extension (default: name)
+
+
+# Everything besides the batch-wide style guide that shapes a sound
+JobKey = Tuple[str, str, str]   # name, category, description
+
+
+@dataclass
+class RenderResult:
+    """Outcome of a RenderJob (small enough to return from a worker)."""
+
+    name: str
+    category: str
+    description: str
+    paths: Dict[str, str] = field(default_factory=dict)
+    file_sizes: Dict[str, int] = field(default_factory=dict)
+    duration_ms: int = 0
+    render_ms: float = 0.0
+    encode_ms: float = 0.0
+    loop: bool = False
+    synth: Optional[Dict[str, Any]] = None
+    fallbacks: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def render_job(job: RenderJob) -> RenderResult:
+    """
+    Render one sound and encode every requested format (worker entry point).
+
+    Args:
+        job: Render job
+
+    Returns:
+        RenderResult with per-format paths and timings
+    """
+    result = RenderResult(job.name, job.category, job.description)
+    try:
+        start = time.perf_counter()
+        if job.category in MUSIC_CATEGORIES:
+            samples = render_loop(job.description, job.style_guide)
+            result.loop = True
+            result.synth = {"type": "loop"}
+        else:
+            params = design_params(job.name, job.category, job.description, job.style_guide)
+            samples = render_sfx(params, seed=zlib.crc32(job.name.encode("utf-8")))
+            result.synth = asdict(params)
+        pcm = to_pcm16(samples)
+        result.render_ms = (time.perf_counter() - start) * 1000
+        result.duration_ms = len(pcm) * 1000 // SAMPLE_RATE
+
+        # Every encoder reads the same buffer; nothing is copied for WAV
+        start = time.perf_counter()
+        view = memoryview(pcm).cast("B")
+        output_dir = Path(job.output_dir)
+        for fmt in job.formats:
+            target = fmt
+            if fmt in FFMPEG_CODECS and not ffmpeg_available():
+                target = FORMAT_FALLBACK
+                result.fallbacks[fmt] = target
+            if target in result.paths:
+                continue
+            path = output_dir / f"{job.file_stem or job.name}.{_extension(target)}"
+            result.file_sizes[target] = encode(target, view, path)
+            result.paths[target] = str(path)
+        result.encode_ms = (time.perf_counter() - start) * 1000
+
+    except Exception as e:
+        result.error = str(e)
+
+    return result
+
+
+def encode(fmt: str, pcm: memoryview, path: Path, sample_rate: int = SAMPLE_RATE) -> int:
+    """
+    Encode 16-bit mono PCM bytes to `path`.
+
+    Returns:
+        Written file size in bytes
+    """
+    if fmt == "wav":
+        return _write_vectored(path, [_wav_header(len(pcm), sample_rate, 2), pcm])
+
+    if fmt == "wav8":
+        # 8-bit WAV is unsigned: high byte of each sample, offset by 128
+        samples = pcm.cast("h")
+        data = array("B", [(s >> 8) + 128 for s in samples])
+        return _write_vectored(path, [_wav_header(len(data), sample_rate, 1), memoryview(data)])
+
+    if fmt in FFMPEG_CODECS:
+        subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-y",
+             "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+             *FFMPEG_CODECS[fmt], str(path)],
+            input=pcm,
+            check=True,
+        )
+        return path.stat().st_size
+
+    raise ValueError(f"Unsupported audio format: {fmt}")
+
+
+def ffmpeg_available() -> bool:
+    """True if ffmpeg is on PATH (checked once per process)."""
+    global _FFMPEG
+    if _FFMPEG is None:
+        _FFMPEG = shutil.which("ffmpeg") is not None
+    return _FFMPEG
+
+
+_FFMPEG: Optional[bool] = None
+
+
+class AudioRenderPipeline:
+    """
+    Renders batches of sounds in parallel.
+
+    Concurrency is capped at the CPU count; a single job (or max_workers=1)
+    runs in-process to avoid pool start-up cost.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        formats: Tuple[str, ...] = DEFAULT_FORMATS,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            output_dir: Directory for encoded files
+            formats: Target formats (see module docstring)
+            max_workers: Worker process cap (default: CPU count)
+        """
+        self.output_dir = Path(output_dir)
+        self.formats = tuple(formats)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(
+        self,
+        audio_requests: List[Dict[str, Any]],
+        style_guide: Dict[str, Any],
+    ) -> Tuple[List[RenderResult], Dict[str, Any]]:
+        """
+        Render and encode all requests.
+
+        Identical requests (same name, category and description, hence the
+        same synth parameters) are rendered once. Different requests that
+        share a name get distinct file names.
+
+        Returns:
+            (results in request order, pipeline stats)
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        jobs: Dict[JobKey, RenderJob] = {}
+        stems = set()
+        for request in audio_requests:
+            key = _job_key(request)
+            if key in jobs:
+                continue
+            name, category, description = key
+            stem = name
+            if stem in stems:
+                stem = f"{name}_{hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:8]}"
+            stems.add(stem)
+            jobs[key] = RenderJob(
+                name=name,
+                category=category,
+                description=description,
+                style_guide=style_guide,
+                formats=self.formats,
+                output_dir=str(self.output_dir),
+                file_stem=stem,
+            )
+
+        workers = max(1, min(self.max_workers, len(jobs)))
+        start = time.perf_counter()
+        if workers == 1:
+            rendered = [render_job(job) for job in jobs.values()]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = list(pool.map(render_job, jobs.values()))
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        by_key = dict(zip(jobs, rendered))
+        results = [by_key[_job_key(request)] for request in audio_requests]
+        stems = [job.file_stem for job in jobs.values()]
+
+        stats = {
+            "workers": workers,
+            "unique_renders": len(jobs),
+            "wall_ms": round(wall_ms, 2),
+            "render_times_ms": {s: round(r.render_ms, 2) for s, r in zip(stems, rendered)},
+            "encode_times_ms": {s: round(r.encode_ms, 2) for s, r in zip(stems, rendered)},
+            "formats": list(self.formats),
+        }
+        return results, stats
+
+
+def _job_key(request: Dict[str, Any]) -> JobKey:
+    return (
+        request.get("name", "unknown"),
+        request.get("category", "sfx"),
+        request.get("description", ""),
+    )
+
+
+def _wav_header(data_size: int, sample_rate: int, sample_width: int) -> bytes:
+    """Canonical 44-byte PCM WAV header (mono)."""
+    byte_rate = sample_rate * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, byte_rate, sample_width, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def _write_vectored(path: Path, chunks: List[Any]) -> int:
+    """Write all chunks with one writev call (loops only on short writes)."""
+    total = sum(len(chunk) for chunk in chunks)
+    if not hasattr(os, "writev"):  # Windows
+        with open(path, "wb") as f:
+            f.writelines(chunks)
+        return total
+
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        written = os.writev(fd, chunks)
+        if written < total:
+            remaining = b"".join(bytes(chunk) for chunk in chunks)[written:]
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+    finally:
+        os.close(fd)
+    return total
+
+
+def _extension(fmt: str) -> str:
+    """File extension for a format."""
+    return "8bit.wav" if fmt == "wav8" else fmt
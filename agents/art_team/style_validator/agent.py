@@ -9,16 +9,26 @@ import os
 import sys
 import json
 import base64
+import time
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from shared.errors import LLMError
 from shared.llm import LLMService
 from shared.context import ContextManager
 from shared.event_bus import EventBus, Event, EventType
 from shared.constants import ASSET_QUALITY_THRESHOLD
+from shared.metering import CallRecord, meter
+from shared.json_extract import extract_json
+from shared.token_budget import estimate_tokens
+from shared.tracing import traced
+
+
+# Image types Gemini Vision accepts, by file suffix
+MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
 
 
 class StyleValidatorAgent:
@@ -43,11 +53,12 @@ class StyleValidatorAgent:
 
     def __init__(self):
         """Initialize the Style Validator Agent."""
-        self.llm = LLMService()
+        self.llm = LLMService(agent="StyleValidatorAgent")
         self.context = ContextManager()
         self.event_bus = EventBus()
         self.quality_threshold = ASSET_QUALITY_THRESHOLD
 
+    @traced("style.validate_asset")
     def validate_asset(
         self,
         asset_path: str,
@@ -67,14 +78,30 @@ class StyleValidatorAgent:
         """
         print(f"\n🔍 Validating asset: {asset_path}")
 
-        # For Phase 2 with Mock mode, return simulated validation
-        # In production with Gemini Vision, this will analyze the actual image
-
-        validation_result = self._simulate_validation(
-            asset_path,
-            style_guide,
-            asset_metadata
-        )
+        if self.llm.mock_mode:
+            # Mock mode: simulated validation, metered like a vision call
+            started = time.perf_counter()
+            validation_result = self._simulate_validation(
+                asset_path,
+                style_guide,
+                asset_metadata
+            )
+            meter.record(CallRecord(
+                agent="StyleValidatorAgent",
+                model=self.llm.model,
+                kind="vision",
+                images=1,
+                input_tokens=estimate_tokens(self._build_validation_prompt(style_guide, asset_metadata)),
+                output_tokens=estimate_tokens(json.dumps(validation_result)),
+                total_ms=(time.perf_counter() - started) * 1000,
+                mock=True,
+            ))
+        else:
+            validation_result = self._vision_validation(
+                asset_path,
+                style_guide,
+                asset_metadata
+            )
 
         # Emit event
         self.event_bus.emit(Event(
@@ -190,6 +217,57 @@ class StyleValidatorAgent:
             }
         }
 
+        return self._score(metrics)
+
+    def _vision_validation(
+        self,
+        asset_path: str,
+        style_guide: Dict[str, Any],
+        asset_metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Validate with Gemini Vision.
+
+        The overall score is recomputed from the per-metric scores with
+        CRITERIA_WEIGHTS; a failed call or an unusable response fails the
+        asset.
+        """
+        prompt = self._build_validation_prompt(style_guide, asset_metadata)
+        mime_type = MIME_TYPES.get(Path(asset_path).suffix.lower(), "image/png")
+        try:
+            response = self.llm.analyze_image(prompt, Path(asset_path).read_bytes(), mime_type)
+        except LLMError as e:
+            print(f"   ❌ Vision call failed ({e.kind}): {e}")
+            return {
+                "overall_score": 0,
+                "passed": False,
+                "metrics": {},
+                "improvement_suggestions": [],
+                "threshold": self.quality_threshold,
+                "error": str(e)[:200],
+                "error_kind": e.kind,
+                "retryable": e.retryable
+            }
+
+        try:
+            metrics = extract_json(response, label="StyleValidatorAgent")["metrics"]
+            for criterion in self.CRITERIA_WEIGHTS:
+                metrics[criterion]["score"] = float(metrics[criterion]["score"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"   ❌ Unusable vision response: {e}")
+            return {
+                "overall_score": 0,
+                "passed": False,
+                "metrics": {},
+                "improvement_suggestions": [],
+                "threshold": self.quality_threshold,
+                "error": response[:200]
+            }
+
+        return self._score(metrics)
+
+    def _score(self, metrics: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Weighted validation result for per-criterion metrics."""
         # Calculate weighted overall score
         overall_score = sum(
             metrics[criterion]["score"] * self.CRITERIA_WEIGHTS[criterion]
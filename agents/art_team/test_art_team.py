@@ -5,7 +5,7 @@ This script tests all Art Team agents together in a realistic workflow:
 1. Asset Generator creates sprites and backgrounds
 2. Style Validator validates the generated assets
 3. Animation Creator generates animation frames
-4. Audio Designer creates sound placeholders
+4. Audio Designer renders procedural sound effects
 
 This simulates the complete Art Team pipeline.
 """
@@ -163,8 +163,7 @@ def main():
 
     audio_result = audio.generate_audio(audio_requests, style_guide)
 
-    print(f"\n⚠️  Audio API not configured ({audio_result['summary']['api_status']})")
-    print(f"   Placeholder sounds: {audio_result['summary']['placeholder']}")
+    print(f"\n✅ Generated {audio_result['summary']['generated']}/{audio_result['summary']['total_sounds']} sounds ({audio_result['summary']['api_status']})")
 
     # Final Summary
     print("\n" + "=" * 80)
@@ -200,11 +199,11 @@ def main():
     print("✅ Asset Generation: WORKING (Mock mode)")
     print("✅ Style Validation: WORKING (Mock mode)")
     print("✅ Animation Creation: WORKING (Mock mode)")
-    print("⚠️  Audio Generation: PLACEHOLDER (External API required)")
+    print("✅ Audio Generation: WORKING (Procedural synth)")
     print("\n📝 Next Steps:")
     print("   1. Deploy Vercel functions (/api/gemini/imagen, /api/gemini/vision)")
     print("   2. Test with real Imagen 4 API")
-    print("   3. Select and integrate audio API")
+    print("   3. Add external audio API for realistic/voiced audio")
     print("   4. Integrate Art Team with PM Agent")
 
 
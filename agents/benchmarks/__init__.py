@@ -0,0 +1,3 @@
+"""
+Benchmarks - End-to-end pipeline performance against a local fake Gemini proxy
+"""
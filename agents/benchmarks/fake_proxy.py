@@ -0,0 +1,179 @@
+"""
+Fake Gemini Proxy - Local stand-in for the Vercel functions in api/gemini/
+
+Serves the same request/response contracts as
+api/gemini/generate.js, imagen.js and vision.js, plus the cachedContents
+registration endpoint LLMService uses for prefix caching (see
+shared/prefix_cache.py), so agents can run with MOCK_MODE=false against
+localhost:
+
+    POST /api/gemini/generate  {"prompt", ...}          -> {"success", "text", "tokens_used", ...}
+    POST /api/gemini/imagen    {"prompt", "number_of_images", ...}
+                                                        -> {"success", "images": [{"image_data", "mime_type"}], ...}
+    POST /api/gemini/vision    {"prompt", "image_data", ...}
+                                                        -> {"success", "text", "usage"}
+    POST /api/gemini/cache     {"model", "contents", "ttl_seconds"}
+                                                        -> {"success", "name", "tokens"}
+
+Answers come from shared.transports.SyntheticTransport (the same canned
+responses as mock mode), so every agent gets output it can parse. The
+network side is what a ProxyProfile configures: latency and jitter per
+call, occasional slow answers (a tail for hedged requests to cut, see
+shared/hedging.py), an error rate (HTTP 503 like an overloaded Gemini
+backend), extra prose around text answers and the size of generated
+images. Requests are served concurrently, one thread each.
+
+    with FakeGeminiProxy(ProxyProfile(latency_ms=300, error_rate=0.02)) as proxy:
+        os.environ["VERCEL_PROXY_URL"] = proxy.url      # before importing shared.*
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+FILLER = "The design above follows the requested structure. "
+
+
+@dataclass
+class ProxyProfile:
+    """Network behaviour of the fake proxy."""
+
+    latency_ms: float = 800.0           # mean time to answer a text/vision call
+    jitter_ms: float = 200.0            # standard deviation of that time
+    image_latency_ms: float = 4000.0    # mean time to answer an Imagen call
+    slow_rate: float = 0.0              # fraction of calls delayed by slow_ms
+    slow_ms: float = 0.0                # extra time of a slow answer
+    error_rate: float = 0.0             # fraction of calls answered with HTTP 503
+    text_padding: int = 0               # prose characters appended to text answers
+    image_bytes: int = 64 * 1024        # size of each generated image
+    seed: Optional[int] = None
+
+
+@dataclass
+class ProxyStats:
+    """Requests served, per endpoint."""
+
+    requests: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    bytes_sent: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+
+class FakeGeminiProxy:
+    """Threaded HTTP server emulating the Vercel Gemini proxy."""
+
+    def __init__(self, profile: Optional[ProxyProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or ProxyProfile()
+        self.stats = ProxyStats()
+        self._rng = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._transport = None
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as VERCEL_PROXY_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGeminiProxy":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="FakeGeminiProxy", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeGeminiProxy":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, endpoint: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """(status, JSON body) for one request, after the simulated latency."""
+        with self._lock:
+            self.stats.requests[endpoint] = self.stats.requests.get(endpoint, 0) + 1
+            mean = self.profile.image_latency_ms if endpoint == "imagen" else self.profile.latency_ms
+            delay = max(0.0, self._rng.gauss(mean, self.profile.jitter_ms)) / 1000
+            if self._rng.random() < self.profile.slow_rate:
+                delay += self.profile.slow_ms / 1000
+            failed = endpoint != "cache" and self._rng.random() < self.profile.error_rate
+        if endpoint != "cache":
+            time.sleep(delay)
+
+        if failed:
+            with self._lock:
+                self.stats.errors[endpoint] = self.stats.errors.get(endpoint, 0) + 1
+            return 503, {"success": False, "error": "Gemini API error: Service Unavailable"}
+
+        status, result = self._synthetic().respond(endpoint, body)
+        if status == 200 and endpoint == "generate" and self.profile.text_padding:
+            repeats = self.profile.text_padding // len(FILLER) + 1
+            result["text"] += "\n\n" + (FILLER * repeats)[:self.profile.text_padding]
+        return status, result
+
+    def _synthetic(self):
+        """
+        SyntheticTransport whose answers this proxy serves.
+
+        shared.* is imported lazily: shared.constants reads VERCEL_PROXY_URL
+        on import, which callers set only once the proxy's port is known.
+        """
+        with self._lock:
+            if self._transport is None:
+                from shared.transports import SyntheticTransport
+                self._transport = SyntheticTransport(
+                    image_bytes=self.profile.image_bytes, seed=self.profile.seed
+                )
+            return self._transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            status, payload = 400, {"success": False, "error": "Invalid JSON body"}
+        else:
+            status, payload = self.server.proxy.handle(endpoint, body)
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True    # client gave up (e.g. a cancelled hedge)
+            return
+        with self.server.proxy._lock:
+            self.server.proxy.stats.bytes_sent += len(data)
+
+    def do_GET(self):
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
@@ -0,0 +1,410 @@
+"""
+Pipeline Benchmark - End-to-end game runs against a local fake Gemini proxy
+
+Starts a FakeGeminiProxy (see fake_proxy.py), points the agents at it with
+MOCK_MODE=false and runs the full pipeline many times:
+
+1. Design: ProjectManagerAgent.create_game (concept, levels, narrative)
+2. Art: AssetGeneratorAgent (Imagen) + StyleValidatorAgent (Vision) for
+   player, enemy, collectible and background assets of that game
+
+Games run sequentially per worker; --workers N runs N worker processes
+(the agents share process-wide singletons such as the project context, so
+games never run concurrently inside one process).
+
+Reports wall-clock per game (p50/p95/p99) and per stage, throughput in
+games/hour, memory high-water marks (peak RSS per worker and, with
+--tracemalloc, the Python heap peak per game), what the proxy served and
+the per-agent time/spend table from the meter.
+
+    cd agents
+    python -m benchmarks.pipeline_bench --games 20 --workers 4 \\
+        --latency-ms 300 --jitter-ms 100 --error-rate 0.02 --json bench.json
+
+--mock skips the proxy and uses the synthetic transport, which measures
+the pipeline's own CPU cost. --record DIR stores every proxy response as a
+fixture (see shared/transports.py); --replay DIR runs the same games from
+those fixtures without a proxy, with the recorded timing (or instantly
+with --instant), so a run against the real proxy can be repeated
+deterministically.
+
+--hedge enables hedged requests (shared/hedging.py) with --hedge-budget;
+--slow-rate/--slow-ms give the proxy a latency tail for them to cut. The
+report then includes the hedge rate, win rate and what the duplicates cost.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_proxy import FakeGeminiProxy, ProxyProfile
+
+
+GAME_REQUESTS = [
+    "A cyberpunk platformer about a robot cat collecting memory chips",
+    "A cozy puzzle game where you grow a garden on a floating island",
+    "A fast roguelike shooter set in a neon space station",
+    "A platformer about a fox escaping a haunted forest",
+]
+
+STYLE_GUIDE = {
+    "artStyle": "pixel_art",
+    "colorPalette": ["#FF00FF", "#00FFFF", "#FF0080", "#8000FF", "#FFFFFF", "#000000"],
+    "pixelDensity": "64x64",
+    "mood": "cyberpunk",
+    "constraints": {"maxColors": 16, "noText": True, "transparentBackground": True},
+}
+
+
+@dataclass
+class GameRun:
+    """Timings of one benchmarked game."""
+
+    project_id: str
+    worker: int
+    total_s: float
+    design_s: float = 0.0
+    art_s: float = 0.0
+    assets: int = 0
+    heap_peak_bytes: int = 0            # --tracemalloc only
+    ok: bool = True
+    error: Optional[str] = None
+
+
+@dataclass
+class WorkerResult:
+    """What one worker process sends back."""
+
+    runs: List[GameRun]
+    peak_rss_bytes: int
+    calls: List[Dict[str, Any]] = field(default_factory=list)   # CallRecord.to_json()
+    hedging: Dict[str, int] = field(default_factory=dict)       # HedgeStats
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the proxy, run every game and build the report."""
+    proxy = None
+    if args.hedge:
+        os.environ["CAISO_LLM_HEDGE"] = "1"
+        os.environ["CAISO_HEDGE_BUDGET"] = str(args.hedge_budget)
+    if args.replay:
+        os.environ["CAISO_LLM_TRANSPORT"] = "replay"
+        os.environ["CAISO_LLM_FIXTURES"] = str(Path(args.replay).resolve())
+        os.environ["CAISO_REPLAY_TIMING"] = "instant" if args.instant else "original"
+    elif args.mock:
+        os.environ["CAISO_LLM_TRANSPORT"] = "synthetic"
+    else:
+        proxy = FakeGeminiProxy(ProxyProfile(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            image_latency_ms=args.image_latency_ms,
+            slow_rate=args.slow_rate,
+            slow_ms=args.slow_ms,
+            error_rate=args.error_rate,
+            text_padding=args.text_padding,
+            image_bytes=args.image_kb * 1024,
+            seed=args.seed,
+        )).start()
+        # Read by shared.constants on import (workers inherit the environment)
+        os.environ["VERCEL_PROXY_URL"] = proxy.url
+        os.environ["CAISO_LLM_TRANSPORT"] = "record" if args.record else "live"
+        if args.record:
+            os.environ["CAISO_LLM_FIXTURES"] = str(Path(args.record).resolve())
+
+    workers = max(1, min(args.workers, args.games))
+    schedule = [list(range(worker, args.games, workers)) for worker in range(workers)]
+
+    with tempfile.TemporaryDirectory(prefix="caiso-bench-") as work_dir:
+        tasks = [(worker, games, vars(args), work_dir) for worker, games in enumerate(schedule)]
+        started = time.perf_counter()
+        try:
+            if workers == 1:
+                results = [_run_worker(tasks[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_run_worker, tasks))
+        finally:
+            elapsed = time.perf_counter() - started
+            if proxy is not None:
+                proxy.stop()
+
+    return _report(args, results, elapsed, proxy)
+
+
+def _run_worker(task: Tuple[int, List[int], Dict[str, Any], str]) -> WorkerResult:
+    """Run this worker's games in its own directory."""
+    worker, games, options, work_dir = task
+    directory = Path(work_dir) / f"worker-{worker}"
+    directory.mkdir(parents=True, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(directory)
+
+    output = sys.stdout if options["verbose"] else io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            from art_team.asset_generator.agent import AssetGeneratorAgent
+            from art_team.style_validator.agent import StyleValidatorAgent
+            from project_manager.pm_agent import ProjectManagerAgent
+            from shared.hedging import hedge_policy
+            from shared.metering import meter
+
+            pm = ProjectManagerAgent()
+            assets = AssetGeneratorAgent(semantic_threshold=None)
+            validator = StyleValidatorAgent()
+
+            runs = []
+            for index in games:
+                runs.append(_run_game(pm, assets, validator, worker, index, options))
+                if not options["verbose"]:
+                    output.seek(0)
+                    output.truncate()
+    finally:
+        os.chdir(cwd)
+
+    return WorkerResult(
+        runs=runs,
+        peak_rss_bytes=_peak_rss(),
+        calls=[record.to_json() for record in meter.records],
+        hedging=asdict(hedge_policy.stats),
+    )
+
+
+def _run_game(pm, assets, validator, worker: int, index: int, options: Dict[str, Any]) -> GameRun:
+    """Design + art for one game."""
+    request = GAME_REQUESTS[index % len(GAME_REQUESTS)]
+    run = GameRun(project_id=f"bench-{index:04d}", worker=worker, total_s=0.0)
+
+    if options["tracemalloc"]:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = pm.create_game(
+            request,
+            project_id=run.project_id,
+            number_of_levels=options["levels"],
+            level_mode=options["level_mode"],
+            level_seed=index,
+            level_candidates=options["level_candidates"],
+        )
+        run.design_s = time.perf_counter() - started
+
+        if not options["no_art"]:
+            art_started = time.perf_counter()
+            generated = assets.generate_assets(
+                _asset_requests(result["concept"], index), STYLE_GUIDE, max_iterations=1
+            )
+            succeeded = [a for a in generated["generatedAssets"] if a["status"] == "success"]
+            validator.validate_batch(succeeded, STYLE_GUIDE)
+            run.assets = len(succeeded)
+            run.art_s = time.perf_counter() - art_started
+    except Exception as e:
+        run.ok = False
+        run.error = f"{type(e).__name__}: {e}"
+    finally:
+        run.total_s = time.perf_counter() - started
+        if options["tracemalloc"]:
+            run.heap_peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return run
+
+
+def _asset_requests(concept: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+    """Player, enemy, collectible and background of a game (unique per game)."""
+    title = concept.get("concept", {}).get("title", "Untitled")
+    subject = f"for {title} (game {index})"
+    return [
+        {"id": "player", "category": "sprite", "name": "Player",
+         "description": f"Hero character, idle pose, facing right, {subject}",
+         "size": {"width": 64, "height": 64}, "purpose": "player character"},
+        {"id": "enemy", "category": "sprite", "name": "Enemy",
+         "description": f"Hostile patrol enemy {subject}",
+         "size": {"width": 48, "height": 48}, "purpose": "enemy"},
+        {"id": "collectible", "category": "sprite", "name": "Collectible",
+         "description": f"Glowing collectible item {subject}",
+         "size": {"width": 32, "height": 32}, "purpose": "collectible"},
+        {"id": "background", "category": "background", "name": "Background",
+         "description": f"Level background scenery {subject}",
+         "size": {"width": 1920, "height": 600}, "purpose": "level background"},
+    ]
+
+
+def _peak_rss() -> int:
+    """Peak resident set size of this process in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """p50 / p95 / p99 / max / mean."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def percentile(q: float) -> float:
+        position = (len(ordered) - 1) * q
+        low, high = math.floor(position), math.ceil(position)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "p50": round(percentile(0.5), 3),
+        "p95": round(percentile(0.95), 3),
+        "p99": round(percentile(0.99), 3),
+        "max": round(ordered[-1], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def _report(
+    args: argparse.Namespace,
+    results: List[WorkerResult],
+    elapsed: float,
+    proxy: Optional[FakeGeminiProxy],
+) -> Dict[str, Any]:
+    from shared.metering import CallRecord, meter
+
+    runs = sorted((run for result in results for run in result.runs), key=lambda r: r.project_id)
+    completed = [run for run in runs if run.ok]
+    calls = [CallRecord(**call) for result in results for call in result.calls]
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "verbose")},
+        "games": len(runs),
+        "failed": len(runs) - len(completed),
+        "elapsed_s": round(elapsed, 3),
+        "games_per_hour": round(len(completed) / elapsed * 3600, 1) if elapsed else 0.0,
+        "wall_clock_s": _percentiles([run.total_s for run in completed]),
+        "design_s": _percentiles([run.design_s for run in completed]),
+        "art_s": _percentiles([run.art_s for run in completed]) if not args.no_art else {},
+        "memory": {
+            "peak_rss_bytes": max(result.peak_rss_bytes for result in results),
+            "heap_peak_bytes": max((run.heap_peak_bytes for run in runs), default=0),
+        },
+        "agents": meter.summary("agent", calls),
+        "errors": [f"{run.project_id}: {run.error}" for run in runs if not run.ok],
+        "runs": [asdict(run) for run in runs],
+    }
+    if proxy is not None:
+        report["proxy"] = asdict(proxy.stats)
+    if args.hedge:
+        from shared.hedging import HedgeStats
+
+        stats = HedgeStats(**{
+            key: sum(result.hedging.get(key, 0) for result in results)
+            for key in asdict(HedgeStats())
+        })
+        hedged = [call for call in calls if call.hedged and call.ok]
+        report["hedging"] = {
+            **stats.to_json(),
+            "extra_cost_usd": round(sum(call.cost_usd for call in hedged) / 2, 6),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    """Human-readable summary of a run_benchmark() report."""
+    from shared.metering import format_summary
+
+    config = report["config"]
+    if config["replay"]:
+        backend = f"replay of {config['replay']} ({'instant' if config['instant'] else 'recorded timing'})"
+    elif config["mock"]:
+        backend = "synthetic transport"
+    else:
+        backend = (f"fake proxy {config['latency_ms']:.0f}±{config['jitter_ms']:.0f} ms, "
+                   f"Imagen {config['image_latency_ms']:.0f} ms, {config['error_rate']:.0%} errors")
+    print(f"\n🏁 Pipeline benchmark: {report['games']} games, {config['workers']} worker(s), {backend}")
+    print(f"   Completed: {report['games'] - report['failed']}/{report['games']} "
+          f"in {report['elapsed_s']:.1f}s ({report['games_per_hour']:,.0f} games/hour)")
+
+    for label, key in (("Wall-clock", "wall_clock_s"), ("  Design", "design_s"), ("  Art", "art_s")):
+        stats = report[key]
+        if stats:
+            print(f"   {label + ':':<12} p50 {stats['p50']:.2f}s / p95 {stats['p95']:.2f}s / "
+                  f"p99 {stats['p99']:.2f}s / max {stats['max']:.2f}s")
+
+    memory = report["memory"]
+    line = f"   Memory:     peak RSS {memory['peak_rss_bytes'] / 2**20:.1f} MB"
+    if memory["heap_peak_bytes"]:
+        line += f", Python heap peak {memory['heap_peak_bytes'] / 2**20:.1f} MB per game"
+    print(line)
+
+    if "proxy" in report:
+        proxy = report["proxy"]
+        served = ", ".join(f"{name} {count}" for name, count in sorted(proxy["requests"].items()))
+        errors = sum(proxy["errors"].values())
+        print(f"   Proxy:      {served} ({errors} errors injected, {proxy['bytes_sent'] / 2**20:.1f} MB sent)")
+
+    if "hedging" in report:
+        hedging = report["hedging"]
+        print(f"   Hedging:    {hedging['hedges']}/{hedging['calls']} calls hedged "
+              f"({hedging['hedge_rate']:.1%}, budget {config['hedge_budget']:.0%}), "
+              f"{hedging['win_rate']:.0%} won by the duplicate, "
+              f"{hedging['budget_skips']} skipped, +${hedging['extra_cost_usd']:.4f}")
+
+    print(f"\n⏱️  Model Calls:")
+    for line in format_summary(report["agents"]).splitlines():
+        print(f"   {line}")
+
+    if report["errors"]:
+        print(f"\n❌ Failed games:")
+        for error in report["errors"][:10]:
+            print(f"   - {error}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--levels", type=int, default=3, help="levels per game")
+    parser.add_argument("--level-mode", default="llm", choices=["llm", "procedural", "batch"])
+    parser.add_argument("--level-candidates", type=int, default=20, help="batch mode candidates per level")
+    parser.add_argument("--no-art", action="store_true", help="design stage only")
+    parser.add_argument("--mock", action="store_true", help="synthetic transport instead of the proxy")
+    parser.add_argument("--record", metavar="DIR", help="record proxy responses as fixtures")
+    parser.add_argument("--replay", metavar="DIR", help="replay recorded fixtures instead of the proxy")
+    parser.add_argument("--instant", action="store_true", help="replay without the recorded timing")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--image-latency-ms", type=float, default=4000.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of slow proxy answers")
+    parser.add_argument("--slow-ms", type=float, default=5000.0, help="extra latency of a slow answer")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hedge", action="store_true", help="hedge slow LLM calls")
+    parser.add_argument("--hedge-budget", type=float, default=0.05, help="max extra calls (fraction)")
+    parser.add_argument("--text-padding", type=int, default=0, help="prose chars added to text answers")
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--tracemalloc", action="store_true", help="measure Python heap peak per game")
+    parser.add_argument("--json", help="also write the full report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show agent output")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
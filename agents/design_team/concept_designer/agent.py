@@ -13,10 +13,16 @@ import sys
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from shared.errors import LLMError
 from shared.llm import LLMService
+from shared.json_extract import extract_json
+from shared.json_repair import JSONRepairer
+from shared.templates import PromptTemplate, TemplateLoader
+from shared.tracing import traced
 from shared.event_bus import emit_event, EventType
 from shared.context import update_design
-from shared.constants import GEMINI_PRO_MODEL
+from shared.constants import GEMINI_PRO_MODEL, SCHEMA_ERROR_PENALTY
+from shared.schemas.design_schemas import ConceptDesignOutput, summarize_errors
 
 
 class ConceptDesignerAgent:
@@ -29,16 +35,16 @@ class ConceptDesignerAgent:
     """
 
     def __init__(self):
-        self.llm = LLMService(model=GEMINI_PRO_MODEL)
+        self.llm = LLMService(model=GEMINI_PRO_MODEL, agent="ConceptDesignerAgent")
+        self.repairer = JSONRepairer(self.llm, ConceptDesignOutput, extract=self._extract_json)
         self.prompts_dir = Path(__file__).parent / "prompts"
+        self.prompts = TemplateLoader(self.prompts_dir)
 
-    def load_prompt(self, name: str) -> str:
-        """Load prompt template."""
-        path = self.prompts_dir / f"{name}.txt"
-        if not path.exists():
-            raise FileNotFoundError(f"Prompt not found: {path}")
-        return path.read_text(encoding="utf-8")
+    def load_prompt(self, name: str) -> PromptTemplate:
+        """Load compiled prompt template (cached until the file changes)."""
+        return self.prompts.get(name)
 
+    @traced("concept.design")
     def design_concept(
         self,
         user_request: str,
@@ -73,20 +79,28 @@ class ConceptDesignerAgent:
         )
 
         # Load and fill prompt template
-        prompt_template = self.load_prompt("concept_design")
-        prompt = prompt_template.replace("{{ user_request }}", user_request)
-        prompt = prompt.replace("{{ genre }}", genre)
-        prompt = prompt.replace("{{ target_audience }}", target_audience)
-        prompt = prompt.replace("{{ platform }}", platform)
+        prompt = self.load_prompt("concept_design").render(
+            user_request=user_request,
+            genre=genre,
+            target_audience=target_audience,
+            platform=platform,
+        )
 
         print("⏳ Generating concept with Gemini...\n")
 
-        # Generate concept
-        response = self.llm.generate(prompt)
-
-        # Parse JSON
+        # Generate concept and parse JSON
         try:
-            concept_data = self._extract_json(response)
+            response = self.llm.generate(prompt)
+            concept_data = self.repairer.parse(response, prompt)
+        except LLMError as e:
+            # No model output to parse: report why the call failed
+            print(f"❌ Gemini call failed ({e.kind}, {e.attempts} attempt(s)): {e}")
+            emit_event(
+                EventType.DESIGN_FAILED,
+                "ConceptDesignerAgent",
+                e.to_json(),
+            )
+            raise
         except json.JSONDecodeError as e:
             print(f"❌ Failed to parse JSON: {e}")
             print(f"Raw response:\n{response}\n")
@@ -125,29 +139,39 @@ class ConceptDesignerAgent:
         # Print LLM stats
         stats = self.llm.get_stats()
         print(f"\n💰 Cost: ${stats['estimated_cost_usd']:.4f}")
+        if stats["simulated_cost_usd"]:
+            print(f"   (mock calls, simulated: ${stats['simulated_cost_usd']:.4f})")
         print(f"📊 Tokens: {stats['total_tokens']:,}")
+        cache = stats["prefix_cache"]
+        if cache["hits"]:
+            input_tokens = cache["cached_input_tokens"] + cache["uncached_input_tokens"]
+            print(f"🗄️  Cached input: {cache['cached_input_tokens']:,} of {input_tokens:,} tokens")
+        repairs = stats["repairs"]
+        if repairs["fragment_calls"] or repairs["full_retries"]:
+            print(
+                f"🩹 Repair tokens: {repairs['fragment_tokens']:,} "
+                f"(full retries: {repairs['full_retry_tokens']:,}, "
+                f"avoided: ~{repairs['retry_tokens_avoided']:,})"
+            )
 
         return concept_data
 
     def _extract_json(self, text: str) -> Dict[str, Any]:
-        """Extract JSON from LLM response (handles markdown)."""
-        import re
-
-        # Try to find JSON in markdown code blocks
-        json_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Assume entire response is JSON
-            json_str = text
-
-        return json.loads(json_str)
+        """Extract JSON from LLM response (fences, repairs, truncated output)."""
+        return extract_json(text, label="ConceptDesignerAgent")
 
+    @traced("concept.validate")
     def _validate_concept(self, concept_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate concept quality."""
         issues = []
         score = 100
 
+        # Check structure against the schema (all errors in one pass)
+        schema_errors = ConceptDesignOutput.validate(concept_data)
+        if schema_errors:
+            issues.append(f"Schema: {summarize_errors(schema_errors)}")
+            score -= SCHEMA_ERROR_PENALTY
+
         concept = concept_data.get("concept", {})
 
         # Check core loop
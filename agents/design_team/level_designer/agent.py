@@ -4,19 +4,44 @@ Level Designer Agent - Phase 1
 """
 
 import json
-import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 # Import shared utilities
 import sys
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from shared.errors import LLMError
 from shared.llm import LLMService
+from shared.json_extract import extract_json
+from shared.json_repair import JSONRepairer
+from shared.templates import PromptTemplate, TemplateLoader
+from shared.tracing import bind, traced
 from shared.event_bus import emit_event, EventType
 from shared.context import update_design
-from shared.constants import GEMINI_PRO_MODEL
+from shared.constants import GEMINI_PRO_MODEL, SCHEMA_ERROR_PENALTY
+from shared.schemas.design_schemas import LevelDesignOutput, summarize_errors
+from design_team.level_designer.batch import DEFAULT_CANDIDATES, run_batch
+from design_team.level_designer.columnar import ColumnarLayout
+from design_team.level_designer.geometry import GEOMETRY_PENALTIES, validate_layout
+from design_team.level_designer.reachability import (
+    UNREACHABLE_GOAL_PENALTY,
+    UNREACHABLE_REQUIRED_PENALTY,
+    analyze_level,
+)
+from design_team.level_designer.procedural import (
+    LevelPlan,
+    complete_plan,
+    generate_levels,
+    level_abilities,
+)
+from design_team.level_designer.difficulty import (
+    DIFFICULTY_TOLERANCE,
+    MAX_DIFFICULTY_STEP,
+    estimate_difficulty,
+)
 
 
 class LevelDesignerAgent:
@@ -29,21 +54,25 @@ class LevelDesignerAgent:
     """
 
     def __init__(self):
-        self.llm = LLMService(model=GEMINI_PRO_MODEL)
+        self.llm = LLMService(model=GEMINI_PRO_MODEL, agent="LevelDesignerAgent")
+        self.repairer = JSONRepairer(self.llm, LevelDesignOutput, extract=self._extract_json)
         self.prompts_dir = Path(__file__).parent / "prompts"
+        self.prompts = TemplateLoader(self.prompts_dir)
 
-    def load_prompt(self, name: str) -> str:
-        """Load prompt template."""
-        path = self.prompts_dir / f"{name}.txt"
-        if not path.exists():
-            raise FileNotFoundError(f"Prompt not found: {path}")
-        return path.read_text(encoding="utf-8")
+    def load_prompt(self, name: str) -> PromptTemplate:
+        """Load compiled prompt template (cached until the file changes)."""
+        return self.prompts.get(name)
 
+    @traced("level.design")
     def design_levels(
         self,
         game_concept: Dict[str, Any],
         number_of_levels: int = 3,
         platform: str = "web",
+        mode: str = "llm",
+        seed: int = 0,
+        candidates: int = DEFAULT_CANDIDATES,
+        llm_candidates: int = 0,
     ) -> Dict[str, Any]:
         """
         Design levels based on game concept.
@@ -52,6 +81,13 @@ class LevelDesignerAgent:
             game_concept: Output from Concept Designer
             number_of_levels: Number of levels to create
             platform: Target platform
+            mode: "llm" (Gemini designs the layouts), "procedural"
+                (Gemini only plans themes/parameters, layouts are generated locally)
+                or "batch" (many candidates per level, best progression kept)
+            seed: Procedural generator seed
+            candidates: Batch mode: procedural candidates per level
+            llm_candidates: Batch mode: extra level sets requested from Gemini
+                concurrently and ranked alongside the procedural candidates
 
         Returns:
             Level design as dictionary
@@ -60,33 +96,67 @@ class LevelDesignerAgent:
         print(f"\n🗺️  Level Designer Agent")
         print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
         print(f"Levels to create: {number_of_levels}")
-        print(f"Platform: {platform}\n")
+        print(f"Platform: {platform}")
+        print(f"Mode: {mode}\n")
 
         # Emit start event
         emit_event(
             EventType.DESIGN_STARTED,
             "LevelDesignerAgent",
-            {"number_of_levels": number_of_levels},
+            {"number_of_levels": number_of_levels, "mode": mode},
         )
 
-        # Load and fill prompt template
-        prompt_template = self.load_prompt("level_design")
-
-        # Convert concept to readable format
-        concept_summary = self._format_concept_for_prompt(game_concept)
-
-        prompt = prompt_template.replace("{{ game_concept }}", concept_summary)
-        prompt = prompt.replace("{{ number_of_levels }}", str(number_of_levels))
-        prompt = prompt.replace("{{ platform }}", platform)
+        if mode == "procedural":
+            plans = self._plan_levels(game_concept, number_of_levels, platform)
+            print(f"⚙️  Generating {len(plans)} levels procedurally (seed {seed})...\n")
+            try:
+                levels_data = generate_levels(game_concept, plans, seed=seed)
+            except RuntimeError as e:
+                print(f"❌ Procedural generation failed: {e}")
+                emit_event(
+                    EventType.DESIGN_FAILED,
+                    "LevelDesignerAgent",
+                    {"error": str(e)},
+                )
+                raise
+            return self._finalize_levels(levels_data, game_concept)
+        if mode == "batch":
+            plans = self._plan_levels(game_concept, number_of_levels, platform)
+            llm_sets = self._generate_level_sets(game_concept, number_of_levels, platform, llm_candidates)
+            total = candidates * len(plans) + sum(len(s.get("levels", [])) for s in llm_sets)
+            print(f"⚙️  Scoring {total} level candidates (seed {seed})...\n")
+            try:
+                result = run_batch(game_concept, plans, candidates, seed=seed, llm_sets=llm_sets)
+            except RuntimeError as e:
+                print(f"❌ Batch generation failed: {e}")
+                emit_event(
+                    EventType.DESIGN_FAILED,
+                    "LevelDesignerAgent",
+                    {"error": str(e)},
+                )
+                raise
+            self._print_batch_summary(result)
+            return self._finalize_levels(result.levels_data, game_concept)
+        if mode != "llm":
+            raise ValueError(f"Unknown level design mode: {mode}")
+
+        prompt, prefix = self._level_prompt(game_concept, number_of_levels, platform)
 
         print("⏳ Generating levels with Gemini...\n")
 
-        # Generate levels
-        response = self.llm.generate(prompt)
-
-        # Parse JSON
+        # Generate levels and parse JSON
         try:
-            levels_data = self._extract_json(response)
+            response = self.llm.generate(prompt, cache_prefix=prefix)
+            levels_data = self.repairer.parse(response, prompt, cache_prefix=prefix)
+        except LLMError as e:
+            # No model output to parse: report why the call failed
+            print(f"❌ Gemini call failed ({e.kind}, {e.attempts} attempt(s)): {e}")
+            emit_event(
+                EventType.DESIGN_FAILED,
+                "LevelDesignerAgent",
+                e.to_json(),
+            )
+            raise
         except json.JSONDecodeError as e:
             print(f"❌ Failed to parse JSON: {e}")
             print(f"Raw response:\n{response}\n")
@@ -97,6 +167,12 @@ class LevelDesignerAgent:
             )
             raise
 
+        return self._finalize_levels(levels_data, game_concept)
+
+    def _finalize_levels(
+        self, levels_data: Dict[str, Any], game_concept: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Validate, report and publish designed levels."""
         # Validate levels
         validation = self._validate_levels(levels_data, game_concept)
 
@@ -124,10 +200,129 @@ class LevelDesignerAgent:
         # Print LLM stats
         stats = self.llm.get_stats()
         print(f"\n💰 Cost: ${stats['estimated_cost_usd']:.4f}")
+        if stats["simulated_cost_usd"]:
+            print(f"   (mock calls, simulated: ${stats['simulated_cost_usd']:.4f})")
         print(f"📊 Tokens: {stats['total_tokens']:,}")
+        cache = stats["prefix_cache"]
+        if cache["hits"]:
+            input_tokens = cache["cached_input_tokens"] + cache["uncached_input_tokens"]
+            print(f"🗄️  Cached input: {cache['cached_input_tokens']:,} of {input_tokens:,} tokens")
+        repairs = stats["repairs"]
+        if repairs["fragment_calls"] or repairs["full_retries"]:
+            print(
+                f"🩹 Repair tokens: {repairs['fragment_tokens']:,} "
+                f"(full retries: {repairs['full_retry_tokens']:,}, "
+                f"avoided: ~{repairs['retry_tokens_avoided']:,})"
+            )
 
         return levels_data
 
+    def _level_prompt(
+        self, game_concept: Dict[str, Any], number_of_levels: int, platform: str
+    ) -> Tuple[str, str]:
+        """Fill the level design prompt template; returns (prompt, cacheable prefix)."""
+        # Convert concept to readable format
+        concept_summary = self._format_concept_for_prompt(game_concept)
+
+        template = self.load_prompt("level_design")
+        prompt = template.render(
+            game_concept=concept_summary,
+            number_of_levels=number_of_levels,
+            platform=platform,
+        )
+        # Preamble + concept are the same for every level set of this concept
+        prefix = template.prefix(game_concept=concept_summary, number_of_levels=number_of_levels)
+        return prompt, prefix
+
+    def _generate_level_sets(
+        self,
+        game_concept: Dict[str, Any],
+        number_of_levels: int,
+        platform: str,
+        count: int,
+    ) -> List[Dict[str, Any]]:
+        """Request `count` level sets from Gemini concurrently (failed or unparseable ones are skipped)."""
+        if count <= 0:
+            return []
+        prompt, prefix = self._level_prompt(game_concept, number_of_levels, platform)
+        print(f"⏳ Generating {count} level sets with Gemini...\n")
+
+        def generate(_) -> Optional[str]:
+            try:
+                return self.llm.generate(prompt, cache_prefix=prefix)
+            except LLMError as e:
+                print(f"⚠️  Skipping failed level set ({e.kind}: {e})")
+                return None
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            responses = list(pool.map(bind(generate), range(count)))
+
+        level_sets = []
+        for response in responses:
+            if response is None:
+                continue
+            try:
+                level_sets.append(self._extract_json(response))
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Skipping unparseable level set ({e})")
+        return level_sets
+
+    def _print_batch_summary(self, result):
+        """Print batch throughput and score distributions."""
+        print(f"📦 Batch: {result.candidates} candidates in {result.elapsed:.2f}s "
+              f"({result.candidates_per_sec:.0f} candidates/sec, {result.failed} failed)")
+        quality = result.quality
+        error = result.difficulty_error
+        print(f"   Quality: min {quality['min']} / median {quality['median']} / max {quality['max']}")
+        print(f"   Difficulty error: median {error['median']} / p75 {error['p75']} / max {error['max']}")
+        for index, candidate in enumerate(result.chosen, 1):
+            print(f"   Level {index}: {candidate.source} "
+                  f"(quality {candidate.quality:.0f}, difficulty {candidate.difficulty})")
+        print()
+
+    def _plan_levels(
+        self,
+        game_concept: Dict[str, Any],
+        number_of_levels: int,
+        platform: str,
+    ) -> List[LevelPlan]:
+        """Ask Gemini for per-level themes/parameters (falls back to a local plan)."""
+        prompt = self.load_prompt("level_plan").render(
+            game_concept=self._format_concept_for_prompt(game_concept),
+            number_of_levels=number_of_levels,
+            platform=platform,
+        )
+
+        print("⏳ Planning level parameters with Gemini...\n")
+        try:
+            response = self.llm.generate(prompt)
+        except LLMError as e:
+            print(f"⚠️  Level plan call failed ({e.kind}: {e}), using default plan")
+            response = None
+
+        entries = []
+        if response is not None:
+            try:
+                entries = self._extract_json(response).get("levels", [])
+            except (json.JSONDecodeError, AttributeError) as e:
+                print(f"⚠️  Could not parse level plan ({e}), using default plan")
+            if not isinstance(entries, list):
+                print("⚠️  Level plan has no list of levels, using default plan")
+                entries = []
+
+        plans: List[Optional[LevelPlan]] = []
+        for i in range(number_of_levels):
+            if i >= len(entries):
+                plans.append(None)
+                continue
+            try:
+                plans.append(LevelPlan.from_dict(entries[i], i))
+            except ValueError as e:
+                print(f"⚠️  Invalid level plan entry ({e}), using default for level {i + 1}")
+                plans.append(None)
+        # Missing entries continue the curve from the last planned level
+        return complete_plan(game_concept, plans)
+
     def _format_concept_for_prompt(self, game_concept: Dict[str, Any]) -> str:
         """Format game concept for inclusion in prompt."""
         concept = game_concept.get("concept", {})
@@ -150,17 +345,10 @@ class LevelDesignerAgent:
         return "\n".join(lines)
 
     def _extract_json(self, text: str) -> Dict[str, Any]:
-        """Extract JSON from LLM response (handles markdown)."""
-        # Try to find JSON in markdown code blocks
-        json_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Assume entire response is JSON
-            json_str = text
-
-        return json.loads(json_str)
+        """Extract JSON from LLM response (fences, repairs, truncated output)."""
+        return extract_json(text, label="LevelDesignerAgent")
 
+    @traced("level.validate")
     def _validate_levels(
         self, levels_data: Dict[str, Any], game_concept: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -174,25 +362,42 @@ class LevelDesignerAgent:
             issues.append("No levels generated")
             return {"passed": False, "score": 0, "issues": issues}
 
-        # Check difficulty progression
-        prev_difficulty = 0
-        for i, level in enumerate(levels):
-            difficulty = level.get("difficulty", 0)
+        # Check structure against the schema (all errors in one pass)
+        schema_errors = LevelDesignOutput.validate(levels_data)
+        if schema_errors:
+            issues.append(f"Schema: {summarize_errors(schema_errors)}")
+            score -= SCHEMA_ERROR_PENALTY
+
+        # Abilities unlocked by each level, as run_batch scored them
+        per_level = level_abilities(game_concept, len(levels))
+        genre = game_concept.get("concept", {}).get("genre")
+
+        # Check difficulty progression (measured from geometry, not declared)
+        prev_difficulty = 0.0
+        for i, (level, abilities) in enumerate(zip(levels, per_level)):
+            layout = level.get("layout", {})
+            columns = ColumnarLayout.from_json(layout)  # shared by the checks below
+
+            estimate = estimate_difficulty(columns, abilities, genre)
+            level["computedDifficulty"] = estimate.score
+            difficulty = estimate.score
 
             # Difficulty should increase gradually
-            if i > 0 and difficulty < prev_difficulty:
-                issues.append(f"Level {i+1} difficulty decreased (should be increasing)")
+            if i > 0 and difficulty < prev_difficulty - DIFFICULTY_TOLERANCE:
+                issues.append(
+                    f"Level {i+1} difficulty decreased (should be increasing): "
+                    f"{prev_difficulty} → {difficulty}"
+                )
                 score -= 10
 
             # No sudden spikes
-            if i > 0 and difficulty > prev_difficulty + 3:
-                issues.append(f"Level {i+1} difficulty spike too steep")
+            if i > 0 and difficulty > prev_difficulty + MAX_DIFFICULTY_STEP:
+                issues.append(f"Level {i+1} difficulty spike too steep: {prev_difficulty} → {difficulty}")
                 score -= 15
 
             prev_difficulty = difficulty
 
             # Check layout
-            layout = level.get("layout", {})
             if not layout.get("platforms"):
                 issues.append(f"Level {level.get('name')} has no platforms")
                 score -= 20
@@ -201,6 +406,32 @@ class LevelDesignerAgent:
                 issues.append(f"Level {level.get('name')} has no goal")
                 score -= 20
 
+            # Check geometry (one line and one penalty per issue kind)
+            by_kind: Dict[str, List[str]] = {}
+            for issue in validate_layout(columns):
+                by_kind.setdefault(issue.kind, []).append(issue.message)
+            for kind, messages in by_kind.items():
+                extra = f" (+{len(messages) - 1} more)" if len(messages) > 1 else ""
+                issues.append(f"Level {level.get('name')}: {messages[0]}{extra}")
+                score -= GEOMETRY_PENALTIES.get(kind, 5)
+
+            # Check playability with the abilities unlocked so far
+            if layout.get("platforms") and layout.get("goal") and "invalid_coordinates" not in by_kind:
+                reach = analyze_level(columns, abilities)
+                if not reach.goal_reachable:
+                    issues.append(
+                        f"Level {level.get('name')} goal is unreachable with "
+                        f"{', '.join(reach.abilities)} "
+                        f"({reach.reachable_platforms}/{reach.total_platforms} platforms reachable)"
+                    )
+                    score -= UNREACHABLE_GOAL_PENALTY
+                if reach.unreachable_required:
+                    issues.append(
+                        f"Level {level.get('name')} has unreachable required collectibles: "
+                        f"{', '.join(reach.unreachable_required)}"
+                    )
+                    score -= UNREACHABLE_REQUIRED_PENALTY
+
         # Check total playtime
         total_time = levels_data.get("totalEstimatedPlaytime", 0)
         if total_time < 5:
@@ -227,7 +458,7 @@ class LevelDesignerAgent:
 
         for i, level in enumerate(levels, 1):
             print(f"\n📍 Level {i}: {level.get('name', 'N/A')}")
-            print(f"   Difficulty: {level.get('difficulty', 0)}/10")
+            print(f"   Difficulty: {level.get('difficulty', 0)}/10 (computed {level.get('computedDifficulty', '-')})")
             print(f"   Theme: {level.get('theme', 'N/A')}")
 
             layout = level.get('layout', {})
@@ -0,0 +1,304 @@
+"""
+Level Batch Mode - Generate many level candidates and keep the best progression
+
+One LLM call (or one procedural seed) gives one take on each level. Batch
+mode produces many candidates per level slot instead:
+
+- procedural candidates: generate_level() with different seeds
+- LLM candidates: every level of extra level sets from concurrent calls
+
+LLM levels that do not match the level schema (missing keys, non-numeric
+geometry, no difficulty) are skipped before scoring. Every candidate is
+scored in a process pool with the same checks the level
+designer applies (geometry, reachability, computed difficulty). A dynamic
+programming pass over the slots then picks one candidate per level,
+trading candidate quality against distance from the planned difficulty
+curve and penalizing dips and spikes between consecutive levels exactly as
+the level designer's progression check does.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from design_team.level_designer.columnar import ColumnarLayout
+from design_team.level_designer.difficulty import (
+    DIFFICULTY_TOLERANCE,
+    MAX_DIFFICULTY_STEP,
+    estimate_difficulty,
+)
+from design_team.level_designer.geometry import GEOMETRY_PENALTIES, validate_layout
+from design_team.level_designer.procedural import (
+    LevelPlan,
+    assemble_levels,
+    generate_level,
+    level_abilities,
+)
+from design_team.level_designer.reachability import (
+    UNREACHABLE_GOAL_PENALTY,
+    UNREACHABLE_REQUIRED_PENALTY,
+    analyze_level,
+)
+from shared.schemas.design_schemas import Level
+
+
+DEFAULT_CANDIDATES = 100       # procedural candidates per level slot
+SEED_STRIDE = 1_000_003        # candidate k of base seed s uses seed s * SEED_STRIDE + k
+
+# Progression score: quality points lost per point of distance from the
+# planned difficulty, and per dip/spike between consecutive levels
+CURVE_WEIGHT = 5.0
+DIP_PENALTY = 10.0
+SPIKE_PENALTY = 15.0
+
+# A level whose spawn -> goal path touches fewer platforms than this is
+# trivial (e.g. one floor to walk along); generated levels use 10 or more
+MIN_PATH_PLATFORMS = 4
+TRIVIAL_LAYOUT_PENALTY = 40
+
+
+@dataclass
+class Candidate:
+    """One scored level candidate for a slot."""
+
+    slot: int
+    source: str                 # "procedural seed N" or "llm set N"
+    level: Dict[str, Any]
+    quality: float              # 0-100, level designer penalties applied
+    difficulty: float           # computed, 1-10
+    issues: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of run_batch()."""
+
+    levels_data: Dict[str, Any]
+    chosen: List[Candidate]
+    candidates: int
+    failed: int
+    elapsed: float
+    objective: float
+    quality: Dict[str, float] = field(default_factory=dict)      # distribution
+    difficulty_error: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def candidates_per_sec(self) -> float:
+        return self.candidates / self.elapsed if self.elapsed else 0.0
+
+
+def run_batch(
+    game_concept: Dict[str, Any],
+    plans: List[LevelPlan],
+    candidates_per_level: int = DEFAULT_CANDIDATES,
+    seed: int = 0,
+    llm_sets: Sequence[Dict[str, Any]] = (),
+    workers: Optional[int] = None,
+) -> BatchResult:
+    """
+    Generate, score and select levels.
+
+    Args:
+        game_concept: Output from Concept Designer
+        plans: One LevelPlan per slot (difficulty is the target curve)
+        candidates_per_level: Procedural candidates per slot
+        seed: Base seed
+        llm_sets: Extra levels data from LLM calls (level i -> slot i)
+        workers: Process pool size (None = CPU count, 0/1 = in-process)
+
+    Returns:
+        BatchResult
+    """
+    started = time.perf_counter()
+    per_level = level_abilities(game_concept, len(plans))
+    genre = game_concept.get("concept", {}).get("genre")
+
+    tasks = [
+        ("procedural", slot, plans[slot], per_level[slot], genre, seed * SEED_STRIDE + k)
+        for slot in range(len(plans))
+        for k in range(candidates_per_level)
+    ]
+    invalid = 0
+    for set_index, levels_data in enumerate(llm_sets):
+        for slot, level in enumerate(levels_data.get("levels", [])[:len(plans)]):
+            if Level.validate(level):
+                invalid += 1
+                continue
+            tasks.append(("llm", slot, level, per_level[slot], genre, set_index))
+
+    results = _map(_evaluate, tasks, workers)
+    slots: List[List[Candidate]] = [[] for _ in plans]
+    failed = invalid
+    for candidate in results:
+        if candidate is None:
+            failed += 1
+        else:
+            slots[candidate.slot].append(candidate)
+
+    empty = [plans[slot].name for slot, found in enumerate(slots) if not found]
+    if empty:
+        raise RuntimeError(f"No valid candidates for: {', '.join(empty)}")
+
+    targets = [float(plan.difficulty) for plan in plans]
+    chosen, objective = choose_progression(slots, targets)
+
+    levels = [dict(candidate.level) for candidate in chosen]
+    for level, candidate in zip(levels, chosen):
+        level["mechanics"] = dict(level.get("mechanics", {}))
+        level["batch"] = {
+            "source": candidate.source,
+            "quality": candidate.quality,
+            "computedDifficulty": candidate.difficulty,
+        }
+    levels_data = assemble_levels(game_concept, levels, per_level)
+
+    everything = [candidate for found in slots for candidate in found]
+    return BatchResult(
+        levels_data=levels_data,
+        chosen=chosen,
+        candidates=len(tasks) + invalid,
+        failed=failed,
+        elapsed=time.perf_counter() - started,
+        objective=round(objective, 2),
+        quality=_distribution([c.quality for c in everything]),
+        difficulty_error=_distribution([
+            abs(c.difficulty - targets[c.slot]) for c in everything
+        ]),
+    )
+
+
+def score_level(
+    layout: Dict[str, Any],
+    abilities: FrozenSet[str],
+    genre: Optional[str] = None,
+) -> Tuple[float, float, List[str]]:
+    """(quality, computed difficulty, issue kinds) of one layout."""
+    columns = ColumnarLayout.from_json(layout)
+    quality = 100.0
+    issues = sorted({issue.kind for issue in validate_layout(columns)})
+    quality -= sum(GEOMETRY_PENALTIES.get(kind, 5) for kind in issues)
+
+    # Non-finite geometry cannot be simulated (and is already penalized)
+    simulate = "invalid_coordinates" not in issues
+    if simulate and len(columns.table("platforms")) and columns.get("goal"):
+        reach = analyze_level(columns, abilities)
+        if not reach.goal_reachable:
+            issues.append("goal_unreachable")
+            quality -= UNREACHABLE_GOAL_PENALTY
+        if reach.unreachable_required:
+            issues.append("required_unreachable")
+            quality -= UNREACHABLE_REQUIRED_PENALTY
+        if reach.goal_reachable and len(reach.path) < MIN_PATH_PLATFORMS:
+            issues.append("trivial_layout")
+            quality -= TRIVIAL_LAYOUT_PENALTY
+    elif simulate:
+        issues.append("incomplete_layout")
+        quality -= UNREACHABLE_GOAL_PENALTY
+
+    difficulty = estimate_difficulty(columns, abilities, genre).score
+    return max(0.0, quality), difficulty, issues
+
+
+def choose_progression(
+    slots: List[List[Candidate]],
+    targets: List[float],
+) -> Tuple[List[Candidate], float]:
+    """
+    Pick one candidate per slot maximizing
+
+        sum(quality - CURVE_WEIGHT * |difficulty - target|)
+          - sum(transition penalties between consecutive picks)
+
+    by dynamic programming over slots: O(slots * candidates^2).
+    """
+    # best[c]: best objective of a progression ending in candidate c of this slot
+    best = [_node_value(c, targets[0]) for c in slots[0]]
+    back: List[List[int]] = []
+    for slot in range(1, len(slots)):
+        previous = slots[slot - 1]
+        current_best, current_back = [], []
+        for candidate in slots[slot]:
+            value, parent = max(
+                (best[p] - _transition_penalty(prev.difficulty, candidate.difficulty), p)
+                for p, prev in enumerate(previous)
+            )
+            current_best.append(value + _node_value(candidate, targets[slot]))
+            current_back.append(parent)
+        best = current_best
+        back.append(current_back)
+
+    index = max(range(len(best)), key=best.__getitem__)
+    objective = best[index]
+    picks = [index]
+    for pointers in reversed(back):
+        index = pointers[index]
+        picks.append(index)
+    picks.reverse()
+    return [slots[slot][pick] for slot, pick in enumerate(picks)], objective
+
+
+def _node_value(candidate: Candidate, target: float) -> float:
+    return candidate.quality - CURVE_WEIGHT * abs(candidate.difficulty - target)
+
+
+def _transition_penalty(previous: float, current: float) -> float:
+    if current < previous - DIFFICULTY_TOLERANCE:
+        return DIP_PENALTY
+    if current > previous + MAX_DIFFICULTY_STEP:
+        return SPIKE_PENALTY
+    return 0.0
+
+
+def _evaluate(task: Tuple) -> Optional[Candidate]:
+    """Worker: generate (procedural) and score one candidate."""
+    kind, slot, payload, abilities, genre, number = task
+    if kind == "procedural":
+        try:
+            level = generate_level(payload, abilities, seed=number, index=slot)
+        except RuntimeError:
+            return None
+        source = f"procedural seed {number}"
+    else:
+        level = payload
+        source = f"llm set {number}"
+
+    layout = level.get("layout")
+    if not isinstance(layout, dict):
+        return None
+    quality, difficulty, issues = score_level(layout, abilities, genre)
+    return Candidate(slot, source, level, quality, difficulty, issues)
+
+
+def _map(function, tasks: List[Tuple], workers: Optional[int]) -> List[Any]:
+    """Run tasks in a process pool (in-process for workers 0/1 or tiny batches)."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) < 2 * workers:
+        return [function(task) for task in tasks]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, tasks, chunksize=chunksize))
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    """min / p25 / median / p75 / max / mean."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def percentile(q: float) -> float:
+        position = (len(ordered) - 1) * q
+        low, high = math.floor(position), math.ceil(position)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "min": round(ordered[0], 2),
+        "p25": round(percentile(0.25), 2),
+        "median": round(percentile(0.5), 2),
+        "p75": round(percentile(0.75), 2),
+        "max": round(ordered[-1], 2),
+        "mean": round(sum(ordered) / len(ordered), 2),
+    }
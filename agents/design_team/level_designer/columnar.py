@@ -0,0 +1,579 @@
+"""
+Columnar Layout - Compact storage for level layout objects
+
+A layout's platforms/enemies/collectibles arrive as lists of dicts, which
+cost a few hundred bytes per object. ColumnarLayout keeps each group as
+parallel typed arrays instead:
+
+- numeric fields (x, y, width, ...) -> array('i'), widened to 'q'/'d' on demand
+- string fields (type, behavior)    -> array('H') codes into one interned table
+- flags (required)                  -> bytearray (0 = missing, 1 = false, 2 = true)
+- optional fields                   -> presence bytearray, allocated only when a
+                                       value is actually missing
+- anything else                     -> sparse per-row "extras" dict
+
+Each row also keeps an interned key-order code, so to_json() reproduces the
+original objects exactly (same keys, key order, value types).
+
+Geometry, reachability, difficulty and the procedural generator all work on
+ColumnarLayout directly; dict layouts are converted once on entry.
+
+Run this module to benchmark memory and validation time:
+
+    python agents/design_team/level_designer/columnar.py [objects]
+"""
+
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from shared.schemas.design_schemas import Collectible, Enemy, Platform
+
+
+# Field layout per object group
+GROUP_SCHEMAS = {
+    "platforms": {
+        "numeric": ("x", "y", "width", "height"),
+        "strings": ("type",),
+        "flags": (),
+    },
+    "enemies": {
+        "numeric": ("x", "y", "width", "height", "patrolRange", "health"),
+        "strings": ("type", "behavior"),
+        "flags": (),
+    },
+    "collectibles": {
+        "numeric": ("x", "y", "width", "height", "value"),
+        "strings": ("type",),
+        "flags": ("required",),
+    },
+}
+
+# Hitbox size (width, height) for objects without explicit dimensions
+DEFAULT_SIZES = {
+    "platforms": (0, 0),
+    "enemies": (32, 32),
+    "collectibles": (16, 16),
+}
+
+_INT32 = (-2 ** 31, 2 ** 31 - 1)
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+_FLOAT_EXACT = 2 ** 53          # larger ints do not survive a 'd' column
+
+
+class Interner:
+    """Bidirectional value <-> small-int table (code 0 is reserved for "missing")."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[Any] = [None]
+        self.codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class NumericColumn:
+    """Numbers stored in the narrowest array typecode that holds them."""
+
+    __slots__ = ("values", "present", "int_rows")
+
+    def __init__(self):
+        self.values = array("i")
+        self.present: Optional[bytearray] = None    # None = every row present
+        self.int_rows: Optional[bytearray] = None   # ints stored in a 'd' column
+
+    def append(self, value: Any, missing: bool = False) -> bool:
+        """
+        Append a value; returns False if it cannot be stored (goes to extras).
+
+        That covers non-numbers and ints outside int64 (or beyond 2**53 in
+        a float column).
+        """
+        if missing:
+            self._mark(False)
+            self._push(0, is_int=True)
+            return True
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        if not self._fits(value):
+            return False
+        self._mark(True)
+        self._push(value, isinstance(value, int))
+        return True
+
+    def get(self, row: int) -> Any:
+        value = self.values[row]
+        if self.int_rows is not None and self.int_rows[row]:
+            return int(value)
+        return value
+
+    def has(self, row: int) -> bool:
+        return self.present is None or bool(self.present[row])
+
+    def load(self, values: List[Any], missing: Any) -> bool:
+        """Bulk-load an empty column; False if values need the per-row path."""
+        present = None
+        types = set(map(type, values))
+        if type(missing) in types:
+            present = bytearray(v is not missing for v in values)
+            values = [0 if v is missing else v for v in values]
+            types = set(map(type, values))
+
+        if types == {int}:
+            for typecode in ("i", "q"):
+                try:
+                    self.values = array(typecode, values)
+                    break
+                except OverflowError:
+                    continue
+            else:
+                return False
+        elif types <= {int, float}:
+            if any(type(v) is int and abs(v) > _FLOAT_EXACT for v in values):
+                return False
+            self.values = array("d", values)
+            self.int_rows = bytearray(type(v) is int for v in values)
+        else:
+            return False
+        self.present = present
+        return True
+
+    def _fits(self, value) -> bool:
+        """Whether value can be stored without overflow or precision loss."""
+        typecode = self.values.typecode
+        if isinstance(value, int):
+            if typecode == "d":
+                return abs(value) <= _FLOAT_EXACT
+            return _INT64[0] <= value <= _INT64[1]
+        # A float widens the column to 'd': its ints must survive that
+        return typecode != "q" or all(abs(v) <= _FLOAT_EXACT for v in self.values)
+
+    def _push(self, value, is_int: bool):
+        typecode = self.values.typecode
+        if not is_int and typecode != "d":
+            self._widen("d")
+        elif is_int and typecode == "i" and not (_INT32[0] <= value <= _INT32[1]):
+            self._widen("q")
+        if self.values.typecode == "d" and self.int_rows is not None:
+            self.int_rows.append(1 if is_int else 0)
+        self.values.append(value)
+
+    def _widen(self, typecode: str):
+        if typecode == "d" and self.int_rows is None:
+            self.int_rows = bytearray(b"\x01" * len(self.values))
+        self.values = array(typecode, self.values)
+
+    def _mark(self, present: bool):
+        if self.present is None:
+            if present:
+                return
+            self.present = bytearray(b"\x01" * len(self.values))
+        self.present.append(1 if present else 0)
+
+
+class ObjectTable:
+    """One object group (e.g. platforms) as parallel columns."""
+
+    def __init__(self, group: str, strings: Interner, key_orders: Interner):
+        schema = GROUP_SCHEMAS.get(group, {"numeric": (), "strings": (), "flags": ()})
+        self.group = group
+        self.strings = strings
+        self.key_orders = key_orders
+        self.numeric = {name: NumericColumn() for name in schema["numeric"]}
+        self.string_codes = {name: array("H") for name in schema["strings"]}
+        self.flags = {name: bytearray() for name in schema["flags"]}
+        self.orders = array("H")
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self._size = 0
+        self._boxes: Optional[Tuple[array, array, array, array]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, obj: Dict[str, Any]) -> int:
+        """Add an object (dict in JSON form); returns its row."""
+        row = self._size
+        extras = {}
+
+        for name, column in self.numeric.items():
+            if name not in obj:
+                column.append(None, missing=True)
+            elif not column.append(obj[name]):
+                column.append(None, missing=True)
+                extras[name] = obj[name]
+
+        for name, codes in self.string_codes.items():
+            value = obj.get(name)
+            if name in obj and isinstance(value, str):
+                code = self.strings.code(value)
+                if code > 0xFFFF and codes.typecode == "H":
+                    codes = self.string_codes[name] = array("I", codes)
+                codes.append(code)
+            else:
+                codes.append(0)
+                if name in obj:
+                    extras[name] = value
+
+        for name, flags in self.flags.items():
+            value = obj.get(name)
+            if name in obj and isinstance(value, bool):
+                flags.append(2 if value else 1)
+            else:
+                flags.append(0)
+                if name in obj:
+                    extras[name] = value
+
+        for key, value in obj.items():
+            if key not in self.numeric and key not in self.string_codes and key not in self.flags:
+                extras[key] = value
+
+        self.orders.append(self.key_orders.code(tuple(obj.keys())))
+        if extras:
+            self.extras[row] = extras
+        self._size += 1
+        self._boxes = None
+        return row
+
+    def extend(self, objs: List[Dict[str, Any]]):
+        """Append many objects; loads whole columns at once into an empty table."""
+        if self._size:
+            for obj in objs:
+                self.append(obj)
+            return
+
+        missing = object()
+        base_extras: Dict[int, Dict[str, Any]] = {}
+
+        def slow(load, fallback, name):
+            values = [obj.get(name, missing) for obj in objs]
+            if not load(values, missing):
+                for row, (obj, value) in enumerate(zip(objs, values)):
+                    if not fallback(value is missing, value):
+                        base_extras.setdefault(row, {})[name] = value
+
+        for name, column in self.numeric.items():
+            def numeric_fallback(absent, value, column=column):
+                if absent:
+                    return column.append(None, missing=True)
+                if column.append(value):
+                    return True
+                column.append(None, missing=True)
+                return False
+            slow(column.load, numeric_fallback, name)
+
+        for name in self.string_codes:
+            codes = self.string_codes[name]
+
+            def load_strings(values, missing, name=name):
+                if set(map(type, values)) != {str}:
+                    return False
+                codes = array("H") if len(self.strings.values) + len(values) <= 0xFFFF else array("I")
+                codes.extend(map(self.strings.code, values))
+                self.string_codes[name] = codes
+                return True
+
+            def string_fallback(absent, value, codes=codes):
+                if not absent and isinstance(value, str):
+                    codes.append(self.strings.code(value))
+                    return True
+                codes.append(0)
+                return absent
+            slow(load_strings, string_fallback, name)
+
+        for name in self.flags:
+            flags = self.flags[name]
+
+            def load_flags(values, missing, flags=flags):
+                if set(map(type, values)) != {bool}:
+                    return False
+                flags.extend(2 if v else 1 for v in values)
+                return True
+
+            def flag_fallback(absent, value, flags=flags):
+                if not absent and isinstance(value, bool):
+                    flags.append(2 if value else 1)
+                    return True
+                flags.append(0)
+                return absent
+            slow(load_flags, flag_fallback, name)
+
+        known = set(self.numeric) | set(self.string_codes) | set(self.flags)
+        key_orders = [tuple(obj) for obj in objs]
+        unknown_keys = {
+            order: [key for key in order if key not in known]
+            for order in set(key_orders)
+        }
+        for row, (obj, order) in enumerate(zip(objs, key_orders)):
+            for key in unknown_keys[order]:
+                base_extras.setdefault(row, {})[key] = obj[key]
+        self.orders = array("H", map(self.key_orders.code, key_orders))
+
+        self.extras = base_extras
+        self._size = len(objs)
+        self._boxes = None
+
+    def value(self, row: int, name: str, default: Any = None) -> Any:
+        """Field of one row, as it appeared in the JSON."""
+        extras = self.extras.get(row)
+        if extras and name in extras:
+            return extras[name]
+        if name in self.numeric:
+            column = self.numeric[name]
+            return column.get(row) if column.has(row) else default
+        if name in self.string_codes:
+            code = self.string_codes[name][row]
+            return self.strings.values[code] if code else default
+        if name in self.flags:
+            flag = self.flags[name][row]
+            return (flag == 2) if flag else default
+        return default
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Rebuild one object dict (original key order)."""
+        return {key: self.value(row, key) for key in self.key_orders.values[self.orders[row]]}
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(self._size)]
+
+    def column(self, name: str, default: float = 0.0) -> array:
+        """Numeric column as array('d') with `default` for missing values."""
+        column = self.numeric[name]
+        values = array("d", column.values)
+        if column.present is not None:
+            for row, present in enumerate(column.present):
+                if not present:
+                    values[row] = default
+        for row, extras in self.extras.items():
+            if name in extras:
+                values[row] = default
+        return values
+
+    def codes(self, name: str) -> array:
+        """Interned string codes of a string column (0 = missing)."""
+        return self.string_codes[name]
+
+    def flag(self, name: str) -> bytearray:
+        """Flag column (0 = missing, 1 = false, 2 = true)."""
+        return self.flags[name]
+
+    def set_flag(self, row: int, name: str, value: bool):
+        """Overwrite a flag that the row already has (e.g. required)."""
+        if not self.flags[name][row]:
+            raise KeyError(f"{self.group}[{row}] has no flag '{name}'")
+        self.flags[name][row] = 2 if value else 1
+
+    def boxes(self) -> Tuple[array, array, array, array]:
+        """Bounding boxes as columns (x0, y0, x1, y1), using DEFAULT_SIZES."""
+        if self._boxes is None:
+            default_w, default_h = DEFAULT_SIZES.get(self.group, (0, 0))
+            x0 = self.column("x")
+            y0 = self.column("y")
+            widths = self.column("width", default_w) if "width" in self.numeric else None
+            heights = self.column("height", default_h) if "height" in self.numeric else None
+            x1 = array("d", x0)
+            y1 = array("d", y0)
+            for i in range(len(x0)):
+                x1[i] += widths[i] if widths is not None else default_w
+                y1[i] += heights[i] if heights is not None else default_h
+            self._boxes = (x0, y0, x1, y1)
+        return self._boxes
+
+    def record(self, row: int):
+        """Row as the matching design_schemas dataclass."""
+        if self.group == "platforms":
+            return Platform(
+                x=self.value(row, "x", 0),
+                y=self.value(row, "y", 0),
+                width=self.value(row, "width", 0),
+                height=self.value(row, "height", 0),
+                type=self.value(row, "type", "ground"),
+            )
+        if self.group == "enemies":
+            return Enemy(
+                x=self.value(row, "x", 0),
+                y=self.value(row, "y", 0),
+                type=self.value(row, "type", ""),
+                behavior=self.value(row, "behavior", "patrol"),
+                patrol_range=self.value(row, "patrolRange"),
+                health=self.value(row, "health"),
+            )
+        if self.group == "collectibles":
+            return Collectible(
+                x=self.value(row, "x", 0),
+                y=self.value(row, "y", 0),
+                type=self.value(row, "type", ""),
+                value=self.value(row, "value", 1),
+                required=self.value(row, "required", False),
+            )
+        raise KeyError(f"No record type for group: {self.group}")
+
+    def nbytes(self) -> int:
+        """Approximate buffer size of the columns (excluding extras)."""
+        total = self.orders.itemsize * len(self.orders)
+        for column in self.numeric.values():
+            total += column.values.itemsize * len(column.values)
+            total += len(column.present or b"") + len(column.int_rows or b"")
+        for codes in self.string_codes.values():
+            total += codes.itemsize * len(codes)
+        for flags in self.flags.values():
+            total += len(flags)
+        return total
+
+
+class ColumnarLayout:
+    """A level layout with columnar object groups."""
+
+    GROUPS = ("platforms", "enemies", "collectibles")
+
+    def __init__(self):
+        self.strings = Interner()
+        self.key_orders = Interner()
+        self.meta: Dict[str, Any] = {}
+        self.field_order: List[str] = []
+        self.tables = {
+            group: ObjectTable(group, self.strings, self.key_orders)
+            for group in self.GROUPS
+        }
+
+    @classmethod
+    def from_json(cls, layout: Dict[str, Any]) -> "ColumnarLayout":
+        """Convert a JSON layout (dict of lists of dicts)."""
+        columns = cls()
+        columns.field_order = list(layout.keys())
+        for key, value in layout.items():
+            if key in cls.GROUPS and isinstance(value, list) and all(isinstance(o, dict) for o in value):
+                columns.tables[key].extend(value)
+            else:
+                columns.meta[key] = value
+        return columns
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert back to the JSON layout (identical to the input of from_json)."""
+        layout = {}
+        for key in self.field_order:
+            layout[key] = self.meta[key] if key in self.meta else self.tables[key].to_json()
+        for group in self.GROUPS:
+            if group not in layout and len(self.tables[group]):
+                layout[group] = self.tables[group].to_json()
+        return layout
+
+    def table(self, group: str) -> ObjectTable:
+        return self.tables[group]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Non-object layout field (width, height, goal, spawn, ...)."""
+        return self.meta.get(key, default)
+
+    def set(self, key: str, value: Any):
+        if key not in self.field_order:
+            self.field_order.append(key)
+        self.meta[key] = value
+
+    def add(self, group: str, obj: Dict[str, Any]) -> int:
+        """Append an object to a group (for generators)."""
+        if group not in self.field_order:
+            self.field_order.append(group)
+        return self.tables[group].append(obj)
+
+    def rows(self, group: str) -> Iterator[Dict[str, Any]]:
+        table = self.tables[group]
+        return (table.row(i) for i in range(len(table)))
+
+    def nbytes(self) -> int:
+        return sum(table.nbytes() for table in self.tables.values())
+
+
+def as_columnar(layout: Union[Dict[str, Any], ColumnarLayout]) -> ColumnarLayout:
+    """Accept either representation."""
+    if isinstance(layout, ColumnarLayout):
+        return layout
+    return ColumnarLayout.from_json(layout)
+
+
+def _benchmark(objects: int = 30000):
+    """Compare list-of-dicts and columnar layouts: memory and validation time."""
+    import gc
+    import json
+    import random
+    import time
+    import tracemalloc
+
+    # Import through the package so isinstance() checks see the same class
+    # when this file runs as __main__
+    from design_team.level_designer.columnar import ColumnarLayout
+    from design_team.level_designer.geometry import validate_layout
+
+    rng = random.Random(7)
+    per_group = objects // 3
+    width = per_group * 60
+    source = {
+        "width": width,
+        "height": 1200,
+        "platforms": [
+            {"x": i * 60 + rng.randint(0, 40), "y": rng.randint(0, 1100),
+             "width": rng.randint(30, 200), "height": 32,
+             "type": rng.choice(["ground", "floating", "moving"])}
+            for i in range(per_group)
+        ],
+        "enemies": [
+            {"x": rng.randint(0, width), "y": rng.randint(0, 1150),
+             "type": "drone", "behavior": rng.choice(["patrol", "chase"]), "patrolRange": 100}
+            for _ in range(per_group)
+        ],
+        "collectibles": [
+            {"x": rng.randint(0, width), "y": rng.randint(0, 1150),
+             "type": "coin", "value": 1, "required": False}
+            for _ in range(per_group)
+        ],
+        "goal": {"x": width - 100, "y": 500},
+    }
+    text = json.dumps(source)
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return value, current
+
+    dict_layout, dict_bytes = measure(lambda: json.loads(text))
+    columns, column_bytes = measure(lambda: ColumnarLayout.from_json(dict_layout))
+    assert columns.to_json() == dict_layout, "round-trip mismatch"
+
+    def best_time(fn, repeat=3):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    start = time.perf_counter()
+    ColumnarLayout.from_json(dict_layout)
+    convert_s = time.perf_counter() - start
+    dict_s = best_time(lambda: validate_layout(dict_layout))
+    column_s = best_time(lambda: validate_layout(columns))
+
+    count = sum(len(columns.table(g)) for g in ColumnarLayout.GROUPS)
+    print(f"Objects:              {count:,}")
+    print(f"Memory (dicts):       {dict_bytes / count:8.1f} B/object")
+    print(f"Memory (columnar):    {column_bytes / count:8.1f} B/object "
+          f"({dict_bytes / column_bytes:.1f}x smaller)")
+    print(f"Validate (dicts):     {dict_s * 1000:8.1f} ms (includes conversion)")
+    print(f"Validate (columnar):  {column_s * 1000:8.1f} ms "
+          f"({dict_s / column_s:.1f}x faster; conversion alone {convert_s * 1000:.1f} ms)")
+    print("Round-trip:           lossless")
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)
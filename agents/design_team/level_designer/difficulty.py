@@ -0,0 +1,308 @@
+"""
+Level Difficulty - Difficulty estimated from layout geometry
+
+The LLM's self-reported "difficulty" is a guess. This module measures it:
+
+- gaps:       horizontal distance between neighbouring platforms
+- tightness:  how close each jump comes to the jump envelope's limit
+              (mean, and mean of the tightest quarter of jumps)
+- enemies:    threat per screen width (chase > patrol > stationary)
+- detours:    extra distance to reach required collectibles off the path
+- length:     level width in screens
+
+Single extreme values make the score noisy, so per-jump tightness and
+enemy threat are capped and the hardest jumps are averaged rather than
+taking the maximum. Features are combined with per-genre weights and
+mapped onto the 1-10 scale with a calibration range per genre and ability
+set (see fit_calibration()). Per-object work is done column by column
+over flat arrays, so thousands of candidate layouts can be scored in a
+batch.
+"""
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from design_team.level_designer.columnar import ColumnarLayout, as_columnar
+from design_team.level_designer.reachability import KNOWN_ABILITIES, JumpEnvelope, jump_envelope
+
+
+SCREEN_WIDTH = 960  # px of level visible at once
+
+ENEMY_THREAT = {"chase": 1.8, "patrol": 1.0, "stationary": 0.6}
+
+# Computed difficulty may dip this much between consecutive levels, and rise
+# at most MAX_DIFFICULTY_STEP, before the progression is flagged
+DIFFICULTY_TOLERANCE = 0.5
+MAX_DIFFICULTY_STEP = 3.0
+
+# Jumps above this fraction of the envelope count as "tight"
+TIGHT_JUMP = 0.75
+
+# Per-jump tightness above this is an ability move (wall-jump tower, dash
+# gap) rather than a harder jump, and counts as exactly at the limit
+TIGHTNESS_CAP = 1.0
+
+# Enemy threat per screen beyond this does not make a level any harder
+ENEMY_THREAT_CAP = 2.0
+
+# Feature weights per genre, and the raw-score range mapped onto 1-10 per
+# ability set (abilities besides jump, sorted). Ranges are fitted by
+# fit_calibration() so procedural levels generated at each difficulty
+# (procedural.py) score that difficulty on average.
+GENRE_CALIBRATION = {
+    "platformer": {
+        "weights": {
+            "mean_tightness": 10.0,
+            "top_tightness": 1.0,
+            "tight_jumps_per_screen": 0.5,
+            "enemy_threat_per_screen": 1.0,
+            "detour": 4.0,
+            "screens": 0.5,
+        },
+        "ranges": {
+            (): (5.14, 12.6),
+            ('dash',): (4.53, 10.14),
+            ('double_jump',): (4.1, 9.0),
+            ('wall_jump',): (5.52, 12.77),
+            ('dash', 'double_jump'): (3.88, 8.32),
+            ('dash', 'wall_jump'): (4.86, 10.37),
+            ('double_jump', 'wall_jump'): (4.1, 9.0),
+            ('dash', 'double_jump', 'wall_jump'): (3.88, 8.32),
+        },
+    },
+    "action": {
+        "weights": {
+            "mean_tightness": 6.0,
+            "top_tightness": 1.0,
+            "tight_jumps_per_screen": 0.5,
+            "enemy_threat_per_screen": 3.0,
+            "detour": 2.0,
+            "screens": 0.5,
+        },
+        "ranges": {
+            (): (4.33, 10.85),
+            ('dash',): (3.99, 9.05),
+            ('double_jump',): (3.68, 8.44),
+            ('wall_jump',): (4.55, 10.98),
+            ('dash', 'double_jump'): (3.52, 7.82),
+            ('dash', 'wall_jump'): (4.17, 9.23),
+            ('double_jump', 'wall_jump'): (3.68, 8.44),
+            ('dash', 'double_jump', 'wall_jump'): (3.52, 7.82),
+        },
+    },
+    "puzzle": {
+        "weights": {
+            "mean_tightness": 5.0,
+            "top_tightness": 0.5,
+            "tight_jumps_per_screen": 0.25,
+            "enemy_threat_per_screen": 0.5,
+            "detour": 8.0,
+            "screens": 0.8,
+        },
+        "ranges": {
+            (): (4.43, 10.63),
+            ('dash',): (4.13, 9.4),
+            ('double_jump',): (3.92, 8.81),
+            ('wall_jump',): (4.63, 10.69),
+            ('dash', 'double_jump'): (3.81, 8.47),
+            ('dash', 'wall_jump'): (4.3, 9.49),
+            ('double_jump', 'wall_jump'): (3.92, 8.81),
+            ('dash', 'double_jump', 'wall_jump'): (3.81, 8.47),
+        },
+    },
+}
+DEFAULT_GENRE = "platformer"
+
+# Procedural levels per difficulty used by fit_calibration()
+CALIBRATION_SAMPLES = 60
+
+
+@dataclass
+class DifficultyEstimate:
+    """Computed difficulty of one layout."""
+
+    score: float                      # 1.0-10.0
+    features: Dict[str, float] = field(default_factory=dict)
+    genre: str = DEFAULT_GENRE
+
+
+def estimate_difficulty(
+    layout: Union[Dict[str, Any], ColumnarLayout],
+    abilities: FrozenSet[str] = frozenset({"jump"}),
+    genre: Optional[str] = None,
+) -> DifficultyEstimate:
+    """
+    Score a layout's difficulty from its geometry.
+
+    Args:
+        layout: Level layout
+        abilities: Player abilities (see reachability.abilities_from_concept)
+        genre: Concept genre (selects the calibration; unknown -> platformer)
+
+    Returns:
+        DifficultyEstimate
+    """
+    genre = genre if genre in GENRE_CALIBRATION else DEFAULT_GENRE
+    envelope = jump_envelope(frozenset(abilities))
+    features = layout_features(layout, envelope)
+
+    calibration = GENRE_CALIBRATION[genre]
+    raw = raw_score(features, calibration["weights"])
+    low, high = calibration["ranges"][ability_set(abilities)]
+    score = 1.0 + 9.0 * (raw - low) / (high - low)
+    return DifficultyEstimate(
+        score=round(max(1.0, min(10.0, score)), 1),
+        features={name: round(value, 4) for name, value in features.items()},
+        genre=genre,
+    )
+
+
+def score_levels(
+    layouts: List[Union[Dict[str, Any], ColumnarLayout]],
+    abilities: FrozenSet[str] = frozenset({"jump"}),
+    genre: Optional[str] = None,
+) -> List[DifficultyEstimate]:
+    """Score many layouts with one shared envelope."""
+    return [estimate_difficulty(layout, abilities, genre) for layout in layouts]
+
+
+def ability_set(abilities: FrozenSet[str]) -> Tuple[str, ...]:
+    """Calibration key of an ability set: known abilities besides jump, sorted."""
+    return tuple(sorted(a for a in abilities if a in KNOWN_ABILITIES and a != "jump"))
+
+
+def raw_score(features: Dict[str, float], weights: Dict[str, float]) -> float:
+    """Weighted feature sum before calibration."""
+    return sum(weights[name] * features[name] for name in weights)
+
+
+def fit_calibration(
+    genre: str,
+    abilities: FrozenSet[str],
+    samples: int = CALIBRATION_SAMPLES,
+) -> Tuple[float, float]:
+    """
+    Fit the raw-score range of a genre and ability set.
+
+    Generates `samples` procedural levels at every difficulty 1-10 with the
+    default plan's parameters, fits raw score ~ difficulty by least
+    squares and returns the fitted raw scores at difficulty 1 and 10.
+    Used to regenerate GENRE_CALIBRATION[genre]["ranges"] when features,
+    weights or the generator change.
+    """
+    # Imported here: the generator is only needed to recalibrate
+    from design_team.level_designer.procedural import (
+        DEFAULT_WIDTH,
+        LevelPlan,
+        generate_level,
+    )
+
+    abilities = frozenset(abilities) | {"jump"}
+    envelope = jump_envelope(abilities)
+    weights = GENRE_CALIBRATION[genre]["weights"]
+    points = []
+    for difficulty in range(1, 11):
+        plan = LevelPlan(
+            name="Calibration",
+            theme="city",
+            difficulty=difficulty,
+            width=DEFAULT_WIDTH + 250 * difficulty,
+            required_collectibles=difficulty // 4,
+        )
+        for seed in range(samples):
+            try:
+                level = generate_level(plan, abilities, seed=seed, index=difficulty)
+            except RuntimeError:
+                continue
+            features = layout_features(level["layout"], envelope)
+            points.append((raw_score(features, weights), difficulty))
+
+    count = len(points)
+    mean_raw = sum(raw for raw, _ in points) / count
+    mean_difficulty = sum(d for _, d in points) / count
+    covariance = sum((raw - mean_raw) * (d - mean_difficulty) for raw, d in points)
+    variance = sum((d - mean_difficulty) ** 2 for _, d in points)
+    slope = covariance / variance
+    intercept = mean_raw - slope * mean_difficulty
+    return round(intercept + slope, 2), round(intercept + 10 * slope, 2)
+
+
+def layout_features(
+    layout: Union[Dict[str, Any], ColumnarLayout],
+    envelope: JumpEnvelope,
+) -> Dict[str, float]:
+    """Raw difficulty features of a layout (see module docstring)."""
+    columns = as_columnar(layout)
+    x0, top, x1, _ = columns.table("platforms").boxes()
+    width = float(columns.get("width") or max(x1, default=0.0) or SCREEN_WIDTH)
+    screens = max(1.0, width / SCREEN_WIDTH)
+
+    # Jumps between neighbouring platforms, left to right
+    path = sorted(range(len(x0)), key=x0.__getitem__)
+
+    gaps = array("d", (
+        max(0.0, x0[b] - x1[a], x0[a] - x1[b]) for a, b in zip(path, path[1:])
+    ))
+    rises = array("d", (top[a] - top[b] for a, b in zip(path, path[1:])))
+    tightness = array("d", (
+        min(TIGHTNESS_CAP, _tightness(gap, rise, envelope)) for gap, rise in zip(gaps, rises)
+    ))
+    jumps = [t for t, gap in zip(tightness, gaps) if gap > 0 or t > 0]
+    hardest = sorted(jumps, reverse=True)[:max(1, len(jumps) // 4)]
+
+    # Enemy threat (per interned behavior code, then one pass over the column)
+    enemies = columns.table("enemies")
+    strings = columns.strings.values
+    code_threat = {
+        code: ENEMY_THREAT.get(strings[code] if code else "patrol", 1.0)
+        for code in set(enemies.codes("behavior"))
+    }
+    threat = sum(code_threat[code] for code in enemies.codes("behavior"))
+
+    # Required collectible detours, relative to one screen
+    collectibles = columns.table("collectibles")
+    detour = 0.0
+    for px, py, flag in zip(collectibles.column("x"), collectibles.column("y"), collectibles.flag("required")):
+        if flag != 2 or not path:
+            continue
+        nearest = min(
+            math.hypot(max(0.0, x0[i] - px, px - x1[i]), top[i] - py)
+            for i in path
+        )
+        detour += nearest / SCREEN_WIDTH
+
+    return {
+        "mean_gap": sum(gaps) / len(gaps) if gaps else 0.0,
+        "max_gap": max(gaps) if gaps else 0.0,
+        "mean_tightness": sum(jumps) / len(jumps) if jumps else 0.0,
+        "top_tightness": sum(hardest) / len(hardest) if jumps else 0.0,
+        "tight_jumps_per_screen": sum(1 for t in jumps if t >= TIGHT_JUMP) / screens,
+        "enemy_threat_per_screen": min(ENEMY_THREAT_CAP, threat / screens),
+        "detour": detour,
+        "screens": screens,
+    }
+
+
+def _tightness(gap: float, rise: float, envelope: JumpEnvelope) -> float:
+    """
+    0 = trivial step, 1 = at the edge of the envelope, >1 = beyond it.
+
+    Uses the larger of the horizontal fraction (gap vs. widest gap at this
+    rise) and the vertical fraction (rise vs. highest rise at this gap).
+    """
+    widest = 0.0
+    for bucket, height in enumerate(envelope.heights):
+        if height < rise:
+            break
+        widest = (bucket + 1) * envelope.step
+    horizontal = gap / widest if widest else 1.5
+
+    highest = envelope.max_height(gap)
+    if highest is None or highest <= 0:
+        vertical = 1.5 if rise > 0 else 0.0
+    else:
+        vertical = max(0.0, rise) / highest
+    return min(1.5, max(horizontal, vertical))
+
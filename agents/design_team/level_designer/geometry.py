@@ -0,0 +1,326 @@
+"""
+Level Geometry - Spatial index and geometric validation for level layouts
+
+Layouts use screen coordinates (y grows downward). Platforms are solid
+rectangles anchored at their top-left corner; enemies and collectibles are
+boxes anchored the same way, sized by DEFAULT_SIZES unless the object
+carries its own width/height.
+
+All checks run over a uniform grid, so validation stays close to linear in
+the number of objects instead of comparing every pair. Layouts may be JSON
+dicts or ColumnarLayout (dicts are converted once).
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from design_team.level_designer.columnar import DEFAULT_SIZES, ColumnarLayout, as_columnar
+from shared.tracing import traced
+
+
+DEFAULT_CELL_SIZE = 128
+
+# Boxes covering more cells than this are checked pairwise instead
+MAX_BOX_CELLS = 256
+
+# Score penalty per issue kind (applied once per level by the level designer)
+GEOMETRY_PENALTIES = {
+    "platform_overlap": 5,
+    "collectible_in_solid": 5,
+    "enemy_in_solid": 10,
+    "out_of_bounds": 10,
+    "invalid_coordinates": 20,
+}
+
+Box = Tuple[float, float, float, float]  # x0, y0, x1, y1
+
+
+@dataclass
+class GeometryIssue:
+    """A geometric problem found in a layout."""
+
+    kind: str  # "platform_overlap", "collectible_in_solid", "enemy_in_solid", "out_of_bounds",
+               # "invalid_coordinates"
+    message: str
+    refs: Tuple[str, ...]  # e.g. ("platforms[3]", "platforms[7]")
+
+
+class SpatialGrid:
+    """
+    Uniform grid over axis-aligned boxes.
+
+    Each box is registered in every cell it touches. Queries only visit the
+    cells covered by the query box. Cell ranges are clamped to `bounds`
+    (e.g. the layout size) when given, and boxes that would still cover
+    more than MAX_BOX_CELLS cells are kept in a separate list checked
+    pairwise, so no box or query enumerates an unbounded cell range.
+    Boxes with non-finite coordinates are rejected.
+    """
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE, bounds: Optional[Box] = None):
+        self.cell_size = cell_size
+        self.boxes: List[Box] = []
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.large: List[int] = []      # ids of boxes too big for the cells
+        self.extent: Optional[Box] = None   # pixel range of the occupied cells
+        self.limits: Optional[Tuple[int, int, int, int]] = None
+        if bounds is not None:
+            _check_finite(bounds)
+            self.limits = self._span(bounds)
+
+    def insert(self, box: Box) -> int:
+        """Add a box; returns its id (insertion index)."""
+        self.insert_many(*([value] for value in box))
+        return len(self.boxes) - 1
+
+    def insert_many(
+        self,
+        x0: Sequence[float],
+        y0: Sequence[float],
+        x1: Sequence[float],
+        y1: Sequence[float],
+    ):
+        """
+        Add boxes given as columns (ids continue from the current size).
+
+        Raises:
+            ValueError: If a coordinate is infinite or NaN
+        """
+        boxes = list(zip(x0, y0, x1, y1))
+        for box in boxes:
+            _check_finite(box)
+        cells, large = self.cells, self.large
+        base = len(self.boxes)
+        self.boxes.extend(boxes)
+        spans = []
+        for offset, box in enumerate(boxes):
+            box_id = base + offset
+            cx0, cy0, cx1, cy1 = self._span(box)
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_BOX_CELLS:
+                large.append(box_id)
+                continue
+            spans.append((cx0, cy0, cx1, cy1))
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cells[(cx, cy)].append(box_id)
+
+        if spans:
+            size = self.cell_size
+            ex0, ey0, ex1, ey1 = (
+                min(span[0] for span in spans), min(span[1] for span in spans),
+                max(span[2] for span in spans), max(span[3] for span in spans),
+            )
+            if self.extent is not None:
+                ex0 = min(ex0, int(self.extent[0] // size))
+                ey0 = min(ey0, int(self.extent[1] // size))
+                ex1 = max(ex1, int(self.extent[2] // size))
+                ey1 = max(ey1, int(self.extent[3] // size))
+            self.extent = (ex0 * size, ey0 * size, ex1 * size, ey1 * size)
+
+    def query(self, box: Box) -> Iterator[int]:
+        """Ids of boxes whose interior intersects `box` (each once)."""
+        seen = set()
+        for ids in self._candidates(box):
+            for box_id in ids:
+                if box_id not in seen:
+                    seen.add(box_id)
+                    if intersects(box, self.boxes[box_id]):
+                        yield box_id
+
+    def first_hit(self, box: Box) -> Optional[int]:
+        """First id found intersecting `box`, or None (cheaper than query())."""
+        boxes = self.boxes
+        x0, y0, x1, y1 = box
+        for ids in self._candidates(box):
+            for box_id in ids:
+                a0, b0, a1, b1 = boxes[box_id]
+                if x0 < a1 and a0 < x1 and y0 < b1 and b0 < y1:
+                    return box_id
+        return None
+
+    def intersecting_pairs(self) -> Iterator[Tuple[int, int]]:
+        """
+        All (i, j), i < j, of intersecting boxes in the grid.
+
+        A pair is reported only from the cell holding the top-left corner of
+        its intersection, so no pair set is needed to de-duplicate. Pairs
+        involving a large box are found by checking it against every box.
+        """
+        for cell, ids in self.cells.items():
+            for a_pos, i in enumerate(ids):
+                a = self.boxes[i]
+                for j in ids[a_pos + 1:]:
+                    b = self.boxes[j]
+                    if not intersects(a, b):
+                        continue
+                    corner = self._span((max(a[0], b[0]), max(a[1], b[1])) * 2)[:2]
+                    if corner == cell:
+                        yield (i, j) if i < j else (j, i)
+
+        large = set(self.large)
+        for i in self.large:
+            a = self.boxes[i]
+            for j, b in enumerate(self.boxes):
+                if j != i and not (j in large and j < i) and intersects(a, b):
+                    yield (i, j) if i < j else (j, i)
+
+    def _span(self, box: Box) -> Tuple[int, int, int, int]:
+        """Cell range (cx0, cy0, cx1, cy1) covered by a finite box, clamped to the limits."""
+        size = self.cell_size
+        cx0, cy0 = int(box[0] // size), int(box[1] // size)
+        cx1, cy1 = int(box[2] // size), int(box[3] // size)
+        if self.limits is not None:
+            lx0, ly0, lx1, ly1 = self.limits
+            cx0, cx1 = min(max(cx0, lx0), lx1), min(max(cx1, lx0), lx1)
+            cy0, cy1 = min(max(cy0, ly0), ly1), min(max(cy1, ly0), ly1)
+        return cx0, cy0, cx1, cy1
+
+    def _candidates(self, box: Box) -> Iterator[List[int]]:
+        """Id lists that may hold boxes intersecting `box` (cells, then large boxes)."""
+        if any(value != value for value in box):
+            return      # NaN intersects nothing
+        if self.extent is not None:
+            # Clamp (possibly infinite) query edges to the occupied cells
+            size = self.cell_size
+            lo_x, lo_y, hi_x, hi_y = self.extent
+            x0, y0, x1, y1 = box
+            cx0 = int((lo_x if x0 < lo_x else hi_x if x0 > hi_x else x0) // size)
+            cy0 = int((lo_y if y0 < lo_y else hi_y if y0 > hi_y else y0) // size)
+            cx1 = int((lo_x if x1 < lo_x else hi_x if x1 > hi_x else x1) // size)
+            cy1 = int((lo_y if y1 < lo_y else hi_y if y1 > hi_y else y1) // size)
+            cells = self.cells
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+                for (cx, cy), ids in cells.items():
+                    if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                        yield ids
+            else:
+                for cx in range(cx0, cx1 + 1):
+                    for cy in range(cy0, cy1 + 1):
+                        ids = cells.get((cx, cy))
+                        if ids:
+                            yield ids
+        if self.large:
+            yield self.large
+
+
+def _check_finite(box: Box):
+    if not all(math.isfinite(value) for value in box):
+        raise ValueError(f"Box has non-finite coordinates: {box}")
+
+
+def intersects(a: Box, b: Box) -> bool:
+    """True if the boxes overlap with positive area (touching edges is fine)."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def object_box(obj: Dict[str, Any], group: str) -> Box:
+    """Bounding box of a layout object."""
+    default_w, default_h = DEFAULT_SIZES.get(group, (0, 0))
+    x = float(obj.get("x", 0))
+    y = float(obj.get("y", 0))
+    return (
+        x,
+        y,
+        x + float(obj.get("width", default_w)),
+        y + float(obj.get("height", default_h)),
+    )
+
+
+@traced("level.validate_layout")
+def validate_layout(
+    layout: Union[Dict[str, Any], ColumnarLayout],
+    cell_size: float = DEFAULT_CELL_SIZE,
+) -> List[GeometryIssue]:
+    """
+    Check a level layout for geometric errors.
+
+    Detects overlapping platforms, collectibles embedded in platforms,
+    enemies spawned inside platforms and objects outside
+    layout.width/height. Objects with infinite or NaN coordinates are
+    reported as invalid_coordinates and the other checks are skipped.
+
+    Args:
+        layout: Level layout (platforms, enemies, collectibles, goal)
+        cell_size: Grid cell size in pixels
+
+    Returns:
+        List of GeometryIssue (empty if the layout is clean)
+    """
+    columns = as_columnar(layout)
+    issues: List[GeometryIssue] = []
+
+    for group in ("platforms", "enemies", "collectibles"):
+        table = columns.table(group)
+        for index, box in enumerate(zip(*table.boxes())):
+            if not all(math.isfinite(value) for value in box):
+                issues.append(GeometryIssue(
+                    kind="invalid_coordinates",
+                    message=f"{group}[{index}] at {_position(table, index)} has non-finite coordinates",
+                    refs=(f"{group}[{index}]",),
+                ))
+    if issues:
+        return issues
+
+    grid = SpatialGrid(cell_size, bounds=layout_bounds(columns))
+    grid.insert_many(*columns.table("platforms").boxes())
+
+    for i, j in sorted(grid.intersecting_pairs()):
+        issues.append(GeometryIssue(
+            kind="platform_overlap",
+            message=f"platforms[{i}] overlaps platforms[{j}]",
+            refs=(f"platforms[{i}]", f"platforms[{j}]"),
+        ))
+
+    for group, kind, label in (
+        ("collectibles", "collectible_in_solid", "is embedded in"),
+        ("enemies", "enemy_in_solid", "spawns inside"),
+    ):
+        table = columns.table(group)
+        first_hit = grid.first_hit
+        for index, box in enumerate(zip(*table.boxes())):
+            hit = first_hit(box)
+            if hit is not None:
+                issues.append(GeometryIssue(
+                    kind=kind,
+                    message=f"{group}[{index}] at {_position(table, index)} {label} platforms[{hit}]",
+                    refs=(f"{group}[{index}]", f"platforms[{hit}]"),
+                ))
+
+    width = columns.get("width")
+    height = columns.get("height")
+    if width is not None and height is not None:
+        for group in ("platforms", "enemies", "collectibles"):
+            table = columns.table(group)
+            x0, y0, x1, y1 = table.boxes()
+            for index in range(len(table)):
+                if x0[index] < 0 or y0[index] < 0 or x1[index] > width or y1[index] > height:
+                    issues.append(GeometryIssue(
+                        kind="out_of_bounds",
+                        message=f"{group}[{index}] at {_position(table, index)} is outside {width}x{height}",
+                        refs=(f"{group}[{index}]",),
+                    ))
+        goal = columns.get("goal")
+        if goal and not (0 <= goal.get("x", 0) <= width and 0 <= goal.get("y", 0) <= height):
+            issues.append(GeometryIssue(
+                kind="out_of_bounds",
+                message=f"goal at ({goal.get('x')}, {goal.get('y')}) is outside {width}x{height}",
+                refs=("goal",),
+            ))
+
+    return issues
+
+
+def layout_bounds(columns: ColumnarLayout) -> Optional[Box]:
+    """(0, 0, width, height) of a layout, or None if the size is missing or not finite."""
+    width, height = columns.get("width"), columns.get("height")
+    try:
+        bounds = (0.0, 0.0, float(width), float(height))
+    except (TypeError, ValueError):
+        return None
+    return bounds if all(math.isfinite(value) for value in bounds) else None
+
+
+def _position(table, index: int) -> str:
+    return f"({table.value(index, 'x')}, {table.value(index, 'y')})"
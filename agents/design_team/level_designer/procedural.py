@@ -0,0 +1,558 @@
+"""
+Procedural Level Generator - Seeded local alternative to LLM level layouts
+
+Levels are assembled left to right from chunks picked by a small grammar:
+
+    level := runway body* finish
+    body  := flat | gap | stairs_up | stairs_down | floating_run
+           | enemy_patrol | tower (wall_jump/double_jump) | dash_gap (dash)
+
+Chunk weights and gap tightness scale with the difficulty target, and gaps
+are sized from the same jump envelopes the reachability check uses. Every
+finished layout is run through validate_layout() and analyze_level(); a
+layout that fails is regenerated from the next sub-seed. generate_levels()
+also regenerates layouts whose computed difficulty (difficulty.py) is more
+than DIFFICULTY_BAND from the plan, keeping the closest attempt if none is
+within the band.
+
+The output follows the LLM levels schema (platforms, enemies, collectibles,
+goal, mechanics), so everything downstream works unchanged. The same seed
+and plan always produce the same levels.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from design_team.level_designer.columnar import ColumnarLayout
+from design_team.level_designer.difficulty import estimate_difficulty
+from design_team.level_designer.geometry import validate_layout
+from design_team.level_designer.reachability import (
+    abilities_from_concept,
+    analyze_level,
+    jump_envelope,
+)
+
+
+MAX_ATTEMPTS = 20
+
+# generate_levels(): computed difficulty may differ from the plan this much
+DIFFICULTY_BAND = 0.75
+
+DEFAULT_WIDTH = 3000
+DEFAULT_HEIGHT = 800
+
+# Accepted plan values (LLM plans are clamped into these)
+DIFFICULTY_RANGE = (1, 10)
+WIDTH_RANGE = (1000, 20000)
+HEIGHT_RANGE = (400, 4000)
+REQUIRED_COLLECTIBLES_RANGE = (0, 20)
+PLATFORM_HEIGHT = 32
+ENEMY_SIZE = 32
+COLLECTIBLE_SIZE = 16
+
+# Body chunk weights at difficulty 1 and 10 (interpolated in between)
+CHUNK_WEIGHTS = {
+    "flat": (4.0, 0.5),
+    "gap": (3.0, 3.0),
+    "stairs_up": (2.0, 2.0),
+    "stairs_down": (2.0, 1.5),
+    "floating_run": (1.0, 3.0),
+    "enemy_patrol": (1.0, 4.0),
+    "tower": (0.5, 2.0),
+    "dash_gap": (0.5, 2.5),
+}
+
+# Chunks that need an ability beyond the basic jump
+CHUNK_ABILITIES = {
+    "tower": ("wall_jump", "double_jump"),
+    "dash_gap": ("dash",),
+}
+
+THEMES = ["city", "rooftops", "factory", "caves", "forest", "castle", "sky", "core"]
+
+CURVE_END_DIFFICULTY = {"flat": 4, "gradual": 8, "steep": 10}
+
+
+@dataclass
+class LevelPlan:
+    """Per-level parameters (picked by the LLM or by default_plan())."""
+
+    name: str
+    theme: str
+    difficulty: int
+    width: int = DEFAULT_WIDTH
+    height: int = DEFAULT_HEIGHT
+    enemy_types: List[str] = field(default_factory=lambda: ["slime"])
+    collectible_type: str = "coin"
+    required_collectibles: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], index: int) -> "LevelPlan":
+        """
+        Build a plan from LLM JSON (camelCase keys, everything optional).
+
+        Numbers are clamped into the accepted ranges.
+
+        Raises:
+            ValueError: If the entry is not an object or a field has the
+                wrong type (e.g. "difficulty": "hard")
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"level plan {index + 1} is not an object")
+        enemy_types = data.get("enemyTypes") or ["slime"]
+        if not isinstance(enemy_types, list) or not all(isinstance(e, str) for e in enemy_types):
+            raise ValueError(f"level plan {index + 1}: enemyTypes must be a list of strings")
+        return cls(
+            name=_text(data, "name", f"Level {index + 1}"),
+            theme=_text(data, "theme", THEMES[index % len(THEMES)]),
+            difficulty=_number(data, "difficulty", index + 1, DIFFICULTY_RANGE),
+            width=_number(data, "width", DEFAULT_WIDTH, WIDTH_RANGE),
+            height=_number(data, "height", DEFAULT_HEIGHT, HEIGHT_RANGE),
+            enemy_types=enemy_types,
+            collectible_type=_text(data, "collectibleType", "coin"),
+            required_collectibles=_number(data, "requiredCollectibles", 0, REQUIRED_COLLECTIBLES_RANGE),
+        )
+
+
+def _number(data: Dict[str, Any], key: str, default: int, bounds: Tuple[int, int]) -> int:
+    """Integer field clamped into bounds (ValueError if not a number)."""
+    value = original = data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f"{key} must be a number, got {original!r}")
+    low, high = bounds
+    return int(max(low, min(high, value)))
+
+
+def _text(data: Dict[str, Any], key: str, default: str) -> str:
+    """String field (ValueError if present but not a string)."""
+    value = data.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string, got {value!r}")
+    return value
+
+
+def default_plan(game_concept: Dict[str, Any], number_of_levels: int) -> List[LevelPlan]:
+    """Deterministic plan from the concept alone (no LLM)."""
+    concept = game_concept.get("concept", {})
+    curve = concept.get("difficultyCurve", {}).get("type", "gradual")
+    end = CURVE_END_DIFFICULTY.get(curve, 8)
+    plans = []
+    for index in range(number_of_levels):
+        progress = index / max(1, number_of_levels - 1)
+        difficulty = round(1 + (end - 1) * progress)
+        plans.append(LevelPlan(
+            name=f"Level {index + 1}",
+            theme=THEMES[index % len(THEMES)],
+            difficulty=difficulty,
+            width=DEFAULT_WIDTH + 250 * difficulty,
+            required_collectibles=difficulty // 4,
+        ))
+    return plans
+
+
+def complete_plan(
+    game_concept: Dict[str, Any],
+    plans: List[Optional[LevelPlan]],
+) -> List[LevelPlan]:
+    """
+    Fill missing (None) plan entries from default_plan().
+
+    Filled difficulties are interpolated between the neighbouring planned
+    entries, or from the last planned entry toward the curve's end (never
+    below it), so a partial LLM plan followed by defaults stays monotonic.
+    """
+    concept = game_concept.get("concept", {})
+    curve = concept.get("difficultyCurve", {}).get("type", "gradual")
+    end = CURVE_END_DIFFICULTY.get(curve, 8)
+    defaults = default_plan(game_concept, len(plans))
+
+    planned = [(index, plan.difficulty) for index, plan in enumerate(plans) if plan is not None]
+    completed: List[LevelPlan] = []
+    for index, plan in enumerate(plans):
+        if plan is None:
+            before = [entry for entry in planned if entry[0] < index]
+            after = [entry for entry in planned if entry[0] > index]
+            if before:
+                # Interpolate toward the next planned entry, or the curve's end
+                start, low = before[-1]
+                stop, high = after[0] if after else (len(plans) - 1, max(end, low))
+                difficulty = round(low + (high - low) * (index - start) / (stop - start))
+            else:
+                difficulty = defaults[index].difficulty
+                if after:
+                    difficulty = min(difficulty, after[0][1])
+            plan = LevelPlan(
+                name=defaults[index].name,
+                theme=defaults[index].theme,
+                difficulty=difficulty,
+                width=DEFAULT_WIDTH + 250 * difficulty,
+                required_collectibles=difficulty // 4,
+            )
+        completed.append(plan)
+    return completed
+
+
+def generate_levels(
+    game_concept: Dict[str, Any],
+    plans: List[LevelPlan],
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Generate levels for a plan.
+
+    Abilities without an unlockCondition are available from level 1; each
+    later level introduces one gated ability.
+
+    Args:
+        game_concept: Output from Concept Designer
+        plans: One LevelPlan per level
+        seed: Base seed (level i uses sub-seeds "seed:i:attempt")
+
+    Returns:
+        Levels data in the LLM output schema
+    """
+    per_level = level_abilities(game_concept, len(plans))
+    genre = game_concept.get("concept", {}).get("genre")
+    levels = [
+        generate_level(
+            plan, abilities, seed=seed, index=index,
+            difficulty_band=DIFFICULTY_BAND, genre=genre,
+        )
+        for index, (plan, abilities) in enumerate(zip(plans, per_level))
+    ]
+    return assemble_levels(game_concept, levels, per_level)
+
+
+def level_abilities(game_concept: Dict[str, Any], number_of_levels: int) -> List[FrozenSet[str]]:
+    """Abilities available in each level (gated ones unlock one per level)."""
+    concept = game_concept.get("concept", {})
+    gated: List[str] = []
+    for ability in concept.get("playerAbilities", []):
+        if ability.get("unlockCondition"):
+            single = abilities_from_concept({"concept": {"playerAbilities": [ability]}})
+            gated.extend(sorted(single - {"jump"}))
+    available = set(abilities_from_concept(game_concept)) - set(gated)
+
+    per_level = []
+    for index in range(number_of_levels):
+        if index > 0 and gated:
+            available.add(gated.pop(0))
+        per_level.append(frozenset(available))
+    return per_level
+
+
+def assemble_levels(
+    game_concept: Dict[str, Any],
+    levels: List[Dict[str, Any]],
+    per_level: List[FrozenSet[str]],
+) -> Dict[str, Any]:
+    """Wrap generated levels in the LLM output schema (sets mechanics.introduced)."""
+    seen: Set[str] = set()
+    for level, available in zip(levels, per_level):
+        level["mechanics"]["introduced"] = sorted(available - seen)
+        seen |= available
+
+    concept = game_concept.get("concept", {})
+    total_minutes = sum(_minutes(level)[1] for level in levels)
+    return {
+        "levels": levels,
+        "difficultyProgression": {
+            "curve": concept.get("difficultyCurve", {}).get("type", "gradual"),
+            "description": "Procedurally generated: difficulty "
+                           + " → ".join(str(level["difficulty"]) for level in levels),
+        },
+        "totalEstimatedPlaytime": total_minutes,
+    }
+
+
+def generate_level(
+    plan: LevelPlan,
+    abilities: FrozenSet[str],
+    seed: int = 0,
+    index: int = 0,
+    difficulty_band: Optional[float] = None,
+    genre: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Generate one level that passes the geometry and reachability checks.
+
+    With difficulty_band, attempts continue until the computed difficulty
+    (for genre) is within the band of plan.difficulty; the closest valid
+    attempt is returned if none is.
+
+    Raises:
+        RuntimeError: If no valid layout is found in MAX_ATTEMPTS
+    """
+    closest: Optional[Tuple[float, Dict[str, Any]]] = None
+    for attempt in range(MAX_ATTEMPTS):
+        rng = random.Random(f"{seed}:{index}:{attempt}")
+        builder = _LayoutBuilder(plan, abilities, rng)
+        columns = builder.build()
+
+        if validate_layout(columns):
+            continue
+        reach = analyze_level(columns, abilities)
+        if not reach.goal_reachable or reach.unreachable_required:
+            continue
+
+        required = sorted(builder.used_abilities | {"jump"})
+        level = {
+            "id": f"level_{index + 1}",
+            "name": plan.name,
+            "difficulty": plan.difficulty,
+            "theme": plan.theme,
+            "layout": columns.to_json(),
+            "mechanics": {
+                "introduced": [],
+                "required": required,
+            },
+            "estimatedCompletionTime": "",
+            "skillRequirements": required,
+            "generation": {
+                "seed": seed,
+                "attempt": attempt,
+                "chunks": builder.chunks,
+            },
+        }
+        low, high = _minutes(level)
+        level["estimatedCompletionTime"] = f"{low}-{high} minutes"
+        if difficulty_band is None:
+            return level
+
+        error = abs(estimate_difficulty(columns, abilities, genre).score - plan.difficulty)
+        if error <= difficulty_band:
+            return level
+        if closest is None or error < closest[0]:
+            closest = (error, level)
+
+    if closest is not None:
+        return closest[1]
+    raise RuntimeError(
+        f"No valid layout for '{plan.name}' after {MAX_ATTEMPTS} attempts "
+        f"(difficulty {plan.difficulty}, abilities {sorted(abilities)})"
+    )
+
+
+class _LayoutBuilder:
+    """Walks a cursor left to right, appending chunks."""
+
+    def __init__(self, plan: LevelPlan, abilities: FrozenSet[str], rng: random.Random):
+        self.plan = plan
+        self.abilities = abilities
+        self.rng = rng
+        self.jump = jump_envelope(frozenset({"jump"}))
+        # Tightness: fraction of the maximum jump a gap may use
+        self.tightness = min(0.9, 0.35 + 0.055 * plan.difficulty)
+
+        self.x = 0.0
+        self.y = plan.height - 100.0  # top of the platform the player stands on
+        self.min_y = plan.height * 0.35
+        self.max_y = plan.height - 64.0
+
+        self.layout = ColumnarLayout.from_json({
+            "width": plan.width,
+            "height": plan.height,
+            "platforms": [],
+            "enemies": [],
+            "collectibles": [],
+            "goal": None,
+        })
+        self.chunks: List[str] = []
+        self.used_abilities: Set[str] = set()
+
+    def build(self) -> ColumnarLayout:
+        self._platform(0, self.y, 320, "ground")
+        self.x = 320
+        self.chunks.append("runway")
+
+        finish_width = 320
+        while self.x < self.plan.width - finish_width - 200:
+            name = self._pick_chunk()
+            getattr(self, f"_chunk_{name}")()
+            self.chunks.append(name)
+
+        # Finish: a wide landing with the goal at its far end
+        gap = self._gap_for(0)
+        self.x += gap
+        self._platform(self.x, self.y, finish_width, "ground")
+        goal = {"x": round(self.x + finish_width - 64), "y": round(self.y)}
+        self.x += finish_width
+        self.chunks.append("finish")
+
+        self._mark_required()
+        self.layout.set("width", round(max(self.plan.width, self.x + 64)))
+        self.layout.set("goal", goal)
+        return self.layout
+
+    # ------------------------------------------------------------------
+    # Grammar
+    # ------------------------------------------------------------------
+
+    def _pick_chunk(self) -> str:
+        t = (self.plan.difficulty - 1) / 9
+        names, weights = [], []
+        for name, (easy, hard) in CHUNK_WEIGHTS.items():
+            needs = CHUNK_ABILITIES.get(name)
+            if needs and not any(ability in self.abilities for ability in needs):
+                continue
+            names.append(name)
+            weights.append(easy + (hard - easy) * t)
+        return self.rng.choices(names, weights)[0]
+
+    # ------------------------------------------------------------------
+    # Chunks
+    # ------------------------------------------------------------------
+
+    def _chunk_flat(self):
+        width = self.rng.randint(200, 400)
+        self._platform(self.x, self.y, width, "ground")
+        self._coin_row(self.x + 40, self.y - 48, width - 80)
+        self.x += width
+
+    def _chunk_gap(self):
+        rise = self._rise()
+        self.x += self._gap_for(rise)
+        self.y -= rise
+        width = self.rng.randint(120, 220)
+        self._platform(self.x, self.y, width, "floating")
+        self.x += width
+
+    def _chunk_stairs_up(self):
+        for _ in range(self.rng.randint(2, 4)):
+            rise = min(self.jump.max_rise * self.tightness, self.y - self.min_y)
+            rise = max(0.0, rise * self.rng.uniform(0.6, 1.0))
+            self.x += self._gap_for(rise) * 0.5
+            self.y -= rise
+            width = self.rng.randint(100, 160)
+            self._platform(self.x, self.y, width, "floating")
+            self.x += width
+
+    def _chunk_stairs_down(self):
+        for _ in range(self.rng.randint(2, 3)):
+            drop = min(self.rng.uniform(60, 140), self.max_y - self.y)
+            self.x += self._gap_for(-drop) * 0.6
+            self.y += drop
+            width = self.rng.randint(100, 180)
+            self._platform(self.x, self.y, width, "floating")
+            self.x += width
+
+    def _chunk_floating_run(self):
+        for _ in range(self.rng.randint(3, 5)):
+            self.x += self._gap_for(0)
+            width = self.rng.randint(64, 120)
+            self._platform(self.x, self.y, width, "floating")
+            self._collectible(self.x + width / 2 - COLLECTIBLE_SIZE / 2, self.y - 64)
+            self.x += width
+
+    def _chunk_enemy_patrol(self):
+        width = self.rng.randint(280, 460)
+        self._platform(self.x, self.y, width, "ground")
+        chase_chance = self.plan.difficulty / 12
+        behavior = "chase" if self.rng.random() < chase_chance else "patrol"
+        self.layout.add("enemies", {
+            "x": round(self.x + width / 2),
+            "y": round(self.y - ENEMY_SIZE),
+            "type": self.rng.choice(self.plan.enemy_types),
+            "behavior": behavior,
+            "patrolRange": round(width / 2 - ENEMY_SIZE),
+        })
+        self._coin_row(self.x + 32, self.y - 96, width - 64)
+        self.x += width
+
+    def _chunk_tower(self):
+        # A block taller than one jump: needs a wall jump or a double jump
+        height = min(self.jump.max_rise + self.rng.uniform(30, 80), self.y - self.min_y)
+        if height <= self.jump.max_rise:
+            return self._chunk_flat()
+        self.x += self.rng.randint(48, 96)
+        top = self.y - height
+        self._platform(self.x, top, 96, "ground", height=height)
+        self._collectible(self.x + 40, top - 48)
+        self.used_abilities.add("wall_jump" if "wall_jump" in self.abilities else "double_jump")
+        self.x += 96
+        self.y = top
+
+    def _chunk_dash_gap(self):
+        dash = jump_envelope(frozenset({"jump", "dash"}))
+        plain = self._max_gap(self.jump, 0)
+        longest = self._max_gap(dash, 0)
+        self.x += plain + (longest - plain) * self.tightness * self.rng.uniform(0.8, 1.0)
+        width = self.rng.randint(140, 220)
+        self._platform(self.x, self.y, width, "floating")
+        self.used_abilities.add("dash")
+        self.x += width
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _rise(self) -> float:
+        """Random height change (positive = up) within the level band."""
+        rise = self.rng.uniform(-0.6, 1.0) * self.jump.max_rise * self.tightness
+        return max(self.y - self.max_y, min(rise, self.y - self.min_y))
+
+    def _gap_for(self, rise: float) -> float:
+        """Gap width for a jump that climbs `rise` pixels, scaled by tightness."""
+        longest = self._max_gap(self.jump, rise)
+        return max(32.0, longest * self.tightness * self.rng.uniform(0.75, 1.0))
+
+    @staticmethod
+    def _max_gap(envelope, rise: float) -> float:
+        """Widest horizontal gap that still lands `rise` pixels higher."""
+        longest = 0.0
+        for bucket, height in enumerate(envelope.heights):
+            if height < rise:
+                break
+            longest = bucket * envelope.step
+        return longest
+
+    def _platform(self, x: float, y: float, width: float, kind: str, height: float = PLATFORM_HEIGHT):
+        self.layout.add("platforms", {
+            "x": round(x),
+            "y": round(y),
+            "width": round(width),
+            "height": round(height),
+            "type": kind,
+        })
+
+    def _collectible(self, x: float, y: float):
+        self.layout.add("collectibles", {
+            "x": round(x),
+            "y": round(y),
+            "type": self.plan.collectible_type,
+            "value": 1,
+            "required": False,
+        })
+
+    def _coin_row(self, x: float, y: float, width: float):
+        if self.rng.random() < 0.5:
+            return
+        for i in range(max(1, int(width // 64))):
+            self._collectible(x + i * 64, y)
+
+    def _mark_required(self):
+        """Mark collectibles spread evenly along the level as required."""
+        collectibles = self.layout.table("collectibles")
+        count = min(self.plan.required_collectibles, len(collectibles))
+        if count <= 0:
+            return
+        step = len(collectibles) / count
+        for i in range(count):
+            collectibles.set_flag(int((i + 0.5) * step), "required", True)
+
+
+def _minutes(level: Dict[str, Any]) -> tuple:
+    """Rough completion time range in minutes from width and difficulty."""
+    width = level["layout"].get("width", DEFAULT_WIDTH)
+    base = width / 1000 * (0.5 + level.get("difficulty", 1) / 10)
+    return max(1, round(base)), max(2, round(base * 1.5))
@@ -0,0 +1,305 @@
+"""
+Level Reachability - Playability check for platformer layouts
+
+Builds a graph of platforms connected by jumps the player can actually
+make with the abilities in concept.playerAbilities, then runs a BFS from
+the spawn platform to find out whether the goal and every required
+collectible can be reached.
+
+Jump arcs are simulated once per ability set and reduced to an envelope:
+for every horizontal distance, the highest rise the player can land on.
+Edges are then a table lookup per candidate pair, and candidates come from
+a SpatialGrid query, so graphs with hundreds of platforms build in
+milliseconds.
+
+Simplifications: arcs ignore ceilings (platforms are treated as one-way),
+and wall jumps let the player climb any platform whose side face the arc
+can reach.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from design_team.level_designer.columnar import ColumnarLayout, as_columnar
+from design_team.level_designer.geometry import SpatialGrid, layout_bounds
+
+
+# Player physics (px, seconds; y grows downward in layouts, upward here)
+PHYSICS = {
+    "gravity": 2000.0,
+    "jump_velocity": 700.0,         # ~122px jump
+    "double_jump_velocity": 600.0,  # +90px second jump
+    "run_speed": 300.0,
+    "max_fall_speed": 900.0,
+    "dash_speed": 900.0,
+    "dash_duration": 0.15,          # ~135px, gravity suspended
+    "player_height": 48.0,
+}
+
+SIM_DT = 1 / 120
+ENVELOPE_STEP = 4        # px per envelope bucket
+TIMING_STEP = 0.05       # s between simulated double-jump/dash timings
+MAX_DROP = 2000.0        # px below take-off before a simulation stops
+
+KNOWN_ABILITIES = ("jump", "double_jump", "wall_jump", "dash")
+
+# Score penalties applied by the level designer
+UNREACHABLE_GOAL_PENALTY = 15
+UNREACHABLE_REQUIRED_PENALTY = 10
+
+
+@dataclass
+class JumpEnvelope:
+    """Highest reachable rise per horizontal distance bucket."""
+
+    abilities: FrozenSet[str]
+    heights: List[float]
+    step: int = ENVELOPE_STEP
+
+    @property
+    def max_distance(self) -> float:
+        return len(self.heights) * self.step
+
+    @property
+    def max_rise(self) -> float:
+        return self.heights[0] if self.heights else 0.0
+
+    def max_height(self, dx: float) -> Optional[float]:
+        """Highest rise reachable at horizontal distance dx (None if too far)."""
+        bucket = int(dx // self.step)
+        if bucket >= len(self.heights):
+            return None
+        return self.heights[bucket]
+
+
+@dataclass
+class ReachabilityReport:
+    """Result of analyze_level()."""
+
+    abilities: List[str]
+    spawn_platform: Optional[int]
+    goal_reachable: bool
+    path: List[int] = field(default_factory=list)  # platform indices spawn -> goal
+    reachable_platforms: int = 0
+    total_platforms: int = 0
+    edges: int = 0
+    unreachable_required: List[str] = field(default_factory=list)
+    unreachable_optional: List[str] = field(default_factory=list)
+
+
+def abilities_from_concept(game_concept: Dict[str, Any]) -> FrozenSet[str]:
+    """Normalize concept.playerAbilities ids to KNOWN_ABILITIES (jump is implied)."""
+    abilities = {"jump"}
+    for ability in game_concept.get("concept", {}).get("playerAbilities", []):
+        key = f"{ability.get('id', '')} {ability.get('name', '')}".lower().replace("-", "_")
+        if "double" in key:
+            abilities.add("double_jump")
+        if "wall" in key:
+            abilities.add("wall_jump")
+        if "dash" in key:
+            abilities.add("dash")
+    return frozenset(abilities)
+
+
+@lru_cache(maxsize=None)
+def jump_envelope(abilities: FrozenSet[str]) -> JumpEnvelope:
+    """
+    Precompute the jump envelope for an ability set.
+
+    Simulates a full-speed jump plus every double-jump/dash timing on a
+    TIMING_STEP grid and keeps, per horizontal bucket, the highest point of
+    any arc. Full air control means anything reachable further away is also
+    reachable closer, so the envelope is made non-increasing in distance.
+    """
+    timings = [None]
+    t = 0.0
+    while t < 1.0:
+        timings.append(t)
+        t += TIMING_STEP
+
+    double_times = timings if "double_jump" in abilities else [None]
+    dash_times = timings if "dash" in abilities else [None]
+
+    raw: Dict[int, float] = {}
+    for double_at in double_times:
+        for dash_at in dash_times:
+            for x, y in _simulate_arc(double_at, dash_at):
+                bucket = int(x // ENVELOPE_STEP)
+                if y > raw.get(bucket, float("-inf")):
+                    raw[bucket] = y
+
+    heights = [float("-inf")] * (max(raw) + 1)
+    for bucket, y in raw.items():
+        heights[bucket] = y
+    for bucket in range(len(heights) - 2, -1, -1):
+        heights[bucket] = max(heights[bucket], heights[bucket + 1])
+
+    return JumpEnvelope(abilities=abilities, heights=heights)
+
+
+def analyze_level(
+    layout: Union[Dict[str, Any], ColumnarLayout],
+    abilities: FrozenSet[str] = frozenset({"jump"}),
+) -> ReachabilityReport:
+    """
+    Check that the goal and required collectibles are reachable from spawn.
+
+    Spawn is layout.spawn if present, otherwise the leftmost platform.
+
+    Args:
+        layout: Level layout (platforms, collectibles, goal, optional spawn)
+        abilities: Ability set (see abilities_from_concept)
+
+    Returns:
+        ReachabilityReport
+
+    Raises:
+        ValueError: If a platform has non-finite coordinates
+            (validate_layout() reports those as invalid_coordinates)
+    """
+    envelope = jump_envelope(frozenset(abilities))
+    columns = as_columnar(layout)
+    platforms = columns.table("platforms")
+    report = ReachabilityReport(
+        abilities=sorted(abilities),
+        spawn_platform=None,
+        goal_reachable=False,
+        total_platforms=len(platforms),
+    )
+    if not len(platforms):
+        return report
+
+    grid = SpatialGrid(cell_size=max(64, int(envelope.max_distance)), bounds=layout_bounds(columns))
+    grid.insert_many(*platforms.boxes())
+    boxes = grid.boxes
+
+    start = _spawn_platform(columns.get("spawn"), boxes)
+    report.spawn_platform = start
+
+    # BFS over the platform graph; edges are discovered lazily
+    parents: Dict[int, int] = {start: -1}
+    queue = deque([start])
+    reach_x, reach_up = envelope.max_distance, envelope.max_rise
+    while queue:
+        current = queue.popleft()
+        x0, top, x1, _ = boxes[current]
+        window = (x0 - reach_x, top - reach_up, x1 + reach_x, top + MAX_DROP)
+        for target in grid.query(window):
+            if target == current:
+                continue
+            if _can_land(boxes[current], boxes[target], envelope):
+                report.edges += 1
+                if target not in parents:
+                    parents[target] = current
+                    queue.append(target)
+
+    report.reachable_platforms = len(parents)
+
+    goal = columns.get("goal")
+    if goal:
+        reached_from = _point_reached_from(
+            (float(goal.get("x", 0)), float(goal.get("y", 0))), parents, grid, envelope
+        )
+        if reached_from is not None:
+            report.goal_reachable = True
+            node = reached_from
+            while node != -1:
+                report.path.append(node)
+                node = parents[node]
+            report.path.reverse()
+
+    collectibles = columns.table("collectibles")
+    required = collectibles.flag("required")
+    for index, point in enumerate(zip(collectibles.column("x"), collectibles.column("y"))):
+        if _point_reached_from(point, parents, grid, envelope) is None:
+            ref = f"collectibles[{index}]"
+            if required[index] == 2:
+                report.unreachable_required.append(ref)
+            else:
+                report.unreachable_optional.append(ref)
+
+    return report
+
+
+def _simulate_arc(double_at: Optional[float], dash_at: Optional[float]) -> List[Tuple[float, float]]:
+    """Trajectory points (dx, rise) for one jump with optional double jump/dash."""
+    g = PHYSICS["gravity"]
+    vy = PHYSICS["jump_velocity"]
+    x = y = t = 0.0
+    dash_until = None
+    points = [(0.0, 0.0)]
+
+    while y > -MAX_DROP:
+        if double_at is not None and t >= double_at:
+            vy = PHYSICS["double_jump_velocity"]
+            double_at = None
+        if dash_at is not None and t >= dash_at:
+            dash_until = t + PHYSICS["dash_duration"]
+            dash_at = None
+
+        if dash_until is not None and t < dash_until:
+            x += PHYSICS["dash_speed"] * SIM_DT
+            vy = 0.0
+        else:
+            x += PHYSICS["run_speed"] * SIM_DT
+            vy = max(vy - g * SIM_DT, -PHYSICS["max_fall_speed"])
+            y += vy * SIM_DT
+
+        t += SIM_DT
+        points.append((x, y))
+
+    return points
+
+
+def _can_land(source: Tuple, target: Tuple, envelope: JumpEnvelope) -> bool:
+    """True if the player can get from the top of source onto the top of target."""
+    dx = max(0.0, target[0] - source[2], source[0] - target[2])
+    height = envelope.max_height(dx)
+    if height is None:
+        return False
+    rise = source[1] - target[1]
+    if rise <= height:
+        return True
+    # Wall jumps climb the target's side face once the arc can touch it
+    if "wall_jump" in envelope.abilities and dx > 0:
+        return rise - (target[3] - target[1]) <= height
+    return False
+
+
+def _point_reached_from(
+    point: Tuple[float, float],
+    reachable: Dict[int, int],
+    grid: SpatialGrid,
+    envelope: JumpEnvelope,
+) -> Optional[int]:
+    """A reachable platform from which the player's body can touch `point`."""
+    px, py = point
+    reach = PHYSICS["player_height"]
+    window = (
+        px - envelope.max_distance, py - MAX_DROP,
+        px + envelope.max_distance, py + envelope.max_rise + reach,
+    )
+    for index in sorted(grid.query(window)):
+        if index not in reachable:
+            continue
+        x0, top, x1, _ = grid.boxes[index]
+        dx = max(0.0, x0 - px, px - x1)
+        height = envelope.max_height(dx)
+        if height is not None and top - py <= height + reach:
+            return index
+    return None
+
+
+def _spawn_platform(spawn: Optional[Dict[str, Any]], boxes: List[Tuple]) -> int:
+    """Platform the player starts on."""
+    if spawn:
+        sx, sy = float(spawn.get("x", 0)), float(spawn.get("y", 0))
+        below = [
+            (box[1], index) for index, box in enumerate(boxes)
+            if box[0] <= sx <= box[2] and box[1] >= sy
+        ]
+        if below:
+            return min(below)[1]
+    return min(range(len(boxes)), key=lambda i: (boxes[i][0], -boxes[i][1]))
@@ -0,0 +1,475 @@
+"""
+Level Tile Maps - Compile level layouts into tile maps for the ai-engine runtime
+
+The level designer emits layouts as lists of rectangles. Colliding a player
+against every platform each frame is wasted work for the engine, so this
+build stage bakes the static geometry ahead of time:
+
+1. Rasterize: each static platform marks the tiles whose centers it covers
+   (at least one tile per axis, so thin platforms never vanish).
+2. Run-length encode each tile row into (x, length, code) runs.
+3. Merge identical runs in consecutive rows into solid rectangles, which
+   are far fewer than tiles or platforms in typical layouts.
+4. Broadphase: bucket rectangles into fixed-size chunks, so the engine
+   only tests the rectangles in the player's chunk(s).
+
+"moving" and "breakable" platforms change at runtime and are kept as
+dynamic rectangles in pixel space instead of being baked into tiles.
+
+Binary format (little-endian; one file per project holds every level):
+
+    pack   := "CLVP" u16 version u16 level_count u32 offsets[level_count] level*
+    level  := "CLVL" u16 version u16 tile_size u16 chunk_tiles
+              u16 width u16 height            (in tiles)
+              i32 origin_x i32 origin_y       (px of tile (0, 0))
+              u8 palette_count (u8 len, utf-8 name)*
+              u32 row_offsets[height + 1]     (index into runs)
+              u32 run_count   (u16 x, u16 length, u8 code)*
+              u32 rect_count  (u16 x, u16 y, u16 w, u16 h, u8 code)*  (tiles)
+              u16 chunks_x u16 chunks_y
+              u32 chunk_offsets[chunks_x * chunks_y + 1]  (index into chunk_rects)
+              u32 chunk_rects[...]            (rect ids, chunks row-major)
+              u32 dynamic_count (i32 x, i32 y, u16 w, u16 h, u8 code)*  (px)
+              u8 has_goal i32 x i32 y u8 has_spawn i32 x i32 y
+
+Palette code 0 is empty space; codes 1.. index palette names (platform types).
+
+Run this module to compile a levels.json file and print stats:
+
+    python agents/design_team/level_designer/tilemap.py output/<project_id>/levels.json
+"""
+
+import re
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from design_team.level_designer.columnar import ColumnarLayout, as_columnar
+
+
+TILE_SIZE = 32          # px per tile
+CHUNK_TILES = 16        # tiles per broadphase chunk side (512 px)
+FORMAT_VERSION = 1
+
+LEVEL_MAGIC = b"CLVL"
+PACK_MAGIC = b"CLVP"
+
+# Platform types that move or break at runtime stay out of the tile grid
+DYNAMIC_TYPES = frozenset({"moving", "breakable"})
+DEFAULT_PLATFORM_TYPE = "ground"
+
+_RUN = struct.Struct("<HHB")
+_RECT = struct.Struct("<HHHHB")
+_DYNAMIC = struct.Struct("<iiHHB")
+_POINT = struct.Struct("<Bii")
+U16_MAX = 0xFFFF
+I32_MIN, I32_MAX = -2 ** 31, 2 ** 31 - 1
+_RUNS_PATTERN = re.compile(rb"([^\x00])\1*")
+
+Run = Tuple[int, int, int]                 # x, length, code
+Rect = Tuple[int, int, int, int, int]      # x, y, w, h, code (tiles)
+
+
+@dataclass
+class TileMap:
+    """Compiled static geometry of one level."""
+
+    tile_size: int
+    chunk_tiles: int
+    width: int                   # tiles
+    height: int                  # tiles
+    origin: Tuple[int, int]      # px of tile (0, 0)
+    palette: List[str]           # code - 1 -> platform type
+    rows: List[List[Run]]
+    rects: List[Rect]
+    chunks_x: int
+    chunks_y: int
+    chunk_offsets: array         # 'I', CSR offsets into chunk_rects
+    chunk_rects: array           # 'I', rect ids
+    dynamic: List[Tuple[int, int, int, int, int]] = field(default_factory=list)  # px
+    goal: Optional[Tuple[int, int]] = None
+    spawn: Optional[Tuple[int, int]] = None
+
+    def tile_at(self, tx: int, ty: int) -> int:
+        """Palette code of a tile (0 = empty)."""
+        if not (0 <= ty < self.height):
+            return 0
+        for x, length, code in self.rows[ty]:
+            if x <= tx < x + length:
+                return code
+            if x > tx:
+                break
+        return 0
+
+    def chunk_rect_ids(self, cx: int, cy: int) -> array:
+        """Rectangle ids overlapping chunk (cx, cy)."""
+        if not (0 <= cx < self.chunks_x and 0 <= cy < self.chunks_y):
+            return array("I")
+        index = cy * self.chunks_x + cx
+        return self.chunk_rects[self.chunk_offsets[index]:self.chunk_offsets[index + 1]]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tiles": self.width * self.height,
+            "solid_tiles": sum(length for row in self.rows for _, length, _ in row),
+            "runs": sum(len(row) for row in self.rows),
+            "rects": len(self.rects),
+            "chunks": self.chunks_x * self.chunks_y,
+            "dynamic": len(self.dynamic),
+        }
+
+    # ------------------------------------------------------------------
+    # Binary encoding
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(LEVEL_MAGIC)
+        out += struct.pack(
+            "<HHHHHii", FORMAT_VERSION, self.tile_size, self.chunk_tiles,
+            self.width, self.height, *self.origin,
+        )
+
+        out.append(len(self.palette))
+        for name in self.palette:
+            encoded = name.encode("utf-8")[:255]
+            out.append(len(encoded))
+            out += encoded
+
+        row_offsets = array("I", [0])
+        for row in self.rows:
+            row_offsets.append(row_offsets[-1] + len(row))
+        out += _le(row_offsets)
+        out += struct.pack("<I", row_offsets[-1])
+        for row in self.rows:
+            for run in row:
+                out += _RUN.pack(*run)
+
+        out += struct.pack("<I", len(self.rects))
+        for rect in self.rects:
+            out += _RECT.pack(*rect)
+
+        out += struct.pack("<HH", self.chunks_x, self.chunks_y)
+        out += _le(self.chunk_offsets)
+        out += _le(self.chunk_rects)
+
+        out += struct.pack("<I", len(self.dynamic))
+        for rect in self.dynamic:
+            out += _DYNAMIC.pack(*rect)
+
+        for point in (self.goal, self.spawn):
+            out += _POINT.pack(1, *point) if point else _POINT.pack(0, 0, 0)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TileMap":
+        reader = _Reader(data)
+        if reader.take(4) != LEVEL_MAGIC:
+            raise ValueError("Not a compiled level (bad magic)")
+        version, tile_size, chunk_tiles, width, height, origin_x, origin_y = reader.unpack("<HHHHHii")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported level format version: {version}")
+
+        palette = []
+        for _ in range(reader.unpack("<B")[0]):
+            palette.append(reader.take(reader.unpack("<B")[0]).decode("utf-8"))
+
+        row_offsets = reader.array("I", height + 1)
+        reader.unpack("<I")  # run count (== row_offsets[-1])
+        runs = reader.records(_RUN, row_offsets[-1])
+        rows = [runs[row_offsets[i]:row_offsets[i + 1]] for i in range(height)]
+
+        rects = reader.records(_RECT, reader.unpack("<I")[0])
+
+        chunks_x, chunks_y = reader.unpack("<HH")
+        chunk_offsets = reader.array("I", chunks_x * chunks_y + 1)
+        chunk_rects = reader.array("I", chunk_offsets[-1])
+
+        dynamic = reader.records(_DYNAMIC, reader.unpack("<I")[0])
+        points = []
+        for _ in range(2):
+            present, x, y = reader.unpack(_POINT)
+            points.append((x, y) if present else None)
+
+        return cls(
+            tile_size=tile_size,
+            chunk_tiles=chunk_tiles,
+            width=width,
+            height=height,
+            origin=(origin_x, origin_y),
+            palette=palette,
+            rows=rows,
+            rects=rects,
+            chunks_x=chunks_x,
+            chunks_y=chunks_y,
+            chunk_offsets=chunk_offsets,
+            chunk_rects=chunk_rects,
+            dynamic=dynamic,
+            goal=points[0],
+            spawn=points[1],
+        )
+
+
+def compile_layout(
+    layout: Union[Dict[str, Any], ColumnarLayout],
+    tile_size: int = TILE_SIZE,
+    chunk_tiles: int = CHUNK_TILES,
+) -> TileMap:
+    """
+    Compile one level layout into a TileMap.
+
+    The grid covers layout.width x layout.height when given, grown to fit
+    every static platform.
+
+    Args:
+        layout: Level layout (platforms, goal, optional spawn/width/height)
+        tile_size: Tile size in pixels
+        chunk_tiles: Broadphase chunk size in tiles
+
+    Returns:
+        TileMap
+    """
+    columns = as_columnar(layout)
+    platforms = columns.table("platforms")
+    x0, y0, x1, y1 = platforms.boxes()
+    strings = columns.strings.values
+    types = [
+        strings[code] if code else DEFAULT_PLATFORM_TYPE
+        for code in platforms.codes("type")
+    ]
+
+    static = [i for i, kind in enumerate(types) if kind not in DYNAMIC_TYPES]
+    origin_x = int(min([0.0] + [x0[i] for i in static]) // tile_size) * tile_size
+    origin_y = int(min([0.0] + [y0[i] for i in static]) // tile_size) * tile_size
+    right = max([float(columns.get("width") or 0)] + [x1[i] for i in static])
+    bottom = max([float(columns.get("height") or 0)] + [y1[i] for i in static])
+    width = max(1, -int(-(right - origin_x) // tile_size))
+    height = max(1, -int(-(bottom - origin_y) // tile_size))
+    if width > U16_MAX or height > U16_MAX:
+        raise ValueError(f"Level too large for {tile_size}px tiles: {width}x{height}")
+
+    # 1. Rasterize static platforms (palette codes start at 1)
+    palette: List[str] = []
+    codes: Dict[str, int] = {}
+    grid: Dict[int, bytearray] = {}
+    for i in static:
+        kind = types[i]
+        code = codes.get(kind)
+        if code is None:
+            if len(palette) == 255:
+                raise ValueError("More than 255 platform types")
+            palette.append(kind)
+            code = codes[kind] = len(palette)
+        tx0, tx1 = _tile_span(x0[i] - origin_x, x1[i] - origin_x, tile_size, width)
+        ty0, ty1 = _tile_span(y0[i] - origin_y, y1[i] - origin_y, tile_size, height)
+        fill = bytes((code,)) * (tx1 - tx0)
+        for ty in range(ty0, ty1):
+            row = grid.get(ty)
+            if row is None:
+                row = grid[ty] = bytearray(width)
+            row[tx0:tx1] = fill
+
+    # 2. Run-length encode rows
+    rows: List[List[Run]] = [[] for _ in range(height)]
+    for ty, row in grid.items():
+        rows[ty] = [
+            (match.start(), match.end() - match.start(), row[match.start()])
+            for match in _RUNS_PATTERN.finditer(row)
+        ]
+
+    # 3. Merge identical runs in consecutive rows into rectangles
+    rects: List[List[int]] = []
+    open_rects: Dict[Run, int] = {}
+    for ty, row in enumerate(rows):
+        still_open = {}
+        for run in row:
+            index = open_rects.get(run)
+            if index is None:
+                index = len(rects)
+                rects.append([run[0], ty, run[1], 1, run[2]])
+            else:
+                rects[index][3] += 1
+            still_open[run] = index
+        open_rects = still_open
+
+    # 4. Broadphase chunks (CSR: rect ids grouped by chunk, row-major)
+    chunks_x = -(-width // chunk_tiles)
+    chunks_y = -(-height // chunk_tiles)
+    buckets: List[List[int]] = [[] for _ in range(chunks_x * chunks_y)]
+    for index, (rx, ry, rw, rh, _) in enumerate(rects):
+        for cy in range(ry // chunk_tiles, (ry + rh - 1) // chunk_tiles + 1):
+            for cx in range(rx // chunk_tiles, (rx + rw - 1) // chunk_tiles + 1):
+                buckets[cy * chunks_x + cx].append(index)
+    chunk_offsets = array("I", [0])
+    chunk_rects = array("I")
+    for bucket in buckets:
+        chunk_rects.extend(bucket)
+        chunk_offsets.append(len(chunk_rects))
+
+    dynamic_kinds = sorted({types[i] for i in range(len(types)) if types[i] in DYNAMIC_TYPES})
+    for kind in dynamic_kinds:
+        if kind not in codes:
+            palette.append(kind)
+            codes[kind] = len(palette)
+    dynamic = [
+        _dynamic_rect(x0[i], y0[i], x1[i], y1[i], codes[types[i]])
+        for i in range(len(types)) if types[i] in DYNAMIC_TYPES
+    ]
+
+    return TileMap(
+        tile_size=tile_size,
+        chunk_tiles=chunk_tiles,
+        width=width,
+        height=height,
+        origin=(origin_x, origin_y),
+        palette=palette,
+        rows=rows,
+        rects=[tuple(rect) for rect in rects],
+        chunks_x=chunks_x,
+        chunks_y=chunks_y,
+        chunk_offsets=chunk_offsets,
+        chunk_rects=chunk_rects,
+        dynamic=dynamic,
+        goal=_point(columns.get("goal")),
+        spawn=_point(columns.get("spawn")),
+    )
+
+
+def compile_levels(levels_data: Dict[str, Any], **options) -> List[TileMap]:
+    """
+    Compile every level in a LevelDesigner output.
+
+    Raises:
+        ValueError: If a level cannot be compiled (names the level)
+    """
+    tilemaps = []
+    for index, level in enumerate(levels_data.get("levels", [])):
+        try:
+            tilemaps.append(compile_layout(level.get("layout") or {}, **options))
+        except (ValueError, OverflowError, struct.error) as e:
+            raise ValueError(f"Level {index + 1} ({level.get('name', 'unnamed')}): {e}") from e
+    return tilemaps
+
+
+def pack_levels(tilemaps: List[TileMap]) -> bytes:
+    """Concatenate compiled levels into one pack with an offset table."""
+    blobs = [tilemap.to_bytes() for tilemap in tilemaps]
+    header = PACK_MAGIC + struct.pack("<HH", FORMAT_VERSION, len(blobs))
+    offset = len(header) + 4 * len(blobs)
+    offsets = array("I")
+    for blob in blobs:
+        offsets.append(offset)
+        offset += len(blob)
+    return header + _le(offsets) + b"".join(blobs)
+
+
+def unpack_levels(data: bytes) -> List[TileMap]:
+    """Inverse of pack_levels()."""
+    reader = _Reader(data)
+    if reader.take(4) != PACK_MAGIC:
+        raise ValueError("Not a level pack (bad magic)")
+    version, count = reader.unpack("<HH")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported level pack version: {version}")
+    offsets = list(reader.array("I", count)) + [len(data)]
+    return [TileMap.from_bytes(data[offsets[i]:offsets[i + 1]]) for i in range(count)]
+
+
+def write_level_pack(levels_data: Dict[str, Any], path: Union[str, Path]) -> List[TileMap]:
+    """Compile all levels and write the binary pack to path."""
+    tilemaps = compile_levels(levels_data)
+    Path(path).write_bytes(pack_levels(tilemaps))
+    return tilemaps
+
+
+def _tile_span(start: float, end: float, tile_size: int, limit: int) -> Tuple[int, int]:
+    """Tiles whose centers lie in [start, end); at least the tile under the middle."""
+    first = int(-(-(start - tile_size / 2) // tile_size))
+    last = int(-(-(end - tile_size / 2) // tile_size))
+    if last <= first:
+        first = int(((start + end) / 2) // tile_size)
+        last = first + 1
+    return max(0, first), min(limit, last)
+
+
+def _dynamic_rect(x0: float, y0: float, x1: float, y1: float, code: int) -> Tuple[int, int, int, int, int]:
+    """Pixel rect of a dynamic platform (negative sizes flipped, fields clamped)."""
+    left, right = sorted((x0, x1))
+    top, bottom = sorted((y0, y1))
+    return (
+        _i32(left),
+        _i32(top),
+        min(round(right - left), U16_MAX),
+        min(round(bottom - top), U16_MAX),
+        code,
+    )
+
+
+def _point(value: Any) -> Optional[Tuple[int, int]]:
+    if not isinstance(value, dict):
+        return None
+    return _i32(float(value.get("x", 0))), _i32(float(value.get("y", 0)))
+
+
+def _i32(value: float) -> int:
+    """Round a pixel coordinate into the i32 range of the format."""
+    return round(max(I32_MIN, min(I32_MAX, value)))
+
+
+def _le(values: array) -> bytes:
+    """Array bytes in little-endian order."""
+    if sys.byteorder == "little":
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+class _Reader:
+    """Sequential little-endian reader over bytes."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, size: int) -> bytes:
+        chunk = self.data[self.pos:self.pos + size]
+        if len(chunk) != size:
+            raise ValueError("Truncated level data")
+        self.pos += size
+        return chunk
+
+    def unpack(self, layout: Union[str, struct.Struct]) -> Tuple:
+        if isinstance(layout, str):
+            layout = struct.Struct(layout)
+        return layout.unpack(self.take(layout.size))
+
+    def records(self, layout: struct.Struct, count: int) -> List[Tuple]:
+        return list(layout.iter_unpack(self.take(layout.size * count)))
+
+    def array(self, typecode: str, count: int) -> array:
+        values = array(typecode)
+        values.frombytes(self.take(values.itemsize * count))
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+
+if __name__ == "__main__":
+    import json
+
+    if len(sys.argv) < 2:
+        print("Usage: python tilemap.py <levels.json>")
+        sys.exit(1)
+
+    source = Path(sys.argv[1])
+    levels_data = json.loads(source.read_text())
+    target = source.with_suffix(".bin")
+    tilemaps = write_level_pack(levels_data, target)
+    for index, tilemap in enumerate(tilemaps, 1):
+        print(f"Level {index}: {tilemap.width}x{tilemap.height} tiles, {tilemap.stats()}")
+    print(f"Wrote {target} ({target.stat().st_size:,} bytes, JSON {source.stat().st_size:,} bytes)")
@@ -4,7 +4,6 @@ Narrative Designer Agent - Phase 1
 """
 
 import json
-import re
 from pathlib import Path
 from typing import Dict, Any
 
@@ -13,10 +12,22 @@ import sys
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from shared.errors import LLMError
 from shared.llm import LLMService
+from shared.json_extract import extract_json
+from shared.json_repair import JSONRepairer
+from shared.templates import PromptTemplate, TemplateLoader
+from shared.tracing import traced
+from shared.token_budget import Limit, Section, TokenBudget, Truncate
 from shared.event_bus import emit_event, EventType
 from shared.context import update_design
-from shared.constants import GEMINI_PRO_MODEL
+from shared.constants import GEMINI_PRO_MODEL, SCHEMA_ERROR_PENALTY
+from shared.schemas.design_schemas import NarrativeOutput, summarize_errors
+
+# Prompt token budgets for the upstream designs
+CONCEPT_TOKEN_BUDGET = 120
+LEVELS_TOKEN_BUDGET = 300
+MAX_PROMPT_LEVELS = 20
 
 
 class NarrativeDesignerAgent:
@@ -29,16 +40,28 @@ class NarrativeDesignerAgent:
     """
 
     def __init__(self):
-        self.llm = LLMService(model=GEMINI_PRO_MODEL)
+        self.llm = LLMService(model=GEMINI_PRO_MODEL, agent="NarrativeDesignerAgent")
+        self.repairer = JSONRepairer(self.llm, NarrativeOutput, extract=self._extract_json)
         self.prompts_dir = Path(__file__).parent / "prompts"
-
-    def load_prompt(self, name: str) -> str:
-        """Load prompt template."""
-        path = self.prompts_dir / f"{name}.txt"
-        if not path.exists():
-            raise FileNotFoundError(f"Prompt not found: {path}")
-        return path.read_text(encoding="utf-8")
-
+        self.prompts = TemplateLoader(self.prompts_dir)
+        self.budget = TokenBudget([
+            Section("game_concept", CONCEPT_TOKEN_BUDGET, self._format_concept, steps=[
+                Truncate("concept.tagline", 120),
+                Truncate("concept.winCondition", 120),
+                Truncate("concept.*", 60),
+            ]),
+            Section("levels_summary", LEVELS_TOKEN_BUDGET, self._format_levels, steps=[
+                Truncate("levels[*].theme", 40),
+                Truncate("levels[*].name", 40),
+                Limit("levels", MAX_PROMPT_LEVELS),
+            ]),
+        ])
+
+    def load_prompt(self, name: str) -> PromptTemplate:
+        """Load compiled prompt template (cached until the file changes)."""
+        return self.prompts.get(name)
+
+    @traced("narrative.design")
     def design_narrative(
         self,
         game_concept: Dict[str, Any],
@@ -68,25 +91,37 @@ class NarrativeDesignerAgent:
             {"target_audience": target_audience},
         )
 
-        # Load and fill prompt template
-        prompt_template = self.load_prompt("narrative_design")
-
-        # Format concept and levels for prompt
-        concept_summary = self._format_concept(game_concept)
-        levels_summary = self._format_levels(levels_data)
+        # Format concept and levels for prompt, within their token budgets
+        sections = self.budget.fit({
+            "game_concept": game_concept,
+            "levels_summary": levels_data,
+        })
+        if any(section.saved for section in sections.values()):
+            print(f"✂️  Prompt budget: {TokenBudget.report(sections)}")
 
-        prompt = prompt_template.replace("{{ game_concept }}", concept_summary)
-        prompt = prompt.replace("{{ levels_summary }}", levels_summary)
-        prompt = prompt.replace("{{ target_audience }}", target_audience)
+        # Load and fill prompt template
+        template = self.load_prompt("narrative_design")
+        prompt = template.render(
+            TokenBudget.render(sections),
+            target_audience=target_audience,
+        )
+        prefix = template.prefix(game_concept=sections["game_concept"].text)
 
         print("⏳ Generating narrative with Gemini...\n")
 
-        # Generate narrative
-        response = self.llm.generate(prompt)
-
-        # Parse JSON
+        # Generate narrative and parse JSON
         try:
-            narrative_data = self._extract_json(response)
+            response = self.llm.generate(prompt, cache_prefix=prefix)
+            narrative_data = self.repairer.parse(response, prompt, cache_prefix=prefix)
+        except LLMError as e:
+            # No model output to parse: report why the call failed
+            print(f"❌ Gemini call failed ({e.kind}, {e.attempts} attempt(s)): {e}")
+            emit_event(
+                EventType.DESIGN_FAILED,
+                "NarrativeDesignerAgent",
+                e.to_json(),
+            )
+            raise
         except json.JSONDecodeError as e:
             print(f"❌ Failed to parse JSON: {e}")
             print(f"Raw response:\n{response}\n")
@@ -124,7 +159,20 @@ class NarrativeDesignerAgent:
         # Print LLM stats
         stats = self.llm.get_stats()
         print(f"\n💰 Cost: ${stats['estimated_cost_usd']:.4f}")
+        if stats["simulated_cost_usd"]:
+            print(f"   (mock calls, simulated: ${stats['simulated_cost_usd']:.4f})")
         print(f"📊 Tokens: {stats['total_tokens']:,}")
+        cache = stats["prefix_cache"]
+        if cache["hits"]:
+            input_tokens = cache["cached_input_tokens"] + cache["uncached_input_tokens"]
+            print(f"🗄️  Cached input: {cache['cached_input_tokens']:,} of {input_tokens:,} tokens")
+        repairs = stats["repairs"]
+        if repairs["fragment_calls"] or repairs["full_retries"]:
+            print(
+                f"🩹 Repair tokens: {repairs['fragment_tokens']:,} "
+                f"(full retries: {repairs['full_retry_tokens']:,}, "
+                f"avoided: ~{repairs['retry_tokens_avoided']:,})"
+            )
 
         return narrative_data
 
@@ -151,15 +199,10 @@ class NarrativeDesignerAgent:
         return "\n".join(lines)
 
     def _extract_json(self, text: str) -> Dict[str, Any]:
-        """Extract JSON from LLM response."""
-        json_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            json_str = text
-
-        return json.loads(json_str)
+        """Extract JSON from LLM response (fences, repairs, truncated output)."""
+        return extract_json(text, label="NarrativeDesignerAgent")
 
+    @traced("narrative.validate")
     def _validate_narrative(
         self, narrative_data: Dict[str, Any], game_concept: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -167,6 +210,12 @@ class NarrativeDesignerAgent:
         issues = []
         score = 100
 
+        # Check structure against the schema (all errors in one pass)
+        schema_errors = NarrativeOutput.validate(narrative_data)
+        if schema_errors:
+            issues.append(f"Schema: {summarize_errors(schema_errors)}")
+            score -= SCHEMA_ERROR_PENALTY
+
         # Check world setting
         world = narrative_data.get("worldSetting", {})
         if not world.get("name"):
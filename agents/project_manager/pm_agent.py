@@ -17,8 +17,12 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from shared.context import context_manager, get_context
 from shared.event_bus import event_bus, EventType
+from shared.metering import format_summary, meter
+from shared.tracing import tracer
 from design_team.concept_designer.agent import ConceptDesignerAgent
 from design_team.level_designer.agent import LevelDesignerAgent
+from design_team.level_designer.batch import DEFAULT_CANDIDATES
+from design_team.level_designer.tilemap import write_level_pack
 from design_team.narrative_designer.agent import NarrativeDesignerAgent
 
 
@@ -37,6 +41,10 @@ class ProjectManagerAgent:
         user_request: str,
         project_id: Optional[str] = None,
         number_of_levels: int = 3,
+        level_mode: str = "llm",
+        level_seed: int = 0,
+        level_candidates: int = DEFAULT_CANDIDATES,
+        llm_level_candidates: int = 0,
     ) -> Dict[str, Any]:
         """
         게임 생성 메인 워크플로우.
@@ -79,6 +87,10 @@ class ProjectManagerAgent:
             game_concept=concept,
             number_of_levels=number_of_levels,
             platform="web",
+            mode=level_mode,
+            seed=level_seed,
+            candidates=level_candidates,
+            llm_candidates=llm_level_candidates,
         )
 
         # Step 3: Run Narrative Designer (depends on concept + levels)
@@ -106,9 +118,32 @@ class ProjectManagerAgent:
         levels_path = output_dir / "levels.json"
         levels_path.write_text(json.dumps(levels, indent=2))
 
+        # Build stage: bake level geometry into tile maps for the engine
+        tilemaps_path = output_dir / "levels.bin"
+        try:
+            tilemaps = write_level_pack(levels, tilemaps_path)
+        except ValueError as e:
+            print(f"\n⚠️  Tile map compilation failed, skipping levels.bin: {e}")
+            tilemaps_path.unlink(missing_ok=True)   # don't leave an earlier run's pack
+            tilemaps = None
+        else:
+            rects = sum(len(tilemap.rects) for tilemap in tilemaps)
+            print(
+                f"\n🧱 Compiled {len(tilemaps)} tile maps ({rects} collision rects, "
+                f"{tilemaps_path.stat().st_size:,} bytes)"
+            )
+
         narrative_path = output_dir / "narrative.json"
         narrative_path.write_text(json.dumps(narrative, indent=2))
 
+        # Per-call cost/latency records of this project
+        calls = meter.for_project(project_id)
+        meter.export_jsonl(output_dir / "metering.jsonl", calls)
+
+        # Hot-path spans (CAISO_TRACE=1): Chrome trace + folded stacks
+        if tracer.enabled:
+            tracer.export(output_dir)
+
         # Quality Gate Check
         print(f"\n\n┌─────────────────────────────────────────────────────────┐")
         print(f"│  QUALITY GATE: Design Review                            │")
@@ -124,6 +159,11 @@ class ProjectManagerAgent:
         print(f"   ├─ project_context.json")
         print(f"   ├─ concept.json")
         print(f"   ├─ levels.json")
+        if tilemaps is not None:
+            print(f"   ├─ levels.bin")
+        print(f"   ├─ metering.jsonl")
+        if tracer.enabled:
+            print(f"   ├─ trace.json, trace.folded")
         print(f"   └─ narrative.json")
 
         # Event history
@@ -132,6 +172,11 @@ class ProjectManagerAgent:
         for event in events:
             print(f"   • {event.type.value} ({event.source_agent})")
 
+        # Time and spend per agent
+        print(f"\n⏱️  Model Calls ({len(calls)} calls):")
+        for line in format_summary(meter.summary("agent", calls)).splitlines():
+            print(f"   {line}")
+
         # Quality summary
         print(f"\n🎯 Quality Gate Results:")
         print(f"   Overall Score: {quality_report['overall_score']}/100")
@@ -7,10 +7,55 @@ import os
 # Vercel Proxy URLs (API keys는 Vercel에만 존재)
 VERCEL_PROXY_URL = os.environ.get("VERCEL_PROXY_URL", "https://caisogames2.vercel.app")
 
+# Fallback proxies (comma separated) next to the primary one; calls are
+# spread over all of them by latency (shared/endpoints.py)
+VERCEL_PROXY_FALLBACK_URLS = [
+    url.strip().rstrip("/")
+    for url in os.environ.get("VERCEL_PROXY_FALLBACK_URLS", "").split(",")
+    if url.strip()
+]
+VERCEL_PROXY_URLS = [VERCEL_PROXY_URL.rstrip("/")] + VERCEL_PROXY_FALLBACK_URLS
+
 # Vercel API Endpoints
 GEMINI_TEXT_ENDPOINT = f"{VERCEL_PROXY_URL}/api/gemini/generate"
 GEMINI_IMAGEN_ENDPOINT = f"{VERCEL_PROXY_URL}/api/gemini/imagen"
 GEMINI_VISION_ENDPOINT = f"{VERCEL_PROXY_URL}/api/gemini/vision"
+GEMINI_CACHE_ENDPOINT = f"{VERCEL_PROXY_URL}/api/gemini/cache"
+
+# Mock LLM responses unless MOCK_MODE=false (see .env.example)
+MOCK_MODE = os.environ.get("MOCK_MODE", "true").lower() != "false"
+
+# LLM transport (shared/transports.py): synthetic | live | replay | record.
+# Recorded fixtures live in LLM_FIXTURES_DIR; replays are "instant" or
+# keep the "original" recorded timing
+LLM_TRANSPORT = os.environ.get("CAISO_LLM_TRANSPORT") or ("synthetic" if MOCK_MODE else "live")
+LLM_FIXTURES_DIR = os.environ.get(
+    "CAISO_LLM_FIXTURES", os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "llm")
+)
+LLM_REPLAY_TIMING = os.environ.get("CAISO_REPLAY_TIMING", "instant")
+
+# Hedged requests (shared/hedging.py), off unless CAISO_LLM_HEDGE=1: a call
+# still running after the HEDGE_PERCENTILE latency of its endpoint gets a
+# duplicate, for at most HEDGE_BUDGET extra calls (fraction of all calls).
+# Imagen calls are never hedged (billed per image)
+LLM_HEDGING = os.environ.get("CAISO_LLM_HEDGE", "").lower() in ("1", "true", "yes")
+HEDGE_BUDGET = float(os.environ.get("CAISO_HEDGE_BUDGET", "0.05"))
+HEDGE_PERCENTILE = 0.9
+HEDGE_ENDPOINTS = ("generate", "vision")
+HEDGE_MIN_SAMPLES = 20          # latencies observed before the first hedge
+HEDGE_WINDOW = 200              # latest latencies the percentile is taken over
+HEDGE_MIN_DELAY_MS = 50.0
+
+# Proxy endpoint health (shared/endpoints.py): a circuit breaker opens after
+# consecutive failures (network errors, HTTP 5xx) and lets a trial call
+# through after the cooldown; idle and open endpoints are probed with a GET
+# (answered 405 without calling Gemini). Latency EWMA weight per call
+PROXY_CONNECT_TIMEOUT_SECONDS = 5
+PROXY_BREAKER_FAILURES = 3
+PROXY_BREAKER_COOLDOWN_SECONDS = 15
+PROXY_PROBE_INTERVAL_SECONDS = 10
+PROXY_PROBE_PATH = "/api/gemini/generate"
+PROXY_LATENCY_EWMA_ALPHA = 0.3
 
 # Default Models
 GEMINI_PRO_MODEL = "gemini-2.0-pro-exp"
@@ -21,6 +66,13 @@ IMAGEN_4_MODEL = "imagen-4.0-generate-001"
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 4000
 
+# Retries of retryable LLM failures (shared/errors.py): exponential backoff
+# from LLM_RETRY_BACKOFF_SECONDS; failures asking for a longer wait (an open
+# circuit) are not retried
+LLM_MAX_RETRIES = 2
+LLM_RETRY_BACKOFF_SECONDS = 1.0
+LLM_RETRY_MAX_WAIT_SECONDS = 5.0
+
 # Quality Thresholds
 DESIGN_QUALITY_THRESHOLD = 90
 ASSET_QUALITY_THRESHOLD = 90
@@ -35,7 +87,38 @@ QUALITY_THRESHOLDS = {
     "qa": QA_PASS_RATE_THRESHOLD
 }
 
+# Score penalty when LLM output does not match its design schema
+SCHEMA_ERROR_PENALTY = 10
+
+# JSON repair: fragments re-asked per response before merging them into
+# their parents, and full regenerations when no JSON can be extracted
+MAX_REPAIR_FRAGMENTS = 4
+MAX_FULL_RETRIES = 1
+
+# Semantic prompt cache: minimum cosine similarity to reuse an asset
+SEMANTIC_CACHE_THRESHOLD = 0.85
+
 # Cost Tracking
 IMAGEN_4_COST_PER_IMAGE = 0.04  # USD
-GEMINI_PRO_COST_PER_1M_TOKENS = 1.25  # USD
-GEMINI_FLASH_COST_PER_1M_TOKENS = 0.075  # USD
+GEMINI_PRO_COST_PER_1M_TOKENS = 1.25  # USD (input)
+GEMINI_FLASH_COST_PER_1M_TOKENS = 0.075  # USD (input)
+GEMINI_PRO_OUTPUT_COST_PER_1M_TOKENS = 5.00  # USD
+GEMINI_FLASH_OUTPUT_COST_PER_1M_TOKENS = 0.30  # USD
+CACHED_INPUT_COST_RATIO = 0.25  # cached input tokens bill at 25% of input
+VISION_TOKENS_PER_IMAGE = 258  # input tokens Gemini counts per image
+
+# Per-call metering log (JSONL, one CallRecord per line); unset = in memory only
+METERING_LOG_PATH = os.environ.get("CAISO_METERING_LOG")
+
+# Provider-side prefix caching: Gemini refuses to cache fewer input tokens
+# than the model's minimum, so shorter prefixes are sent inline. Registered
+# prefixes live for the TTL (re-registered after it expires); the proxy
+# (api/gemini/cache.js) takes the TTL from each request, this is its only source
+PREFIX_CACHE_MIN_TOKENS = {
+    GEMINI_PRO_MODEL: 4096,
+    GEMINI_FLASH_MODEL: 4096,
+}
+PREFIX_CACHE_TTL_SECONDS = 600
+
+# Tracing spans (shared/tracing.py); off by default, CAISO_TRACE=1 enables
+TRACING_ENABLED = os.environ.get("CAISO_TRACE", "").lower() in ("1", "true", "yes")
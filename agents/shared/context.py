@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 import json
 
+from .tracing import traced
+
 
 @dataclass
 class ProjectContext:
@@ -126,6 +128,7 @@ class ContextManager:
         else:
             print(f"⚠️  Warning: Unknown context section: {section}")
 
+    @traced("context.save")
     def save(self, filepath: str):
         """Save context to file."""
         if self._context is None:
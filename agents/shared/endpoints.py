@@ -0,0 +1,355 @@
+"""
+Endpoints - Health-aware routing over primary and fallback Vercel proxies
+
+With a single VERCEL_PROXY_URL, a degraded proxy made every agent wait out
+its request timeout, call after call. FailoverTransport (the "live" and
+"record" transports, see transports.py) spreads calls over
+VERCEL_PROXY_URLS, the primary plus VERCEL_PROXY_FALLBACK_URLS, using the
+process-wide `proxy_pool`:
+
+- Every endpoint has a CircuitBreaker. PROXY_BREAKER_FAILURES consecutive
+  failures (network errors, timeouts, HTTP 5xx) open it and the endpoint
+  gets no calls. After PROXY_BREAKER_COOLDOWN_SECONDS it is half open:
+  one trial call goes through and closes it again if it succeeds.
+- Each call picks one of the available endpoints at random, weighted by
+  1/EWMA² of their latency on that path (PROXY_LATENCY_EWMA_ALPHA), so a
+  slow proxy keeps little traffic. Endpoints not measured yet weigh as
+  much as the fastest one. A failed call moves on to the next endpoint.
+- With every breaker open, calls fail at once with ProxyUnavailable
+  (raised by LLMService as LLMUnavailableError, see errors.py) instead of
+  connecting; connecting itself is bounded by
+  PROXY_CONNECT_TIMEOUT_SECONDS.
+- A daemon thread probes open and idle endpoints every
+  PROXY_PROBE_INTERVAL_SECONDS with a GET of PROXY_PROBE_PATH (which the
+  proxy answers with 405, without calling Gemini). A reachable endpoint
+  closes its breaker; failed probes count as failures.
+
+URLs outside the pool (a custom LLMService proxy_url) are sent unchanged.
+"""
+
+import http.client
+import random
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .constants import (
+    PROXY_BREAKER_COOLDOWN_SECONDS,
+    PROXY_BREAKER_FAILURES,
+    PROXY_CONNECT_TIMEOUT_SECONDS,
+    PROXY_LATENCY_EWMA_ALPHA,
+    PROXY_PROBE_INTERVAL_SECONDS,
+    PROXY_PROBE_PATH,
+    VERCEL_PROXY_URLS,
+)
+from .transports import Cancellation, Cancelled, HTTPTransport, Transport, TransportResponse
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProxyUnavailable(OSError):
+    """Every proxy endpoint's circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after    # seconds until the first trial call
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; one trial call after the cooldown."""
+
+    def __init__(
+        self,
+        failures: int = PROXY_BREAKER_FAILURES,
+        cooldown_s: float = PROXY_BREAKER_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = failures
+        self.cooldown_s = cooldown_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._clock = clock
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether allow() would admit a call (without claiming the trial)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._clock() - self.opened_at >= self.cooldown_s
+            return not self._trial
+
+    def allow(self) -> bool:
+        """Admit a call; an open breaker past its cooldown admits one trial."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self._clock() - self.opened_at < self.cooldown_s:
+                    return False
+                self.state = HALF_OPEN
+                self._trial = False
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = self._clock()
+
+    def release(self):
+        """An admitted call ended without a verdict (it was cancelled)."""
+        with self._lock:
+            self._trial = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker admits its trial call."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(self.cooldown_s - (self._clock() - self.opened_at), 0.0)
+
+
+class ProxyEndpoint:
+    """One proxy deployment and what the pool knows about it."""
+
+    def __init__(self, base_url: str, breaker: CircuitBreaker):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker
+        self.latency_ms: Dict[str, float] = {}     # EWMA per path ("probe" for probes)
+        self.requests = 0
+        self.failures = 0
+        self.probes = 0
+        self.last_error: Optional[str] = None
+        self.last_used = 0.0
+
+
+class EndpointPool:
+    """Proxy endpoints with breakers, latency EWMAs and probing (see module docstring)."""
+
+    def __init__(
+        self,
+        urls: Sequence[str] = VERCEL_PROXY_URLS,
+        failures: int = PROXY_BREAKER_FAILURES,
+        cooldown_s: float = PROXY_BREAKER_COOLDOWN_SECONDS,
+        probe_interval_s: float = PROXY_PROBE_INTERVAL_SECONDS,
+        alpha: float = PROXY_LATENCY_EWMA_ALPHA,
+        probe_timeout_s: float = PROXY_CONNECT_TIMEOUT_SECONDS,
+        seed: Optional[int] = None,
+    ):
+        self.endpoints = [ProxyEndpoint(url, CircuitBreaker(failures, cooldown_s)) for url in urls]
+        self.probe_interval_s = probe_interval_s
+        self.alpha = alpha
+        self.probe_timeout_s = probe_timeout_s
+        self.fast_fails = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+
+    def path_of(self, url: str) -> Optional[str]:
+        """Path of url below one of the pool's base URLs (None if outside the pool)."""
+        for endpoint in self.endpoints:
+            if url.startswith(endpoint.base_url + "/"):
+                return url[len(endpoint.base_url):]
+        return None
+
+    def choose(self, path: str, exclude: Sequence[ProxyEndpoint] = ()) -> Optional[ProxyEndpoint]:
+        """Latency-weighted pick among endpoints whose breaker admits a call."""
+        excluded = list(exclude)
+        while True:
+            candidates = [
+                endpoint for endpoint in self.endpoints
+                if endpoint not in excluded and endpoint.breaker.available()
+            ]
+            if not candidates:
+                return None
+            endpoint = self._weighted(candidates, path)
+            if endpoint.breaker.allow():
+                with self._lock:
+                    endpoint.requests += 1
+                    endpoint.last_used = time.monotonic()
+                return endpoint
+            excluded.append(endpoint)   # lost its trial call to another thread
+
+    def _weighted(self, candidates: List[ProxyEndpoint], path: str) -> ProxyEndpoint:
+        with self._lock:
+            known = [e.latency_ms[path] for e in candidates if path in e.latency_ms]
+            default = min(known) if known else 1.0
+            weights = [1 / max(e.latency_ms.get(path, default), 1.0) ** 2 for e in candidates]
+            return self._rng.choices(candidates, weights)[0]
+
+    def record(
+        self,
+        endpoint: ProxyEndpoint,
+        path: str,
+        latency_ms: Optional[float] = None,
+        error: Optional[str] = None,
+    ):
+        """Outcome of a call or probe: latency on success, else the error."""
+        if error is not None:
+            with self._lock:
+                endpoint.failures += 1
+                endpoint.last_error = error
+            endpoint.breaker.failure()
+            return
+        with self._lock:
+            previous = endpoint.latency_ms.get(path)
+            endpoint.latency_ms[path] = (
+                latency_ms if previous is None
+                else self.alpha * latency_ms + (1 - self.alpha) * previous
+            )
+        endpoint.breaker.success()
+
+    def unavailable(self) -> ProxyUnavailable:
+        """Fast-fail error for a call no endpoint admitted."""
+        with self._lock:
+            self.fast_fails += 1
+        retry_in = min(endpoint.breaker.retry_in() for endpoint in self.endpoints)
+        return ProxyUnavailable(
+            f"All {len(self.endpoints)} proxy endpoint(s) failing, circuit open "
+            f"(next trial in {retry_in:.0f}s)",
+            retry_after=retry_in,
+        )
+
+    def start_probing(self):
+        """Start the probe thread (once; no-op if probing is disabled)."""
+        if self.probe_interval_s <= 0:
+            return
+        with self._lock:
+            if self._prober is not None:
+                return
+            self._prober = threading.Thread(target=self._probe_loop, name="proxy-prober", daemon=True)
+        self._prober.start()
+
+    def stop_probing(self):
+        self._stop.set()
+        if self._prober is not None:
+            self._prober.join()
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval_s):
+            for endpoint in self.endpoints:
+                idle = time.monotonic() - endpoint.last_used >= self.probe_interval_s
+                if endpoint.breaker.state != CLOSED or idle:
+                    self.probe(endpoint)
+
+    def probe(self, endpoint: ProxyEndpoint) -> bool:
+        """GET PROXY_PROBE_PATH; any answer below 500 counts as healthy."""
+        parts = urllib.parse.urlsplit(endpoint.base_url + PROXY_PROBE_PATH)
+        connection_cls = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        connection = connection_cls(parts.hostname, parts.port, timeout=self.probe_timeout_s)
+        started = time.perf_counter()
+        with self._lock:
+            endpoint.probes += 1
+        try:
+            connection.request("GET", parts.path)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.record(endpoint, "probe", error=f"probe: {e}")
+            return False
+        finally:
+            connection.close()
+
+        if response.status >= 500:
+            self.record(endpoint, "probe", error=f"probe: HTTP {response.status}")
+            return False
+        self.record(endpoint, "probe", (time.perf_counter() - started) * 1000)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "fast_fails": self.fast_fails,
+                "endpoints": {
+                    endpoint.base_url: {
+                        "state": endpoint.breaker.state,
+                        "requests": endpoint.requests,
+                        "failures": endpoint.failures,
+                        "probes": endpoint.probes,
+                        "latency_ms": {path: round(ms, 1) for path, ms in endpoint.latency_ms.items()},
+                        "last_error": endpoint.last_error,
+                    }
+                    for endpoint in self.endpoints
+                },
+            }
+
+
+# Process-wide pool over the configured proxies (breakers are shared by all agents)
+proxy_pool = EndpointPool()
+
+
+class FailoverTransport(Transport):
+    """Routes calls over an EndpointPool (see module docstring)."""
+
+    name = "live"
+
+    def __init__(self, inner: Optional[Transport] = None, pool: Optional[EndpointPool] = None):
+        self.inner = inner or HTTPTransport()
+        self.pool = pool or proxy_pool
+        self.live = self.inner.live
+        self.synthetic = self.inner.synthetic
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        path = self.pool.path_of(url)
+        if path is None:
+            return self.inner.send(url, payload, timeout, cancel)
+        self.pool.start_probing()
+
+        tried: List[ProxyEndpoint] = []
+        failed_response: Optional[TransportResponse] = None
+        failed_error: Optional[Exception] = None
+        while True:
+            endpoint = self.pool.choose(path, tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            try:
+                response = self.inner.send(endpoint.base_url + path, payload, timeout, cancel)
+            except Cancelled:
+                endpoint.breaker.release()
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                self.pool.record(endpoint, path, error=f"{type(e).__name__}: {e}")
+                failed_error = e
+                continue
+            if response.status >= 500:
+                self.pool.record(endpoint, path, error=f"HTTP {response.status}")
+                failed_response = response
+                continue
+            self.pool.record(endpoint, path, response.timing.total_ms)
+            return response
+
+        # Every endpoint failed (report the last proxy answer) or none was tried
+        if failed_response is not None:
+            return failed_response
+        if failed_error is not None:
+            raise failed_error
+        raise self.pool.unavailable()
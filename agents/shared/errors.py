@@ -0,0 +1,99 @@
+"""
+LLM Errors - Typed failures of LLMService calls
+
+LLMService used to return failures as text ("❌ HTTP Error 503: ...") in
+place of model output. Callers handed that to the JSON extractor, which
+spent a parse (and possibly a full retry) on it and reported a misleading
+parse error. Failed calls now raise an LLMError subclass instead:
+
+- kind: network, unavailable, http, api, response, replay or unexpected
+- retryable: whether repeating the same call may succeed (network errors,
+  open circuits, HTTP 408/429/5xx)
+- status (HTTP errors), retry_after (seconds, open circuits), endpoint
+- elapsed_ms: how long the failed call took; attempts: calls made
+
+LLMService retries retryable errors itself (LLM_MAX_RETRIES, exponential
+backoff), so an LLMError reaching an agent is final: design agents stop
+at once and emit DESIGN_FAILED with to_json().
+"""
+
+from typing import Any, Dict, Optional
+
+
+# HTTP statuses worth repeating a call for
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    """A failed LLMService call (see module docstring)."""
+
+    kind = "unexpected"
+    retryable = False
+
+    def __init__(
+        self,
+        message: str,
+        endpoint: Optional[str] = None,
+        elapsed_ms: float = 0.0,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.elapsed_ms = elapsed_ms
+        self.status = status
+        self.retry_after = retry_after
+        self.attempts = 1
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "error": str(self),
+            "error_kind": self.kind,
+            "retryable": self.retryable,
+            "status": self.status,
+            "endpoint": self.endpoint,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "attempts": self.attempts,
+        }
+
+
+class LLMNetworkError(LLMError):
+    """The proxy could not be reached (connection failure, timeout)."""
+
+    kind = "network"
+    retryable = True
+
+
+class LLMUnavailableError(LLMError):
+    """Every proxy endpoint's circuit breaker is open (see endpoints.py)."""
+
+    kind = "unavailable"
+    retryable = True
+
+
+class LLMHTTPError(LLMError):
+    """The proxy answered with an HTTP error status."""
+
+    kind = "http"
+
+    def __init__(self, message: str, status: int, **kwargs):
+        super().__init__(message, status=status, **kwargs)
+        self.retryable = status in RETRYABLE_STATUSES
+
+
+class LLMAPIError(LLMError):
+    """The proxy answered, but reported the call as failed (success: false)."""
+
+    kind = "api"
+
+
+class LLMResponseError(LLMError):
+    """The proxy's answer was not the JSON it should be."""
+
+    kind = "response"
+
+
+class LLMReplayError(LLMError):
+    """A replayed call was never recorded (see transports.py)."""
+
+    kind = "replay"
@@ -8,6 +8,8 @@ from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
 
+from .tracing import span
+
 
 class EventType(Enum):
     """All possible events in the system."""
@@ -94,11 +96,13 @@ class EventBus:
 
         # Notify subscribers
         if event.type in self._subscribers:
-            for handler in self._subscribers[event.type]:
-                try:
-                    handler(event)
-                except Exception as e:
-                    print(f"❌ Event handler error: {e}")
+            with span("events.emit", event=event.type.value):
+                for handler in self._subscribers[event.type]:
+                    try:
+                        with span(f"handler {getattr(handler, '__qualname__', handler)}"):
+                            handler(event)
+                    except Exception as e:
+                        print(f"❌ Event handler error: {e}")
 
     def get_history(self, event_type: Optional[EventType] = None) -> List[Event]:
         """Get event history, optionally filtered by type."""
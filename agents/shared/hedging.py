@@ -0,0 +1,257 @@
+"""
+Hedging - Duplicate slow LLM calls and keep whichever answer comes first
+
+Most proxy calls finish within a narrow band, but the occasional slow proxy
+instance or model response dominates the p99 of the design stages. A
+HedgedTransport wraps another transport (see transports.py): once a call
+has run longer than the HEDGE_PERCENTILE (p90) latency observed for its
+endpoint, the same request is sent again, the first usable response is
+returned and the other request is cancelled.
+
+Hedges are limited by a budget: at most HEDGE_BUDGET extra calls per
+eligible call (5% by default). The budget and the latencies the delay is
+derived from are kept process-wide in a HedgePolicy, so every LLMService
+learns from the calls of all agents. No endpoint is hedged before it has
+HEDGE_MIN_SAMPLES latencies, and only HEDGE_ENDPOINTS ("generate",
+"vision") are: Imagen bills per image.
+
+HedgeStats count eligible calls, hedges, budget refusals and hedge wins
+(the duplicate answered first), per service (LLMService.get_stats()) and
+per process (hedge_policy.stats). Metering prices hedged calls twice, so
+HEDGE_BUDGET can be tuned by comparing win rate and p99 against spend.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .constants import (
+    HEDGE_BUDGET,
+    HEDGE_ENDPOINTS,
+    HEDGE_MIN_DELAY_MS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+)
+from .metering import Timing
+from .tracing import bind
+from .transports import Cancellation, Transport, TransportResponse, endpoint_name
+
+
+# (hedge, started after ms, response, error) of one request
+Outcome = Tuple[bool, float, Optional[TransportResponse], Optional[Exception]]
+
+
+@dataclass
+class HedgeStats:
+    """Hedging counters."""
+
+    calls: int = 0              # calls eligible for hedging
+    hedges: int = 0             # duplicates sent
+    hedge_wins: int = 0         # duplicates that answered first
+    budget_skips: int = 0       # slow calls not hedged (budget exhausted)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.calls if self.calls else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.hedge_wins / self.hedges if self.hedges else 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hedge_rate"] = round(self.hedge_rate, 4)
+        data["win_rate"] = round(self.win_rate, 4)
+        return data
+
+
+class HedgePolicy:
+    """Observed latencies per endpoint and the hedging budget (see module docstring)."""
+
+    def __init__(
+        self,
+        budget: float = HEDGE_BUDGET,
+        percentile: float = HEDGE_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        window: int = HEDGE_WINDOW,
+        min_delay_ms: float = HEDGE_MIN_DELAY_MS,
+    ):
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay_ms = min_delay_ms
+        self.stats = HedgeStats()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def delay_ms(self, endpoint: str) -> Optional[float]:
+        """How long a call may run before it is hedged (None: too few samples)."""
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        index = min(int(len(ordered) * self.percentile), len(ordered) - 1)
+        return max(ordered[index], self.min_delay_ms)
+
+    def observe(self, endpoint: str, latency_ms: float):
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency_ms)
+
+    def admit(self, stats: HedgeStats):
+        """Count an eligible call (each one adds `budget` hedges to spend)."""
+        with self._lock:
+            self.stats.calls += 1
+            stats.calls += 1
+
+    def acquire(self, stats: HedgeStats) -> bool:
+        """Take one hedge from the budget; False (counted as a skip) if spent."""
+        with self._lock:
+            if self.stats.hedges + 1 > self.budget * self.stats.calls:
+                self.stats.budget_skips += 1
+                stats.budget_skips += 1
+                return False
+            self.stats.hedges += 1
+            stats.hedges += 1
+            return True
+
+    def won(self, stats: HedgeStats):
+        with self._lock:
+            self.stats.hedge_wins += 1
+            stats.hedge_wins += 1
+
+    def reset(self):
+        with self._lock:
+            self.stats = HedgeStats()
+            self._latencies.clear()
+
+
+# Process-wide policy shared by all hedged services
+hedge_policy = HedgePolicy()
+
+
+class HedgedTransport(Transport):
+    """Wraps a transport and hedges its slow calls (see module docstring)."""
+
+    def __init__(
+        self,
+        inner: Transport,
+        policy: Optional[HedgePolicy] = None,
+        endpoints: Tuple[str, ...] = HEDGE_ENDPOINTS,
+    ):
+        self.inner = inner
+        self.policy = policy or hedge_policy
+        self.endpoints = endpoints
+        self.stats = HedgeStats()
+        self.name = inner.name
+        self.live = inner.live
+        self.synthetic = inner.synthetic
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        endpoint = endpoint_name(url)
+        if endpoint not in self.endpoints:
+            return self.inner.send(url, payload, timeout, cancel)
+
+        self.policy.admit(self.stats)
+        delay_ms = self.policy.delay_ms(endpoint)
+        if delay_ms is None:
+            response = self.inner.send(url, payload, timeout, cancel)
+            self.policy.observe(endpoint, response.timing.total_ms)
+            return response
+        return self._race(endpoint, url, payload, timeout, cancel, delay_ms)
+
+    def _race(
+        self,
+        endpoint: str,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        cancel: Optional[Cancellation],
+        delay_ms: float,
+    ) -> TransportResponse:
+        """Primary request, plus a duplicate if it outlasts delay_ms."""
+        started = time.perf_counter()
+        outcomes: "queue.Queue[Outcome]" = queue.Queue()
+        tokens = []
+
+        def launch(hedge: bool):
+            token = Cancellation()
+            tokens.append(token)
+            if cancel is not None:
+                cancel.on_cancel(token.cancel)
+            offset_ms = (time.perf_counter() - started) * 1000
+
+            def attempt():
+                try:
+                    outcomes.put((hedge, offset_ms, self.inner.send(url, payload, timeout, token), None))
+                except Exception as e:
+                    outcomes.put((hedge, offset_ms, None, e))
+
+            name = "llm-hedge" if hedge else "llm-primary"
+            threading.Thread(target=bind(attempt), name=name, daemon=True).start()
+
+        launch(hedge=False)
+        try:
+            outcome = outcomes.get(timeout=delay_ms / 1000)
+        except queue.Empty:
+            outcome = None
+
+        if outcome is None and self.policy.acquire(self.stats):
+            launch(hedge=True)
+            pending, failed = 2, []
+            while pending:
+                outcome = outcomes.get()
+                pending -= 1
+                if _usable(outcome):
+                    break
+                failed.append(outcome)
+            else:
+                # Both failed: report the primary's failure
+                outcome = next(o for o in failed if not o[0])
+            for token in tokens:
+                token.cancel()
+        elif outcome is None:
+            outcome = outcomes.get()
+
+        hedge, offset_ms, response, error = outcome
+        if hedge:
+            self.policy.won(self.stats)
+            # The primary never finished: it took at least this long
+            self.policy.observe(endpoint, (time.perf_counter() - started) * 1000)
+        elif response is not None:
+            self.policy.observe(endpoint, response.timing.total_ms)
+        if error is not None:
+            raise error
+        if len(tokens) == 1:
+            return response
+
+        # Latency as the caller saw it, from the primary's start
+        return replace(
+            response,
+            hedged=True,
+            timing=Timing(
+                connect_ms=offset_ms + response.timing.connect_ms,
+                ttfb_ms=offset_ms + response.timing.ttfb_ms,
+                total_ms=offset_ms + response.timing.total_ms,
+            ),
+        )
+
+
+def _usable(outcome: Outcome) -> bool:
+    """A response worth returning (server errors and exceptions are not)."""
+    response, error = outcome[2], outcome[3]
+    return error is None and response.status < 500
@@ -0,0 +1,175 @@
+"""
+Image utilities shared by the Art Team agents.
+Zero-dependency (stdlib only) perceptual hashing on grayscale pixel buffers
+and a minimal PNG decoder to feed it.
+"""
+
+import struct
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+
+def difference_hash(
+    pixels: Sequence[int],
+    width: int,
+    height: int,
+    hash_size: int = 8,
+) -> int:
+    """
+    Compute a difference hash (dHash) of a grayscale image.
+
+    The image is box-averaged down to (hash_size + 1) x hash_size cells and
+    each bit records whether a cell is brighter than its right neighbour.
+    Visually identical frames produce identical hashes; near-identical frames
+    differ in only a few bits.
+
+    Args:
+        pixels: Row-major grayscale values (0-255), len == width * height
+        width: Image width in pixels
+        height: Image height in pixels
+        hash_size: Hash grid size (hash_size ** 2 bits)
+
+    Returns:
+        Hash as an integer
+    """
+    if width <= 0 or height <= 0 or len(pixels) < width * height:
+        raise ValueError(f"Invalid image buffer: {width}x{height}, {len(pixels)} pixels")
+
+    grid_w = hash_size + 1
+    grid_h = hash_size
+    sums = [0] * (grid_w * grid_h)
+    counts = [0] * (grid_w * grid_h)
+
+    # Map every pixel column/row to its cell once
+    col_cell = [min(grid_w - 1, (x * grid_w) // width) for x in range(width)]
+    for y in range(height):
+        row_base = min(grid_h - 1, (y * grid_h) // height) * grid_w
+        offset = y * width
+        for x in range(width):
+            cell = row_base + col_cell[x]
+            sums[cell] += pixels[offset + x]
+            counts[cell] += 1
+
+    means = [s / c if c else 0.0 for s, c in zip(sums, counts)]
+
+    value = 0
+    for r in range(grid_h):
+        row = means[r * grid_w:(r + 1) * grid_w]
+        for left, right in zip(row, row[1:]):
+            value = (value << 1) | (1 if left > right else 0)
+
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Channels per PNG color type (8-bit depth)
+_PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+
+def decode_png_grayscale(data: bytes) -> Tuple[List[int], int, int]:
+    """
+    Decode an 8-bit, non-interlaced PNG into grayscale pixels.
+
+    Covers what Imagen returns (RGB/RGBA). Transparent pixels are composited
+    onto white so background removal does not change the hash.
+
+    Args:
+        data: PNG file bytes
+
+    Returns:
+        (pixels, width, height)
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+
+    pos = len(PNG_SIGNATURE)
+    idat = []
+    width = height = color_type = bit_depth = interlace = 0
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if chunk_type == b"IHDR":
+            width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif chunk_type == b"IDAT":
+            idat.append(body)
+        elif chunk_type == b"IEND":
+            break
+        pos += 12 + length
+
+    if bit_depth != 8 or interlace or color_type not in _PNG_CHANNELS:
+        raise ValueError(
+            f"Unsupported PNG (depth={bit_depth}, color_type={color_type}, interlace={interlace})"
+        )
+
+    bpp = _PNG_CHANNELS[color_type]
+    stride = width * bpp
+    raw = zlib.decompress(b"".join(idat))
+
+    pixels: List[int] = []
+    prev = bytearray(stride)
+    for y in range(height):
+        offset = y * (stride + 1)
+        filter_type = raw[offset]
+        line = bytearray(raw[offset + 1:offset + 1 + stride])
+        _unfilter(filter_type, line, prev, bpp)
+
+        if color_type == 0:
+            pixels.extend(line)
+        elif color_type == 4:
+            pixels.extend(
+                (line[i] * line[i + 1] + 255 * (255 - line[i + 1])) // 255
+                for i in range(0, stride, 2)
+            )
+        else:
+            for i in range(0, stride, bpp):
+                gray = (299 * line[i] + 587 * line[i + 1] + 114 * line[i + 2]) // 1000
+                if bpp == 4:
+                    alpha = line[i + 3]
+                    gray = (gray * alpha + 255 * (255 - alpha)) // 255
+                pixels.append(gray)
+        prev = line
+
+    return pixels, width, height
+
+
+def perceptual_hash(data: bytes, hash_size: int = 8) -> Optional[int]:
+    """dHash of an encoded image, or None if it cannot be decoded (e.g. mock assets)."""
+    try:
+        pixels, width, height = decode_png_grayscale(data)
+    except (ValueError, zlib.error, struct.error):
+        return None
+    return difference_hash(pixels, width, height, hash_size)
+
+
+def _unfilter(filter_type: int, line: bytearray, prev: bytearray, bpp: int):
+    """Reverse a PNG scanline filter in place."""
+    if filter_type == 0:
+        return
+    n = len(line)
+    if filter_type == 1:  # Sub
+        for i in range(bpp, n):
+            line[i] = (line[i] + line[i - bpp]) & 0xFF
+    elif filter_type == 2:  # Up
+        for i in range(n):
+            line[i] = (line[i] + prev[i]) & 0xFF
+    elif filter_type == 3:  # Average
+        for i in range(n):
+            left = line[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+    elif filter_type == 4:  # Paeth
+        for i in range(n):
+            a = line[i - bpp] if i >= bpp else 0
+            b = prev[i]
+            c = prev[i - bpp] if i >= bpp else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            line[i] = (line[i] + predictor) & 0xFF
+    else:
+        raise ValueError(f"Invalid PNG filter type: {filter_type}")
@@ -0,0 +1,382 @@
+"""
+JSON Extraction - Pull JSON out of LLM responses, repairing it when needed
+
+LLM responses wrap JSON in prose and markdown fences, sometimes more than
+one block, and are occasionally almost-JSON: trailing commas, comments,
+Python literals, single quotes, or output cut off at the token limit.
+Re-generating costs a full LLM call, so extraction tries hard first:
+
+1. Scan: one left-to-right pass finds every top-level {...} / [...] span,
+   jumping between structural characters with a regex (strings are skipped
+   as a whole, so braces inside strings never confuse the depth count).
+   A brace left open in prose ("use {name here") does not hide the JSON
+   after it: complete spans inside an unclosed one are reported too.
+2. Parse each span with json.loads (fast path, no repair).
+3. Repair: spans that fail are re-tokenized in a single pass that drops
+   trailing/duplicate commas and comments, inserts missing commas, quotes
+   bare keys and single-quoted strings, and maps True/False/None/NaN.
+4. Salvage: if the response ends inside the JSON, the repair pass keeps
+   the last point where a value was complete and closes every open
+   container there (dropping only the unfinished tail).
+
+Among spans that parse to the expected type, those that parse strictly
+win; repaired spans are considered only when no span parses strictly
+(repair turns prose braces like "{see below}" into objects too). The
+largest candidate of the winning kind is returned. Complete spans nested
+in a salvaged one compete with it only if the unclosed brace was prose;
+otherwise they are fragments of the truncated value.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .tracing import traced
+
+
+_OPEN = re.compile(r"[{\[]")
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_BAREWORD = re.compile(r"[A-Za-z0-9_.+\-$]+")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?$")
+
+_LITERALS = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null",
+    "undefined": "null", "NaN": "null", "Infinity": "null", "-Infinity": "null",
+}
+_QUOTES = {'"': '"', "'": "'", "“": "”"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Repairs that mean an unclosed brace opened prose, not cut-off JSON
+_PROSE_REPAIRS = {"missing colon", "unquoted strings", "stray characters"}
+
+
+class JSONExtractError(json.JSONDecodeError):
+    """No usable JSON in the response (subclass of json.JSONDecodeError)."""
+
+
+@dataclass
+class Extraction:
+    """Result of scan_json()."""
+
+    value: Any
+    start: int
+    end: int                                         # end of the span used
+    repairs: List[str] = field(default_factory=list)  # e.g. ["trailing comma"]
+    salvaged: bool = False                           # truncated output was closed
+
+    @property
+    def repaired(self) -> bool:
+        return bool(self.repairs) or self.salvaged
+
+
+@traced("json.extract")
+def extract_json(
+    text: str,
+    expect: Optional[type] = dict,
+    repair: bool = True,
+    salvage: bool = True,
+    label: Optional[str] = None,
+) -> Any:
+    """
+    Extract the JSON value from an LLM response.
+
+    Args:
+        text: Raw response text
+        expect: Required top-level type (dict, list, or None for any)
+        repair: Allow tolerant repairs of almost-JSON
+        salvage: Allow closing truncated output
+        label: If set, print a one-line note when repairs were needed
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        JSONExtractError: If no span parses to the expected type
+    """
+    extraction = scan_json(text, expect=expect, repair=repair, salvage=salvage)
+    if label and extraction.repaired:
+        notes = list(extraction.repairs)
+        if extraction.salvaged:
+            notes.append("truncated output salvaged")
+        print(f"🔧 {label}: repaired LLM JSON ({', '.join(notes)})")
+    return extraction.value
+
+
+def scan_json(
+    text: str,
+    expect: Optional[type] = dict,
+    repair: bool = True,
+    salvage: bool = True,
+) -> Extraction:
+    """Like extract_json(), but returns span and repair details."""
+    candidates: List[Extraction] = []
+    truncated: List[Extraction] = []
+    first_error: Optional[Tuple[str, int]] = None
+
+    for start, end in find_spans(text):
+        extraction, error = _parse_span(text, start, end, repair, salvage)
+        if extraction is None:
+            first_error = first_error or error
+            continue
+        if end is None and extraction.salvaged and not _PROSE_REPAIRS & set(extraction.repairs):
+            truncated.append(extraction)
+        if expect is not None and not isinstance(extraction.value, expect):
+            first_error = first_error or (f"Expected {expect.__name__}", start)
+            continue
+        candidates.append(extraction)
+
+    # Complete values inside cut-off JSON are parts of it, not alternatives
+    for cut in truncated:
+        candidates = [c for c in candidates if c is cut or c.start <= cut.start]
+
+    best = max(candidates, key=_rank, default=None)
+    if best is None:
+        message, position = first_error or ("No JSON object found", 0)
+        raise JSONExtractError(message, text, position)
+    return best
+
+
+def _rank(extraction: Extraction) -> Tuple[bool, int]:
+    """Strict parses first, then span length."""
+    return not extraction.repaired, extraction.end - extraction.start
+
+
+def find_spans(text: str) -> Iterator[Tuple[int, Optional[int]]]:
+    """
+    Yield (start, end) of each top-level {...} / [...] span in one pass.
+
+    end is None for a span still open at the end of the text (truncated);
+    it is followed by the outermost complete spans nested in it, so an
+    unclosed brace never hides a later block. Only double-quoted strings
+    are recognized here; spans that need repair are re-tokenized later.
+    """
+    opened: List[int] = []              # starts of open containers
+    nested: List[List[Tuple[int, int]]] = []  # complete spans directly inside each
+    index = 0
+    while True:
+        match = (_STRUCTURE if opened else _OPEN).search(text, index)
+        if not match:
+            break
+        char = match.group()
+        index = match.end()
+        if char == '"':
+            string = _STRING_TAIL.match(text, index)
+            if not string:
+                break
+            index = string.end()
+        elif char in "{[":
+            opened.append(match.start())
+            nested.append([])
+        else:
+            span = (opened.pop(), index)
+            nested.pop()
+            if opened:
+                nested[-1].append(span)
+            else:
+                yield span
+
+    if opened:
+        yield opened[0], None
+        yield from sorted(span for spans in nested for span in spans)
+
+
+def _parse_span(
+    text: str,
+    start: int,
+    end: Optional[int],
+    repair: bool,
+    salvage: bool,
+) -> Tuple[Optional[Extraction], Optional[Tuple[str, int]]]:
+    """Parse one span: strict first, then repaired/salvaged."""
+    if end is not None:
+        try:
+            return Extraction(json.loads(text[start:end], strict=False), start, end), None
+        except json.JSONDecodeError as e:
+            error = (e.msg, start + e.pos)
+    else:
+        error = ("Unterminated JSON (truncated output)", start)
+
+    if not repair and not (salvage and end is None):
+        return None, error
+
+    normalized, repairs, salvaged, consumed = _normalize(text, start, salvage)
+    if salvaged and not salvage:
+        return None, error
+    try:
+        value = json.loads(normalized, strict=False)
+    except json.JSONDecodeError:
+        return None, error
+    if repairs and not repair:
+        return None, error
+    return Extraction(value, start, consumed, repairs, salvaged), None
+
+
+def _normalize(text: str, start: int, salvage: bool) -> Tuple[str, List[str], bool, int]:
+    """
+    Re-tokenize almost-JSON from text[start:] into strict JSON.
+
+    Returns (json_text, repairs, salvaged, end_index).
+    """
+    out: List[str] = []
+    repairs: List[str] = []
+    stack: List[str] = []        # open containers
+    last = None                  # last token: "open" | "comma" | "colon" | "key" | "value"
+    last_comma = -1              # index in out of the last emitted comma
+    cut: Optional[Tuple[int, Tuple[str, ...]]] = None  # last safe truncation point
+    index = start
+    length = len(text)
+
+    def note(repair: str):
+        if repair not in repairs:
+            repairs.append(repair)
+
+    def separate(is_key: bool):
+        """Insert a missing comma or colon before the next token."""
+        if last == "value":
+            out.append(",")
+            note("missing comma")
+        elif last == "key" and not is_key:
+            out.append(":")
+            note("missing colon")
+
+    while index < length:
+        char = text[index]
+        in_object = bool(stack) and stack[-1] == "{"
+
+        if char in " \t\r\n":
+            out.append(char)
+            index += 1
+            continue
+
+        if char == "/" and text.startswith(("//", "/*"), index):
+            close = "\n" if text[index + 1] == "/" else "*/"
+            found = text.find(close, index + 2)
+            index = length if found < 0 else found + len(close)
+            note("comments")
+            continue
+
+        if char in _QUOTES:
+            closing = _QUOTES[char]
+            value, index, terminated = _read_string(text, index + 1, closing)
+            if not terminated:
+                break
+            if char != '"':
+                note("non-standard quotes")
+            is_key = in_object and last in ("open", "comma", "value")
+            separate(is_key)
+            out.append(json.dumps(value, ensure_ascii=False))
+            if is_key:
+                last = "key"
+            else:
+                last = "value"
+                cut = (len(out), tuple(stack))
+            continue
+
+        if char in "{[":
+            separate(False)
+            stack.append(char)
+            out.append(char)
+            last = "open"
+            cut = (len(out), tuple(stack))
+            index += 1
+            continue
+
+        if char in "}]":
+            if not stack:
+                break
+            if last == "comma":
+                out[last_comma] = ""
+                note("trailing comma")
+            expected = _CLOSERS[stack.pop()]
+            if char != expected:
+                note("mismatched bracket")
+            out.append(expected)
+            last = "value"
+            cut = (len(out), tuple(stack))
+            index += 1
+            if not stack:
+                return "".join(out), repairs, False, index
+            continue
+
+        if char == ",":
+            if last in ("comma", "open", None):
+                note("extra comma")
+            else:
+                last_comma = len(out)
+                out.append(",")
+                last = "comma"
+            index += 1
+            continue
+
+        if char == ":":
+            out.append(":")
+            last = "colon"
+            index += 1
+            continue
+
+        match = _BAREWORD.match(text, index)
+        if not match:
+            note("stray characters")
+            index += 1
+            continue
+
+        word = match.group()
+        index = match.end()
+        if index >= length and salvage:
+            break  # a number/literal at the very end may be cut short
+        if in_object and last in ("open", "comma", "value"):
+            separate(True)
+            out.append(json.dumps(word))
+            note("unquoted keys")
+            last = "key"
+            continue
+        separate(False)
+        if word in _LITERALS:
+            if word != _LITERALS[word]:
+                note("non-JSON literals")
+            out.append(_LITERALS[word])
+        elif _NUMBER.match(word):
+            out.append(word)
+        else:
+            out.append(json.dumps(word))
+            note("unquoted strings")
+        last = "value"
+        cut = (len(out), tuple(stack))
+
+    # Ran out of text with containers still open
+    if not salvage or cut is None:
+        return "".join(out), repairs, False, index
+    size, open_containers = cut
+    body = "".join(out[:size]).rstrip()
+    if body.endswith(","):
+        body = body[:-1]
+    closers = "".join(_CLOSERS[c] for c in reversed(open_containers))
+    return body + closers, repairs, True, length
+
+
+def _read_string(text: str, index: int, closing: str) -> Tuple[str, int, bool]:
+    """Read a string body up to `closing`; returns (value, next_index, terminated)."""
+    parts: List[str] = []
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == "\\" and index + 1 < length:
+            escape = text[index + 1]
+            if escape == "u" and index + 6 <= length:
+                try:
+                    parts.append(chr(int(text[index + 2:index + 6], 16)))
+                    index += 6
+                    continue
+                except ValueError:
+                    pass
+            parts.append({"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}.get(escape, escape))
+            index += 2
+            continue
+        if char == closing:
+            return "".join(parts), index + 1, True
+        parts.append(char)
+        index += 1
+    return "".join(parts), index, False
@@ -0,0 +1,262 @@
+"""
+JSON Repair - Re-ask the LLM for only the broken fragment of a design
+
+A design response is one large JSON document. When part of it is missing
+or malformed (truncated output, a dropped field, a string where a number
+belongs), regenerating the whole document costs as much as the original
+call. The repairer instead:
+
+1. Extracts what it can (json_extract repairs and salvages truncated output)
+2. Validates against the design schema, which reports every problem with
+   its path, e.g. "levels[2].layout.goal: required"
+3. Asks a small follow-up prompt for just that value, showing the
+   surrounding object and the JSON shape the schema expects
+4. Splices the answer back at the path
+
+Fragment prompts are only sent when they are estimated to cost less than
+regenerating the document. Only when nothing at all can be extracted does
+it fall back to one full retry. Tokens spent on fragment prompts and on
+full retries are tracked on the LLMService (get_stats()["repairs"]) next
+to the full-retry tokens avoided by repairs that left the document valid
+(no schema errors); a partial repair avoids nothing. A failed repair
+call (LLMError) ends the repair and keeps the document as it is.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .constants import MAX_FULL_RETRIES, MAX_REPAIR_FRAGMENTS
+from .errors import LLMError
+from .json_extract import JSONExtractError, extract_json
+from .token_budget import estimate_tokens
+from .tracing import traced
+from .schemas.base import Schema, format_path, json_shape, parse_path, type_at
+
+
+TASK_EXCERPT_CHARS = 800        # of the original prompt, shown for context
+CONTEXT_CHARS = 1500            # of the surrounding object
+
+Path = Tuple[Union[str, int], ...]
+
+_FENCE = re.compile(r"```(?:json)?")
+
+REPAIR_PROMPT = """REPAIR A JSON FRAGMENT
+
+An earlier answer to the task below was a JSON document that is valid
+except inside `{path}`.
+
+Problem: `{path}` {problem}
+
+Task (excerpt):
+{task}
+
+The object that contains `{path}`:
+```json
+{context}
+```
+
+Return ONLY the JSON value for `{path}` (not the whole document), with this shape:
+```json
+{shape}
+```
+"""
+
+
+class JSONRepairer:
+    """Parses a design response and repairs broken fragments against a schema."""
+
+    def __init__(
+        self,
+        llm,
+        schema_cls: type,
+        extract: Optional[Callable[[str], Any]] = None,
+        max_fragments: int = MAX_REPAIR_FRAGMENTS,
+        max_full_retries: int = MAX_FULL_RETRIES,
+    ):
+        if not (isinstance(schema_cls, type) and issubclass(schema_cls, Schema)):
+            raise TypeError(f"{schema_cls!r} is not a Schema class")
+        self.llm = llm
+        self.schema_cls = schema_cls
+        self.extract = extract or extract_json
+        self.max_fragments = max_fragments
+        self.max_full_retries = max_full_retries
+
+    def parse(
+        self, response: str, prompt: str, cache_prefix: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract the design from a response, repairing it if needed.
+
+        Args:
+            response: LLM response to prompt
+            prompt: The prompt that produced response
+            cache_prefix: The cache_prefix prompt was generated with
+                (full retries reuse it)
+
+        Returns:
+            Parsed (and possibly repaired) JSON document
+
+        Raises:
+            json.JSONDecodeError: If no JSON could be extracted, even after
+                full retries
+            LLMError: If a full retry call failed
+        """
+        retries = 0
+        while True:
+            try:
+                data = self.extract(response)
+                break
+            except JSONExtractError:
+                if retries >= self.max_full_retries:
+                    raise
+            retries += 1
+            print(f"🔁 No usable JSON in response; full retry {retries}/{self.max_full_retries}")
+            before = self.llm.total_tokens
+            response = self.llm.generate(prompt, cache_prefix=cache_prefix, retries=retries)
+            self.llm.track_repair(
+                full_retry_tokens=self._spent(before, prompt, response),
+            )
+
+        return self.repair(data, prompt)
+
+    @traced("json.repair")
+    def repair(self, data: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """Re-ask for each fragment the schema rejects; returns data (modified in place)."""
+        errors = self.schema_cls.validate(data)
+        if not errors:
+            return data
+
+        fragments = self._fragments(errors)
+        if not fragments:
+            return data  # broken at the top level: nothing smaller to ask for
+
+        requests = [
+            (path, repair_prompt)
+            for path, problem in fragments
+            for repair_prompt in [self._repair_prompt(data, path, problem, prompt)]
+            if repair_prompt is not None
+        ]
+        retry_cost = estimate_tokens(prompt) + estimate_tokens(json.dumps(data))
+        if sum(estimate_tokens(p) for _, p in requests) >= retry_cost:
+            return data  # fragment prompts would cost as much as starting over
+
+        calls = spent = repaired = 0
+        for path, repair_prompt in requests:
+            before = self.llm.total_tokens
+            try:
+                response = self.llm.generate(repair_prompt)
+            except LLMError as e:
+                print(f"   ⚠️  Repair call failed ({e.kind}), keeping the remaining fragments as they are")
+                break
+            calls += 1
+            spent += self._spent(before, repair_prompt, response)
+            found, value = _fragment_value(response)
+            if not found:
+                print(f"   ⚠️  No JSON in repair answer for {format_path(path)}")
+            elif _splice(data, path, value):
+                repaired += 1
+
+        remaining = self.schema_cls.validate(data)
+        # A retry is only avoided if the repaired document is fully valid
+        avoided = retry_cost if repaired and not remaining else 0
+        self.llm.track_repair(
+            calls=calls,
+            tokens=spent,
+            retry_tokens_avoided=avoided,
+        )
+        print(
+            f"🩹 Repaired {repaired}/{calls} fragment(s) with ~{spent:,} tokens "
+            f"(full retry ~{retry_cost:,} tokens, {'avoided' if avoided else 'not avoided'}); "
+            f"{len(remaining)} schema error(s) left"
+        )
+        return data
+
+    def _fragments(self, errors: List[str]) -> List[Tuple[Path, str]]:
+        """
+        (path, problem) to re-ask for, at most max_fragments.
+
+        Problems under a common parent are merged by asking for the parent
+        instead; if that climbs to the document root, returns [].
+        """
+        problems: Dict[Path, str] = {}
+        for error in errors:
+            path, _, problem = error.rpartition(": ")
+            problems.setdefault(parse_path(path), _describe(problem))
+
+        while True:
+            paths = [
+                path for path in problems
+                if not any(path[:n] in problems for n in range(len(path)))
+            ]
+            if () in problems:
+                return []
+            if len(paths) <= self.max_fragments:
+                return [(path, problems[path]) for path in paths]
+            deepest = max(len(path) for path in paths)
+            merged: Dict[Path, str] = {}
+            for path in paths:
+                if len(path) == deepest:
+                    merged.setdefault(path[:-1], "has invalid or missing fields.")
+                else:
+                    merged.setdefault(path, problems[path])
+            problems = merged
+
+    def _repair_prompt(
+        self, data: Dict[str, Any], path: Path, problem: str, prompt: str
+    ) -> Optional[str]:
+        """Follow-up prompt for one fragment (None if the path is not in the schema)."""
+        tp = type_at(self.schema_cls, path)
+        if tp is None:
+            return None
+        context = json.dumps(_get(data, path[:-1]), indent=2, ensure_ascii=False)
+        if len(context) > CONTEXT_CHARS:
+            context = context[:CONTEXT_CHARS] + "\n... (truncated)"
+
+        return REPAIR_PROMPT.format(
+            path=format_path(path),
+            problem=problem,
+            task=prompt[:TASK_EXCERPT_CHARS].strip(),
+            context=context,
+            shape=json.dumps(json_shape(tp), indent=2),
+        )
+
+    def _spent(self, before: int, prompt: str, response: str) -> int:
+        """Tokens of one call: measured by the service, else estimated."""
+        measured = self.llm.total_tokens - before
+        return measured or estimate_tokens(prompt) + estimate_tokens(response)
+
+
+def _fragment_value(response: str) -> Tuple[bool, Any]:
+    """(found, value) of a repair answer; fragments may be bare scalars."""
+    try:
+        return True, extract_json(response, expect=None)
+    except JSONExtractError:
+        pass
+    text = _FENCE.sub("", response).strip()
+    try:
+        return True, json.loads(text)
+    except json.JSONDecodeError:
+        return False, None
+
+
+def _describe(problem: str) -> str:
+    if problem == "required":
+        return "is missing."
+    return f"is invalid ({problem})."
+
+
+def _get(data: Any, path: Path) -> Any:
+    for part in path:
+        data = data[part]
+    return data
+
+
+def _splice(data: Dict[str, Any], path: Path, value: Any) -> bool:
+    """Set the value at path; parents exist because validation reached them."""
+    try:
+        parent = _get(data, path[:-1])
+        parent[path[-1]] = value
+    except (KeyError, IndexError, TypeError):
+        return False
+    return True
@@ -8,20 +8,49 @@ V2 개선사항:
 - 비용 추적 기능
 """
 
+import base64
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
-from typing import Optional, Dict, Any
+import threading
+import time
+from dataclasses import replace
 from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 
 from .constants import (
     GEMINI_TEXT_ENDPOINT,
+    GEMINI_IMAGEN_ENDPOINT,
+    GEMINI_VISION_ENDPOINT,
+    GEMINI_CACHE_ENDPOINT,
     GEMINI_PRO_MODEL,
     GEMINI_FLASH_MODEL,
+    IMAGEN_4_MODEL,
+    LLM_HEDGING,
+    VISION_TOKENS_PER_IMAGE,
     DEFAULT_TEMPERATURE,
     DEFAULT_MAX_TOKENS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF_SECONDS,
+    LLM_RETRY_MAX_WAIT_SECONDS,
+    PREFIX_CACHE_TTL_SECONDS,
 )
+from .endpoints import ProxyUnavailable, proxy_pool
+from .errors import (
+    LLMAPIError,
+    LLMError,
+    LLMHTTPError,
+    LLMNetworkError,
+    LLMReplayError,
+    LLMResponseError,
+    LLMUnavailableError,
+)
+from .hedging import HedgedTransport
+from .metering import CallRecord, meter
+from .prefix_cache import CachedPrefix, ProxyPrefixCache, min_cacheable_tokens, prefix_key
+from .token_budget import estimate_tokens
+from .tracing import tracer, traced
+from .transports import ReplayMiss, Transport, endpoint_name, make_transport
 
 
 class LLMService:
@@ -30,8 +59,11 @@ class LLMService:
 
     V2 특징:
     - API 키 불필요 (Vercel이 자동 주입)
-    - Mock 모드 지원 (VERCEL_PROXY_URL 없을 때)
-    - 비용 추적
+    - Mock 모드 지원 (기본값, MOCK_MODE=false면 실제 proxy 호출)
+    - Text / Imagen 4 / Vision 엔드포인트
+    - 비용 추적 (호출별 metering 기록, shared/metering.py)
+    - Hedged requests (느린 호출 복제, shared/hedging.py)
+    - 실패 시 LLMError 예외 (종류/재시도 가능 여부/지연 시간, shared/errors.py)
     """
 
     def __init__(
@@ -40,27 +72,67 @@ class LLMService:
         temperature: float = DEFAULT_TEMPERATURE,
         max_output_tokens: int = DEFAULT_MAX_TOKENS,
         proxy_url: Optional[str] = None,
+        agent: Optional[str] = None,
+        mock_mode: Optional[bool] = None,
+        transport: Optional[Transport] = None,
+        hedge: Optional[bool] = None,
+        max_retries: int = LLM_MAX_RETRIES,
     ):
         self.model = model
+        self.agent = agent or "unknown"
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
+        self.max_retries = max_retries
         self.proxy_url = proxy_url or GEMINI_TEXT_ENDPOINT
-
-        # Mock mode if no proxy URL or localhost
-        # Force mock mode for Phase 1 testing
-        self.mock_mode = True  # TODO: Set to False when Vercel proxy is ready
-        if self.mock_mode:
-            print(f"⚠️  Warning: Using Mock LLM mode (Phase 1 testing)")
+        self.imagen_url = GEMINI_IMAGEN_ENDPOINT
+        self.vision_url = GEMINI_VISION_ENDPOINT
+
+        # Transport from configuration (CAISO_LLM_TRANSPORT / MOCK_MODE)
+        # unless one is given; mock_mode=True/False forces synthetic/live
+        if transport is None:
+            if mock_mode is None:
+                transport = make_transport()
+            else:
+                transport = make_transport("synthetic" if mock_mode else "live")
+
+        # Duplicate slow calls (CAISO_LLM_HEDGE unless hedge is given)
+        self.hedger: Optional[HedgedTransport] = None
+        if LLM_HEDGING if hedge is None else hedge:
+            transport = self.hedger = HedgedTransport(transport)
+        self.transport = transport
+        self.mock_mode = transport.synthetic   # canned answers (agents simulate images too)
+        if not transport.live:
+            print(f"⚠️  Warning: Using Mock LLM mode ({transport.name} transport)")
 
         # Cost tracking
         self.total_tokens = 0
         self.api_calls = 0
-
+        self.calls: List[CallRecord] = []   # also collected in metering.meter
+
+        # Provider-side prefix caching (see prefix_cache.py)
+        self.prefix_cache = ProxyPrefixCache(GEMINI_CACHE_ENDPOINT, transport)
+        self._prefixes: Dict[str, Optional[CachedPrefix]] = {}
+        self._prefix_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cached_input_tokens = 0
+        self.uncached_input_tokens = 0
+        self.last_usage: Dict[str, int] = {}
+
+        # JSON repair tracking (see json_repair.py)
+        self.repair_calls = 0
+        self.repair_tokens = 0
+        self.full_retries = 0
+        self.full_retry_tokens = 0
+        self.retry_tokens_avoided = 0
+
+    @traced("llm.generate")
     def generate(
         self,
         prompt: str,
         system_instruction: Optional[str] = None,
         temperature: Optional[float] = None,
+        cache_prefix: Optional[str] = None,
+        retries: int = 0,
     ) -> str:
         """
         Generate text response from Gemini via Vercel Proxy.
@@ -69,12 +141,24 @@ class LLMService:
             prompt: User prompt
             system_instruction: Optional system instruction
             temperature: Override default temperature
+            cache_prefix: Leading part of prompt shared with other calls;
+                registered once as cached content and referenced by name
+            retries: Earlier attempts this call repeats (for metering)
 
         Returns:
             Generated text
+
+        Raises:
+            LLMError: If the call failed (after retrying retryable failures)
         """
-        if self.mock_mode:
-            return self._generate_mock(prompt)
+        # Gemini takes no system instruction alongside cached content
+        handle = None
+        if cache_prefix and not system_instruction and prompt.startswith(cache_prefix):
+            handle = self.cached_prefix(cache_prefix)
+
+        record = CallRecord(
+            agent=self.agent, model=self.model, retries=retries, mock=not self.transport.live
+        )
 
         payload: Dict[str, Any] = {
             "model": self.model,
@@ -86,273 +170,364 @@ class LLMService:
         if system_instruction:
             payload["system_instruction"] = system_instruction
 
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            self.proxy_url,
-            data=data,
-            headers={"Content-Type": "application/json"},
+        if handle:
+            payload["cached_content"] = handle.name
+            payload["prompt"] = prompt[len(handle.prefix):]
+
+        result, record = self._call(self.proxy_url, payload, record, prompt)
+
+        text = result.get("text", "")
+        tokens = result.get("tokens_used", 0)
+
+        # The proxy dropped cached_content: that answer never saw the prefix,
+        # only the rest of the prompt. It is billed all the same, so meter
+        # it, then stop caching and ask again with the whole prompt.
+        ignored = handle is not None and result.get("cached_content") != handle.name
+        if ignored:
+            self.prefix_cache.disable("proxy ignored cached_content")
+
+        # Track usage
+        self.total_tokens += tokens
+        self.api_calls += 1
+        usage = self._track_input(
+            payload["prompt"] if ignored else prompt,
+            None if ignored else handle,
+            result.get("prompt_tokens"),
+            0 if ignored else result.get("cached_tokens"),
         )
+        output_tokens = result.get("output_tokens")
+        if output_tokens is None:
+            output_tokens = tokens - usage["input_tokens"]
+            if output_tokens <= 0:
+                output_tokens = estimate_tokens(text)
+        self._meter(record, prompt, usage, output_tokens)
+
+        if ignored:
+            return self.generate(prompt, system_instruction, temperature, None, retries + 1)
+        return text
+
+    @traced("llm.generate_image")
+    def generate_image(
+        self,
+        prompt: str,
+        negative_prompt: str = "",
+        aspect_ratio: str = "1:1",
+        number_of_images: int = 1,
+    ) -> List[bytes]:
+        """
+        Generate images with Imagen 4 via Vercel Proxy (live mode only).
 
-        try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode("utf-8"))
+        Returns:
+            Decoded image bytes
 
-                if not result.get("success"):
-                    error_msg = result.get("error", "Unknown error")
-                    return f"❌ API Error: {error_msg}"
+        Raises:
+            LLMError: If the call failed (after retrying retryable failures)
+        """
+        record = CallRecord(agent=self.agent, model=IMAGEN_4_MODEL, kind="image", mock=not self.transport.live)
+        payload = {
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "aspect_ratio": aspect_ratio,
+            "number_of_images": number_of_images,
+        }
+        result, record = self._call(self.imagen_url, payload, record, prompt)
 
-                text = result.get("text", "")
-                tokens = result.get("tokens_used", 0)
+        images = [
+            base64.b64decode(image["image_data"])
+            for image in result.get("images", [])
+            if image.get("image_data")
+        ]
+        record.images = len(images)
+        self.api_calls += 1
+        self._meter(record, prompt)
+        return images
 
-                # Track usage
-                self.total_tokens += tokens
-                self.api_calls += 1
+    @traced("llm.analyze_image")
+    def analyze_image(
+        self,
+        prompt: str,
+        image_data: bytes,
+        mime_type: str = "image/png",
+        temperature: Optional[float] = None,
+    ) -> str:
+        """
+        Analyze an image with Gemini Vision via Vercel Proxy (live mode only).
 
-                return text
+        Returns:
+            Analysis text
 
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode("utf-8")
-            return f"❌ HTTP Error {e.code}: {e.reason}\nDetails: {error_body}"
-        except urllib.error.URLError as e:
-            return f"❌ Network Error: {str(e)}\n\n🔍 Check: Is Vercel proxy running? {self.proxy_url}"
-        except Exception as e:
-            return f"❌ Unexpected Error: {str(e)}"
-
-    def _generate_mock(self, prompt: str) -> str:
-        """Mock response for offline development."""
-
-        # Detect the type of request based on prompt keywords
-        if "DESIGN A COMPELLING GAME CONCEPT" in prompt:
-            # Concept Designer mock
-            return '''```json
-{
-  "concept": {
-    "title": "Cyber Cat: Neon Memories",
-    "genre": "platformer",
-    "tagline": "A robot cat's quest through a neon cyberpunk city to recover lost memories",
-    "coreLoop": ["Explore", "Wall-Jump & Dash", "Collect Memory Chips", "Avoid Drones", "Reach Checkpoint"],
-    "playerAbilities": [
-      {
-        "id": "jump",
-        "name": "Jump",
-        "description": "Basic jump ability",
-        "unlockCondition": null
-      },
-      {
-        "id": "wall_jump",
-        "name": "Wall Jump",
-        "description": "Jump off walls to reach higher platforms",
-        "unlockCondition": null
-      },
-      {
-        "id": "dash",
-        "name": "Dash",
-        "description": "Quick horizontal dash through obstacles",
-        "unlockCondition": "Collect 10 memory chips"
-      }
-    ],
-    "progressionSystem": {
-      "type": "linear",
-      "unlockMechanism": "level_completion"
-    },
-    "mechanics": {
-      "primary": ["wall_jump", "dash", "platforming"],
-      "secondary": ["collectibles", "enemy_avoidance"],
-      "unique": ["memory_chip_collection_unlocks_abilities", "neon_visual_trails"]
-    },
-    "difficultyCurve": {
-      "type": "gradual",
-      "description": "Starts with basic platforming, introduces wall-jumping in level 1, dash in level 2"
-    },
-    "winCondition": "Collect all memory chips and reach the central server",
-    "loseCondition": "Hit by drones (respawn at checkpoint)",
-    "estimatedPlaytime": 25
-  },
-  "designRationale": "Combines classic platforming with cyberpunk aesthetics. Wall-jumping and dashing create skill-based gameplay. Memory chips as collectibles tie into narrative and progression.",
-  "referenceGames": ["Celeste", "Katana ZERO", "Cyber Shadow"]
-}
-```'''
-
-        elif "DESIGN" in prompt and "LEVELS" in prompt:
-            # Level Designer mock
-            return '''```json
-{
-  "levels": [
-    {
-      "id": "level_1",
-      "name": "Neon Alleys",
-      "difficulty": 2,
-      "theme": "cyberpunk_city",
-      "layout": {
-        "width": 3000,
-        "height": 800,
-        "platforms": [
-          {"x": 0, "y": 700, "width": 300, "height": 32, "type": "ground"},
-          {"x": 400, "y": 600, "width": 200, "height": 32, "type": "floating"},
-          {"x": 700, "y": 500, "width": 150, "height": 32, "type": "floating"}
-        ],
-        "enemies": [
-          {"x": 500, "y": 550, "type": "drone", "behavior": "patrol", "patrolRange": 200}
-        ],
-        "collectibles": [
-          {"x": 450, "y": 550, "type": "memory_chip", "value": 1, "required": false}
-        ],
-        "goal": {"x": 2800, "y": 700}
-      },
-      "mechanics": {
-        "introduced": ["wall_jump"],
-        "required": ["basic_jump", "wall_jump"]
-      },
-      "estimatedCompletionTime": "3-4 minutes",
-      "skillRequirements": ["basic_jump", "wall_jump", "timing"]
-    },
-    {
-      "id": "level_2",
-      "name": "Rooftop Chase",
-      "difficulty": 4,
-      "theme": "rooftops",
-      "layout": {
-        "width": 3500,
-        "height": 900,
-        "platforms": [
-          {"x": 0, "y": 800, "width": 250, "height": 32, "type": "ground"},
-          {"x": 350, "y": 700, "width": 180, "height": 32, "type": "floating"}
-        ],
-        "enemies": [
-          {"x": 600, "y": 650, "type": "drone", "behavior": "chase", "patrolRange": 300}
-        ],
-        "collectibles": [
-          {"x": 400, "y": 650, "type": "memory_chip", "value": 1, "required": false}
-        ],
-        "goal": {"x": 3300, "y": 800}
-      },
-      "mechanics": {
-        "introduced": ["dash"],
-        "required": ["wall_jump", "dash", "precision_timing"]
-      },
-      "estimatedCompletionTime": "4-5 minutes",
-      "skillRequirements": ["wall_jump", "dash", "enemy_avoidance"]
-    },
-    {
-      "id": "level_3",
-      "name": "Central Server",
-      "difficulty": 7,
-      "theme": "tech_core",
-      "layout": {
-        "width": 4000,
-        "height": 1000,
-        "platforms": [
-          {"x": 0, "y": 900, "width": 200, "height": 32, "type": "ground"}
-        ],
-        "enemies": [
-          {"x": 800, "y": 700, "type": "drone", "behavior": "patrol", "patrolRange": 150},
-          {"x": 1500, "y": 600, "type": "drone", "behavior": "chase", "patrolRange": 250}
-        ],
-        "collectibles": [
-          {"x": 900, "y": 650, "type": "memory_chip", "value": 1, "required": true}
-        ],
-        "goal": {"x": 3800, "y": 900}
-      },
-      "mechanics": {
-        "introduced": [],
-        "required": ["wall_jump", "dash", "precise_platforming", "enemy_timing"]
-      },
-      "estimatedCompletionTime": "6-8 minutes",
-      "skillRequirements": ["mastery_of_all_mechanics"]
-    }
-  ],
-  "difficultyProgression": {
-    "curve": "gradual",
-    "description": "Level 1 introduces wall-jumping in safe environment. Level 2 adds dash and more enemies. Level 3 combines all mechanics with precise challenges."
-  },
-  "totalEstimatedPlaytime": 20
-}
-```'''
-
-        elif "DESIGN A COMPELLING GAME NARRATIVE" in prompt:
-            # Narrative Designer mock
-            return '''```json
-{
-  "worldSetting": {
-    "name": "Neo-Tokyo 2099",
-    "description": "A sprawling neon-lit cyberpunk metropolis where AI and humans coexist",
-    "lore": "After the Great Data Purge of 2095, many AI entities lost their core memories. You are a prototype rescue bot designed to recover these lost data fragments scattered across the city."
-  },
-  "characters": {
-    "protagonist": {
-      "name": "Chip",
-      "description": "A small robot cat with neon-blue circuitry patterns",
-      "personality": ["curious", "determined", "agile"],
-      "motivation": "Recover lost memory chips to restore the city's AI consciousness",
-      "backstory": "Built by a kind engineer who disappeared during the Data Purge."
-    },
-    "npcs": [
-      {
-        "name": "Old Server",
-        "description": "An ancient AI mainframe in the central tower",
-        "personality": ["wise", "cryptic"],
-        "role": "mentor"
-      }
-    ]
-  },
-  "dialogue": {
-    "tutorial": [
-      "Press SPACE to jump! Wall-jump to climb higher.",
-      "Collect memory chips to unlock new abilities.",
-      "Watch out for hostile surveillance drones!"
-    ],
-    "levelIntros": {
-      "level_1": "The neon alleys hold the first memory fragments...",
-      "level_2": "Higher ground means higher risk. Stay alert.",
-      "level_3": "The central server awaits. This is it, Chip."
-    },
-    "npcLines": {
-      "old_server": {
-        "name": "Old Server",
-        "lines": [
-          "Welcome, little one. The city needs your help.",
-          "Each memory chip brings us closer to remembering.",
-          "You have done well, Chip. The future is brighter now."
-        ]
-      }
-    }
-  },
-  "storyBeats": {
-    "opening": "Chip awakens in a dark alley, programmed with one mission: recover the lost memories scattered across Neo-Tokyo.",
-    "midpoint": "Half the memory chips recovered. The Old Server reveals that restoring all memories will revive the city's collective AI consciousness.",
-    "climax": "Final memory chip located in the heavily-guarded central server. Drones swarm, but Chip must succeed.",
-    "resolution": "All memories restored. The city lights up as AI systems come back online. Chip has saved Neo-Tokyo."
-  }
-}
-```'''
+        Raises:
+            LLMError: If the call failed (after retrying retryable failures)
+        """
+        record = CallRecord(
+            agent=self.agent, model=self.model, kind="vision", images=1, mock=not self.transport.live
+        )
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "image_data": base64.b64encode(image_data).decode("ascii"),
+            "mime_type": mime_type,
+            "temperature": temperature or self.temperature,
+            "max_tokens": self.max_output_tokens,
+        }
+        result, record = self._call(self.vision_url, payload, record, prompt)
+
+        text = result.get("text", "")
+        usage = result.get("usage", {})
+        self.total_tokens += usage.get("total_tokens", 0)
+        self.api_calls += 1
 
+        # The proxy's prompt tokens include the image; the record prices it separately
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens:
+            prompt_tokens = max(prompt_tokens - VISION_TOKENS_PER_IMAGE, 0)
         else:
-            # Generic mock
-            return f"""Mock LLM Response for Phase 1 Testing
+            prompt_tokens = estimate_tokens(prompt)
+        self._meter(
+            record,
+            prompt,
+            {"input_tokens": prompt_tokens, "cached_tokens": 0},
+            usage.get("completion_tokens") or estimate_tokens(text),
+        )
+        return text
 
-Prompt received: {prompt[:100]}...
+    def _call(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        record: CallRecord,
+        prompt: str,
+    ) -> Tuple[Dict[str, Any], CallRecord]:
+        """
+        POST payload to a proxy endpoint, retrying retryable failures.
 
-This is a placeholder response.
-In production, this would call Vercel proxy → Gemini API.
+        Returns:
+            (result, record of the successful attempt)
 
-Timestamp: {datetime.now().isoformat()}
-"""
+        Raises:
+            LLMError: On a non-retryable failure or once retries are spent
+                (every failed attempt already metered)
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._post_json(url, payload, record, prompt), record
+            except LLMError as e:
+                e.attempts = attempt + 1
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                print(f"🔁 {e.kind} error ({(str(e).splitlines() or [''])[0]}); "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                record = replace(
+                    record,
+                    retries=record.retries + 1,
+                    project_id=None,
+                    timestamp=datetime.now().isoformat(),
+                )
+
+    def _retry_delay(self, error: LLMError, attempt: int) -> Optional[float]:
+        """Backoff before retrying error (None: give up)."""
+        if not error.retryable or attempt >= self.max_retries:
+            return None
+        delay = LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt
+        if error.retry_after is not None:
+            if error.retry_after > LLM_RETRY_MAX_WAIT_SECONDS:
+                return None
+            delay = max(delay, error.retry_after)
+        return delay
+
+    def _post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        record: CallRecord,
+        prompt: str,
+    ) -> Dict[str, Any]:
+        """
+        POST payload to a proxy endpoint once, timing the call into record.
 
-    def get_cost_estimate(self, model: Optional[str] = None) -> float:
+        Returns:
+            The proxy's JSON result
+
+        Raises:
+            LLMError: Typed by failure (see errors.py), with the failed
+                call already metered
+        """
+        endpoint = endpoint_name(url)
+        started = time.perf_counter()
+        try:
+            response = self.transport.send(url, payload, timeout=30)
+        except ProxyUnavailable as e:
+            self._meter_failure(record, prompt, started, "circuit open")
+            raise LLMUnavailableError(
+                str(e), endpoint=endpoint, elapsed_ms=record.total_ms, retry_after=e.retry_after
+            ) from e
+        except (OSError, http.client.HTTPException) as e:
+            self._meter_failure(record, prompt, started, f"network: {e}")
+            raise LLMNetworkError(
+                f"{e} (is the Vercel proxy running? {url})", endpoint=endpoint, elapsed_ms=record.total_ms
+            ) from e
+        except ReplayMiss as e:
+            self._meter_failure(record, prompt, started, "replay miss")
+            raise LLMReplayError(
+                f"{e} (record it first with CAISO_LLM_TRANSPORT=record)",
+                endpoint=endpoint,
+                elapsed_ms=record.total_ms,
+            ) from e
+        except Exception as e:
+            self._meter_failure(record, prompt, started, f"unexpected: {e}")
+            raise LLMError(f"{type(e).__name__}: {e}", endpoint=endpoint, elapsed_ms=record.total_ms) from e
+
+        record.connect_ms = response.timing.connect_ms
+        record.ttfb_ms = response.timing.ttfb_ms
+        record.total_ms = response.timing.total_ms
+        record.hedged = response.hedged
+        elapsed_ms = record.total_ms
+
+        if response.status >= 400:
+            self._meter(record, prompt, error=f"HTTP {response.status}")
+            details = response.body.decode("utf-8", "replace")[:500]
+            raise LLMHTTPError(
+                f"HTTP {response.status} {response.reason}: {details}",
+                response.status,
+                endpoint=endpoint,
+                elapsed_ms=elapsed_ms,
+            )
+
+        try:
+            result = json.loads(response.body.decode("utf-8"))
+        except ValueError as e:
+            self._meter(record, prompt, error="invalid response")
+            raise LLMResponseError(
+                f"Proxy answer is not JSON: {e}", endpoint=endpoint, elapsed_ms=elapsed_ms
+            ) from e
+
+        if not result.get("success"):
+            error_msg = str(result.get("error", "Unknown error"))
+            self._meter(record, prompt, error=error_msg)
+            raise LLMAPIError(error_msg, endpoint=endpoint, elapsed_ms=elapsed_ms)
+
+        return result
+
+    def _meter_failure(self, record: CallRecord, prompt: str, started: float, error: str):
+        """Meter a call that got no response, with the time it took."""
+        record.total_ms = (time.perf_counter() - started) * 1000
+        self._meter(record, prompt, error=error)
+
+    def _meter(
+        self,
+        record: CallRecord,
+        prompt: str,
+        usage: Optional[Dict[str, int]] = None,
+        output_tokens: int = 0,
+        error: Optional[str] = None,
+    ):
+        """Complete and store the metering record of one call."""
+        if usage is None:
+            usage = {"input_tokens": estimate_tokens(prompt), "cached_tokens": 0}
+        record.input_tokens = usage["input_tokens"]
+        record.cached_tokens = usage["cached_tokens"]
+        record.cache_hit = usage["cached_tokens"] > 0
+        record.output_tokens = output_tokens
+        record.ok = error is None
+        record.error = error
+        meter.record(record)
+        self.calls.append(record)
+
+        current = tracer.current()
+        if current is not None and current.name == "llm.generate":
+            current.set(
+                agent=record.agent,
+                model=record.model,
+                input_tokens=record.input_tokens,
+                cached_tokens=record.cached_tokens,
+                output_tokens=record.output_tokens,
+                ok=record.ok,
+            )
+
+    def get_cost_estimate(self, model: Optional[str] = None, simulated: bool = False) -> float:
         """
-        Estimate cost based on tokens used.
+        Cost of this service's billed calls (failed and mock calls cost nothing).
+
+        Input, cached input and output tokens are priced separately per
+        model (see metering.py).
+
+        Args:
+            model: Price the same calls as if made with this model
+            simulated: Price the mock calls instead (what they would have
+                cost live, from estimated tokens)
 
         Returns:
             Estimated cost in USD
         """
-        model = model or self.model
+        return sum(
+            record.price(model) for record in self.calls if record.ok and record.mock == simulated
+        )
 
-        if "pro" in model.lower():
-            cost_per_1m = 1.25
-        else:  # flash
-            cost_per_1m = 0.075
+    def cached_prefix(self, prefix: str) -> Optional[CachedPrefix]:
+        """
+        Handle for a cached prompt prefix, registering it on first use.
 
-        return (self.total_tokens / 1_000_000) * cost_per_1m
+        Returns None for prefixes below the model's minimum cacheable size
+        (PREFIX_CACHE_MIN_TOKENS), ones the provider refused and any once
+        prefix caching is disabled (those calls send the whole prompt).
+        """
+        if not self.prefix_cache.supported:
+            return None
+        key = prefix_key(self.model, prefix)
+        with self._prefix_lock:
+            if key in self._prefixes:
+                handle = self._prefixes[key]
+                if handle is None or not handle.expired:
+                    return handle
+            handle = None
+            if estimate_tokens(prefix) >= min_cacheable_tokens(self.model):
+                handle = self.prefix_cache.register(self.model, prefix, PREFIX_CACHE_TTL_SECONDS)
+            self._prefixes[key] = handle
+            return handle
+
+    def _track_input(
+        self,
+        prompt: str,
+        handle: Optional[CachedPrefix],
+        prompt_tokens: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Record cached vs. uncached input tokens (reported by the proxy, else estimated)."""
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(prompt)
+        if cached_tokens is None:
+            cached_tokens = handle.tokens if handle else 0
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        usage = {
+            "input_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "uncached_tokens": prompt_tokens - cached_tokens,
+        }
+        with self._prefix_lock:
+            self.last_usage = usage
+            self.cache_hits += 1 if cached_tokens else 0
+            self.cached_input_tokens += usage["cached_tokens"]
+            self.uncached_input_tokens += usage["uncached_tokens"]
+        return usage
+
+    def track_repair(
+        self,
+        calls: int = 0,
+        tokens: int = 0,
+        full_retry_tokens: int = 0,
+        retry_tokens_avoided: int = 0,
+    ):
+        """Record JSON repair work (fragment re-asks and full retries)."""
+        self.repair_calls += calls
+        self.repair_tokens += tokens
+        if full_retry_tokens:
+            self.full_retries += 1
+            self.full_retry_tokens += full_retry_tokens
+        self.retry_tokens_avoided += retry_tokens_avoided
 
     def get_stats(self) -> Dict[str, Any]:
         """Get usage statistics."""
@@ -360,7 +535,36 @@ Timestamp: {datetime.now().isoformat()}
             "api_calls": self.api_calls,
             "total_tokens": self.total_tokens,
             "estimated_cost_usd": self.get_cost_estimate(),
+            "simulated_cost_usd": self.get_cost_estimate(simulated=True),
             "model": self.model,
+            "calls": len(self.calls),
+            "time_ms": round(sum(record.total_ms for record in self.calls), 1),
+            "prefix_cache": {
+                "prefixes": sum(handle is not None for handle in self._prefixes.values()),
+                "hits": self.cache_hits,
+                "cached_input_tokens": self.cached_input_tokens,
+                "uncached_input_tokens": self.uncached_input_tokens,
+            },
+            "repairs": {
+                "fragment_calls": self.repair_calls,
+                "fragment_tokens": self.repair_tokens,
+                "full_retries": self.full_retries,
+                "full_retry_tokens": self.full_retry_tokens,
+                "retry_tokens_avoided": self.retry_tokens_avoided,
+            },
+            "hedging": self._hedging_stats(),
+            "endpoints": proxy_pool.stats() if self.transport.live else {},
+        }
+
+    def _hedging_stats(self) -> Dict[str, Any]:
+        """Hedge counters plus what the duplicates cost (half a hedged call's price)."""
+        if self.hedger is None:
+            return {"enabled": False}
+        hedged = [record for record in self.calls if record.hedged and record.ok and not record.mock]
+        return {
+            "enabled": True,
+            **self.hedger.stats.to_json(),
+            "extra_cost_usd": sum(record.price() for record in hedged) / 2,
         }
 
 
@@ -0,0 +1,305 @@
+"""
+Metering - Per-call cost and latency records for every model call
+
+Each text, image (Imagen) or vision call produces one CallRecord: model,
+input/cached/output tokens, images, latency breakdown (connect, time to
+first byte, total), prefix cache hit, retries and priced cost. Records
+are attributed to the calling agent and the current project, collected in
+the process-wide `meter`, and can be aggregated (per agent, project,
+model or kind) or exported as JSONL. With CAISO_METERING_LOG set, every
+record is also appended to that file as it happens.
+
+Pricing is per model and per token class (input, cached input, output)
+instead of one blended rate; Imagen is priced per image and vision calls
+count each image as VISION_TOKENS_PER_IMAGE input tokens. Hedged calls
+(see hedging.py) are priced as two calls.
+
+Records of mock-mode calls are priced from estimated tokens, so spend can
+be profiled offline, but they are flagged mock=True and never count as
+real spend: summary() reports their cost as simulated_cost_usd next to
+the billed cost_usd (LLMService.get_cost_estimate applies the same
+rule), and format_summary() marks simulated figures.
+"""
+
+import http.client
+import json
+import math
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .constants import (
+    CACHED_INPUT_COST_RATIO,
+    GEMINI_FLASH_COST_PER_1M_TOKENS,
+    GEMINI_FLASH_MODEL,
+    GEMINI_FLASH_OUTPUT_COST_PER_1M_TOKENS,
+    GEMINI_PRO_COST_PER_1M_TOKENS,
+    GEMINI_PRO_MODEL,
+    GEMINI_PRO_OUTPUT_COST_PER_1M_TOKENS,
+    IMAGEN_4_COST_PER_IMAGE,
+    IMAGEN_4_MODEL,
+    METERING_LOG_PATH,
+    VISION_TOKENS_PER_IMAGE,
+)
+from .context import context_manager
+
+
+# USD per 1M tokens: (input, output)
+TOKEN_PRICES: Dict[str, Tuple[float, float]] = {
+    GEMINI_PRO_MODEL: (GEMINI_PRO_COST_PER_1M_TOKENS, GEMINI_PRO_OUTPUT_COST_PER_1M_TOKENS),
+    GEMINI_FLASH_MODEL: (GEMINI_FLASH_COST_PER_1M_TOKENS, GEMINI_FLASH_OUTPUT_COST_PER_1M_TOKENS),
+}
+
+# USD per generated image
+IMAGE_PRICES: Dict[str, float] = {
+    IMAGEN_4_MODEL: IMAGEN_4_COST_PER_IMAGE,
+}
+
+
+def token_prices(model: str) -> Tuple[float, float]:
+    """(input, output) USD per 1M tokens; unknown models use their family's price."""
+    if model in TOKEN_PRICES:
+        return TOKEN_PRICES[model]
+    family = GEMINI_FLASH_MODEL if "flash" in model.lower() else GEMINI_PRO_MODEL
+    return TOKEN_PRICES[family]
+
+
+@dataclass
+class CallRecord:
+    """One metered model call."""
+
+    agent: str
+    model: str
+    kind: str = "text"                  # text | image | vision
+    project_id: Optional[str] = None
+    input_tokens: int = 0               # including cached tokens
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    images: int = 0                     # generated (image) or analyzed (vision)
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    total_ms: float = 0.0
+    cache_hit: bool = False
+    retries: int = 0                    # earlier attempts this call repeats
+    ok: bool = True
+    error: Optional[str] = None
+    mock: bool = False
+    hedged: bool = False                # a duplicate request was sent (billed twice)
+    cost_usd: float = 0.0
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def price(self, model: Optional[str] = None) -> float:
+        """Cost in USD (optionally as if made with another model)."""
+        model = model or self.model
+        if self.kind == "image":
+            return IMAGE_PRICES.get(model, IMAGEN_4_COST_PER_IMAGE) * self.images
+        input_price, output_price = token_prices(model)
+        input_tokens = self.input_tokens
+        if self.kind == "vision":
+            input_tokens += self.images * VISION_TOKENS_PER_IMAGE
+        uncached = input_tokens - self.cached_tokens
+        cost = (
+            uncached * input_price
+            + self.cached_tokens * input_price * CACHED_INPUT_COST_RATIO
+            + self.output_tokens * output_price
+        ) / 1_000_000
+        # The proxy does not abort Gemini when the losing request is cancelled
+        return cost * 2 if self.hedged else cost
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Timing:
+    """Latency breakdown of one HTTP call (milliseconds)."""
+
+    connect_ms: float
+    ttfb_ms: float
+    total_ms: float
+
+
+def timed_post(
+    url: str,
+    body: bytes,
+    headers: Dict[str, str],
+    timeout: float,
+    on_connection: Optional[Callable[[http.client.HTTPConnection], None]] = None,
+    connect_timeout: Optional[float] = None,
+) -> Tuple[int, str, bytes, Timing]:
+    """
+    POST with http.client, timing connect, first byte and total.
+
+    connect_timeout (default: timeout) bounds connecting; timeout bounds
+    each read after that.
+
+    on_connection receives the connection before it connects (so another
+    thread can abort the call by shutting down its socket).
+
+    Returns:
+        (status, reason, body, timing); HTTP errors are returned, not raised
+
+    Raises:
+        OSError / http.client.HTTPException: On connection failures
+    """
+    parts = urllib.parse.urlsplit(url)
+    connection_cls = (
+        http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    )
+    connection = connection_cls(parts.hostname, parts.port, timeout=connect_timeout or timeout)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    if on_connection is not None:
+        on_connection(connection)
+    try:
+        started = time.perf_counter()
+        connection.connect()
+        connected = time.perf_counter()
+        connection.sock.settimeout(timeout)
+        connection.request("POST", path, body=body, headers=headers)
+        response = connection.getresponse()
+        first_byte = time.perf_counter()
+        data = response.read()
+        finished = time.perf_counter()
+    finally:
+        connection.close()
+
+    timing = Timing(
+        connect_ms=(connected - started) * 1000,
+        ttfb_ms=(first_byte - started) * 1000,
+        total_ms=(finished - started) * 1000,
+    )
+    return response.status, response.reason, data, timing
+
+
+class Meter:
+    """Collects CallRecords for the process (see module docstring)."""
+
+    def __init__(self, log_path: Optional[Union[str, Path]] = METERING_LOG_PATH):
+        self.records: List[CallRecord] = []
+        self.log_path = Path(log_path) if log_path else None
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> CallRecord:
+        """Price, attribute and store a record."""
+        if record.project_id is None:
+            record.project_id = _current_project()
+        record.cost_usd = round(record.price(), 8) if record.ok else 0.0
+        with self._lock:
+            self.records.append(record)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record.to_json()) + "\n")
+        return record
+
+    def summary(
+        self,
+        by: str = "agent",
+        records: Optional[Iterable[CallRecord]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate records by a CallRecord field (agent, project_id, model, kind).
+
+        Groups are ordered by total time, so the agents that dominate
+        latency come first; share_* give each group's fraction of the total.
+        """
+        with self._lock:
+            records = list(self.records if records is None else records)
+
+        groups: Dict[str, List[CallRecord]] = {}
+        for record in records:
+            groups.setdefault(str(getattr(record, by)), []).append(record)
+
+        total_ms = sum(record.total_ms for record in records) or 1.0
+        total_cost = sum(record.cost_usd for record in records) or 1.0
+        summary = {}
+        for key, group in sorted(groups.items(), key=lambda item: -sum(r.total_ms for r in item[1])):
+            latencies = sorted(record.total_ms for record in group)
+            time_ms = sum(latencies)
+            cost = sum(record.cost_usd for record in group if not record.mock)
+            simulated = sum(record.cost_usd for record in group if record.mock)
+            summary[key] = {
+                "calls": len(group),
+                "mock_calls": sum(record.mock for record in group),
+                "errors": sum(not record.ok for record in group),
+                "retries": sum(record.retries for record in group),
+                "cache_hits": sum(record.cache_hit for record in group),
+                "hedged": sum(record.hedged for record in group),
+                "input_tokens": sum(record.input_tokens for record in group),
+                "cached_tokens": sum(record.cached_tokens for record in group),
+                "output_tokens": sum(record.output_tokens for record in group),
+                "images": sum(record.images for record in group),
+                "cost_usd": round(cost, 6),                 # billed
+                "simulated_cost_usd": round(simulated, 6),  # mock calls
+                "time_ms": round(time_ms, 1),
+                "p50_ms": round(_percentile(latencies, 0.5), 1),
+                "p95_ms": round(_percentile(latencies, 0.95), 1),
+                "mean_ttfb_ms": round(sum(r.ttfb_ms for r in group) / len(group), 1),
+                "share_time": round(time_ms / total_ms, 3),
+                "share_cost": round((cost + simulated) / total_cost, 3),
+            }
+        return summary
+
+    def export_jsonl(self, path: Union[str, Path], records: Optional[Iterable[CallRecord]] = None) -> int:
+        """Write records (default: all) as JSONL; returns the number written."""
+        with self._lock:
+            records = list(self.records if records is None else records)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record.to_json()) + "\n")
+        return len(records)
+
+    def for_project(self, project_id: str) -> List[CallRecord]:
+        with self._lock:
+            return [record for record in self.records if record.project_id == project_id]
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+
+
+def load_jsonl(path: Union[str, Path]) -> List[CallRecord]:
+    """Read records written by export_jsonl() or the metering log."""
+    with open(path, encoding="utf-8") as f:
+        return [CallRecord(**json.loads(line)) for line in f if line.strip()]
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Table of a summary() result (simulated mock-call costs marked with *)."""
+    lines = [f"{'':<28} {'calls':>5} {'time s':>8} {'p95 ms':>8} {'tokens in/out':>15} {'cost $':>10}"]
+    simulated = False
+    for key, row in summary.items():
+        tokens = f"{row['input_tokens']:,}/{row['output_tokens']:,}"
+        cost = f"{row['cost_usd']:.4f} "
+        if row.get("simulated_cost_usd"):
+            cost = f"{row['cost_usd'] + row['simulated_cost_usd']:.4f}*"
+            simulated = True
+        lines.append(
+            f"{key[:28]:<28} {row['calls']:>5} {row['time_ms'] / 1000:>8.2f} "
+            f"{row['p95_ms']:>8.0f} {tokens:>15} {cost:>10}"
+        )
+    if simulated:
+        lines.append("* includes simulated cost of mock calls (not billed)")
+    return "\n".join(lines)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    low, high = math.floor(position), math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _current_project() -> Optional[str]:
+    try:
+        return context_manager.get().project_id
+    except RuntimeError:
+        return None
+
+
+# Process-wide meter
+meter = Meter()
@@ -0,0 +1,102 @@
+"""
+Prefix Cache - Provider-side context caching for shared prompt prefixes
+
+Agents resend the same instruction preamble and concept summary with every
+call. Gemini can cache such a prefix once (cachedContents) and let later
+calls reference it by name: cached input tokens are billed at a discount
+and do not have to be processed again, which cuts time-to-first-token.
+
+ProxyPrefixCache registers prefixes through the Vercel proxy
+(POST {"model", "contents", "ttl_seconds"} -> {"success", "name", "tokens"})
+using LLMService's transport, so mock runs use the synthetic transport's
+cache and replays serve recorded registrations.
+
+LLMService keeps one handle per (model, prefix) and re-registers expired
+ones; see LLMService.generate(cache_prefix=...). Prefixes below the
+model's minimum cacheable size (min_cacheable_tokens(), thousands of
+tokens) are never registered; when the proxy refuses a prefix, calls
+simply send the full prompt. A proxy deployed without api/gemini/cache.js (HTTP
+404) disables registration for the rest of the run, as does one whose
+generate endpoint does not echo cached_content back: its answers would
+have been produced without the prefix.
+"""
+
+import hashlib
+import http.client
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .constants import GEMINI_FLASH_MODEL, GEMINI_PRO_MODEL, PREFIX_CACHE_MIN_TOKENS
+from .token_budget import estimate_tokens
+from .transports import ReplayMiss, Transport
+
+
+@dataclass(frozen=True)
+class CachedPrefix:
+    """Handle for a registered prompt prefix."""
+
+    name: str                   # "cachedContents/..."
+    prefix: str
+    tokens: int                 # input tokens served from the cache per call
+    expires_at: float           # time.time()
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+def min_cacheable_tokens(model: str) -> int:
+    """Smallest prefix the provider caches for model; unknown models use their family's."""
+    if model in PREFIX_CACHE_MIN_TOKENS:
+        return PREFIX_CACHE_MIN_TOKENS[model]
+    family = GEMINI_FLASH_MODEL if "flash" in model.lower() else GEMINI_PRO_MODEL
+    return PREFIX_CACHE_MIN_TOKENS[family]
+
+
+def prefix_key(model: str, prefix: str) -> str:
+    """Stable key of a prefix for one model."""
+    return hashlib.sha256(f"{model}\0{prefix}".encode("utf-8")).hexdigest()
+
+
+class ProxyPrefixCache:
+    """Registers prefixes as Gemini cachedContents through the proxy."""
+
+    def __init__(self, endpoint: str, transport: Transport, timeout: float = 30):
+        self.endpoint = endpoint
+        self.transport = transport
+        self.timeout = timeout
+        self.supported = True
+
+    def disable(self, reason: str):
+        """Stop registering prefixes (the proxy cannot serve them)."""
+        if self.supported:
+            self.supported = False
+            print(f"⚠️  Prefix caching disabled: {reason}")
+
+    def register(self, model: str, prefix: str, ttl_seconds: int) -> Optional[CachedPrefix]:
+        """Handle for prefix, or None if the proxy refused (too short, unsupported...)."""
+        if not self.supported:
+            return None
+        payload = {"model": model, "contents": prefix, "ttl_seconds": ttl_seconds}
+        try:
+            response = self.transport.send(self.endpoint, payload, timeout=self.timeout)
+            if response.status in (404, 405):
+                self.disable(f"no cache endpoint at {self.endpoint}")
+                return None
+            if response.status >= 400:
+                raise ValueError(f"HTTP {response.status}: {response.reason}")
+            result = json.loads(response.body.decode("utf-8"))
+        except (OSError, http.client.HTTPException, ReplayMiss, ValueError) as e:
+            print(f"⚠️  Prefix cache registration failed: {e}")
+            return None
+
+        if not result.get("success") or not result.get("name"):
+            return None
+        return CachedPrefix(
+            name=result["name"],
+            prefix=prefix,
+            tokens=result.get("tokens") or estimate_tokens(prefix),
+            expires_at=time.time() + ttl_seconds,
+        )
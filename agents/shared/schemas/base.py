@@ -0,0 +1,401 @@
+"""
+Schema base - Frozen, slotted schema classes with compiled JSON validators.
+
+Decorate a Schema subclass with @schema to turn it into a frozen, slotted
+dataclass with:
+
+- Cls.from_json(data)  -> instance (raises SchemaError listing every error)
+- Cls.validate(data)   -> list of error strings (empty if valid)
+- obj.to_json()        -> camelCase JSON dict
+
+Field names are snake_case in Python and camelCase in JSON. Unknown JSON
+keys are ignored. Optional fields whose value is None are left out of
+to_json().
+
+Validators are generated as Python source once, when the class is
+decorated, and compiled with exec() (like dataclasses does for __init__).
+There is no per-call reflection: each field check is a couple of inlined
+type() comparisons, and error paths are only formatted when a check fails.
+
+Supported field types: str, int, float (accepts ints), bool, Any,
+Optional[X], List[X], Tuple[X, ...] (JSON arrays; tuples keep instances
+immutable), Dict[str, X] and other @schema classes.
+
+Error paths ("levels[2].layout.goal") can be mapped back to a field type
+with parse_path()/type_at(), and json_shape() renders the JSON shape a type
+expects (used to ask an LLM for a single broken fragment).
+"""
+
+import dataclasses
+import re
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..tracing import traced
+
+
+class SchemaError(ValueError):
+    """Data did not match a schema; .errors holds every problem found."""
+
+    def __init__(self, schema_name: str, errors: List[str]):
+        self.schema_name = schema_name
+        self.errors = errors
+        super().__init__(f"Invalid {schema_name}: {summarize_errors(errors)}")
+
+
+def summarize_errors(errors: List[str]) -> str:
+    """First error plus a count of the rest, for one-line reports."""
+    extra = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+    return f"{errors[0]}{extra}"
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+_JSON_TYPE_NAMES = {
+    dict: "object",
+    list: "array",
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    type(None): "null",
+}
+
+# Inlined type checks: (condition that is True when the value is WRONG, expected name)
+_PRIMITIVE_CHECKS = {
+    str: ("type({v}) is not str", "string"),
+    int: ("type({v}) is not int", "integer"),
+    float: ("type({v}) is not float and type({v}) is not int", "number"),
+    bool: ("type({v}) is not bool", "boolean"),
+}
+
+
+def _json_type(value: Any) -> str:
+    return _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def camel_case(name: str) -> str:
+    """snake_case -> camelCase."""
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+_PATH_PART = re.compile(r"\[(\d+)\]|\.?([^.\[]+)")
+
+_SHAPE_NAMES = {str: "<string>", int: "<integer>", float: "<number>", bool: "<boolean>"}
+
+
+def parse_path(path: str) -> Tuple[Union[str, int], ...]:
+    """Error path -> parts: "levels[2].layout.goal" -> ("levels", 2, "layout", "goal")."""
+    if path in ("", "root"):
+        return ()
+    return tuple(
+        int(index) if index else key
+        for index, key in _PATH_PART.findall(path)
+    )
+
+
+def format_path(parts: Tuple[Union[str, int], ...]) -> str:
+    """Inverse of parse_path()."""
+    out = ""
+    for part in parts:
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out or "root"
+
+
+def type_at(tp: Any, parts: Tuple[Union[str, int], ...]) -> Optional[Any]:
+    """Field type found by following parts from tp (None if the path leaves the schema)."""
+    for part in parts:
+        tp = _strip_optional(tp)
+        origin = typing.get_origin(tp)
+        args = typing.get_args(tp)
+        if isinstance(part, int):
+            if not (origin in (list, tuple) or tp in (list, tuple, List, Tuple)):
+                return None
+            tp = args[0] if args else Any
+        elif isinstance(tp, type) and issubclass(tp, Schema):
+            if part not in tp.JSON_TYPES:
+                return None
+            tp = tp.JSON_TYPES[part]
+        elif origin is dict or tp in (dict, Dict):
+            tp = args[1] if len(args) == 2 else Any
+        elif tp is not Any:
+            return None
+    return tp
+
+
+def json_shape(tp: Any) -> Any:
+    """JSON value showing the shape tp expects, with "<type>" placeholders."""
+    tp = _strip_optional(tp)
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if tp in _SHAPE_NAMES:
+        return _SHAPE_NAMES[tp]
+    if isinstance(tp, type) and issubclass(tp, Schema):
+        return {key: json_shape(field_tp) for key, field_tp in tp.JSON_TYPES.items()}
+    if origin in (list, tuple) or tp in (list, tuple, List, Tuple):
+        return [json_shape(args[0] if args else Any)]
+    if origin is dict or tp in (dict, Dict):
+        return {"<key>": json_shape(args[1] if len(args) == 2 else Any)}
+    return "<any>"
+
+
+def _strip_optional(tp: Any) -> Any:
+    if typing.get_origin(tp) is typing.Union:
+        inner = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return inner[0] if len(inner) == 1 else Any
+    return tp
+
+
+class Schema:
+    """Base class for @schema classes (see module docstring)."""
+
+    __slots__ = ()
+
+    JSON_KEYS: typing.ClassVar[Dict[str, str]] = {}
+    JSON_TYPES: typing.ClassVar[Dict[str, Any]] = {}   # JSON key -> field type
+
+    @classmethod
+    def from_json(cls, data: Any):
+        """Build an instance from parsed JSON; raises SchemaError."""
+        errors: List[str] = []
+        obj = cls._from_json(data, "", errors)
+        if errors:
+            raise SchemaError(cls.__name__, errors)
+        return obj
+
+    @classmethod
+    @traced("schema.validate")
+    def validate(cls, data: Any) -> List[str]:
+        """All schema errors in data (empty list if valid)."""
+        errors: List[str] = []
+        cls._from_json(data, "", errors)
+        return errors
+
+    @classmethod
+    def _from_json(cls, data: Any, path: str, errors: List[str]):  # replaced by @schema
+        raise NotImplementedError
+
+    def to_json(self) -> Dict[str, Any]:  # replaced by @schema
+        raise NotImplementedError
+
+
+def schema(cls):
+    """Make cls a frozen, slotted dataclass with compiled from_json/to_json."""
+    if not issubclass(cls, Schema):
+        raise TypeError(f"@schema class {cls.__name__} must subclass Schema")
+    cls = dataclasses.dataclass(frozen=True, slots=True)(cls)
+    _Compiler(cls).compile()
+    return cls
+
+
+class _Compiler:
+    """Generates _from_json/to_json source for one schema class."""
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.hints = typing.get_type_hints(cls)
+        self.fields = dataclasses.fields(cls)
+        self.namespace: Dict[str, Any] = {
+            "MISSING": MISSING,
+            "_json_type": _json_type,
+            "cls": cls,
+        }
+        self.counter = 0
+
+    def compile(self):
+        cls = self.cls
+        cls.JSON_KEYS = {f.name: camel_case(f.name) for f in self.fields}
+        cls.JSON_TYPES = {cls.JSON_KEYS[f.name]: self.hints[f.name] for f in self.fields}
+
+        source = "\n".join(self._from_json_source() + [""] + self._to_json_source())
+        exec(compile(source, f"<schema {cls.__qualname__}>", "exec"), self.namespace)
+
+        from_json = self.namespace["_from_json"]
+        from_json.__qualname__ = f"{cls.__qualname__}._from_json"
+        cls._from_json = staticmethod(from_json)
+        to_json = self.namespace["to_json"]
+        to_json.__qualname__ = f"{cls.__qualname__}.to_json"
+        to_json.__doc__ = Schema.to_json.__doc__
+        cls.to_json = to_json
+        cls.__schema_source__ = source
+
+    # ------------------------------------------------------------------
+    # from_json
+    # ------------------------------------------------------------------
+
+    def _from_json_source(self) -> List[str]:
+        lines = [
+            "def _from_json(data, path, errors):",
+            "    if type(data) is not dict:",
+            "        errors.append(f\"{path[:-1] or 'root'}: expected object, got {_json_type(data)}\")",
+            "        return MISSING",
+            "    ok = True",
+        ]
+        args = []
+        for f in self.fields:
+            key = self.cls.JSON_KEYS[f.name]
+            var = f"f_{f.name}"
+            args.append(var)
+            lines.append(f"    {var} = data.get({key!r}, MISSING)")
+            lines.append(f"    if {var} is MISSING:")
+            if f.default is not dataclasses.MISSING:
+                default = self._const(f.default)
+                lines.append(f"        {var} = {default}")
+            elif f.default_factory is not dataclasses.MISSING:
+                factory = self._const(f.default_factory)
+                lines.append(f"        {var} = {factory}()")
+            else:
+                lines.append(f"        errors.append(f\"{{path}}{key}: required\")")
+                lines.append("        ok = False")
+            body = self._check(self.hints[f.name], var, f"{{path}}{key}", 2)
+            if body:
+                lines.append("    else:")
+                lines.extend(body)
+        lines.append("    if not ok:")
+        lines.append("        return MISSING")
+        lines.append(f"    return cls({', '.join(args)})")
+        return lines
+
+    def _check(self, tp: Any, var: str, path: str, depth: int) -> List[str]:
+        """Statements that check `var` (converting it in place) against tp."""
+        pad = "    " * depth
+        origin = typing.get_origin(tp)
+        args = typing.get_args(tp)
+
+        if tp is Any:
+            return []
+
+        if tp in _PRIMITIVE_CHECKS:
+            condition, expected = _PRIMITIVE_CHECKS[tp]
+            return [
+                f"{pad}if {condition.format(v=var)}:",
+                f"{pad}    errors.append(f\"{path}: expected {expected}, got {{_json_type({var})}}\")",
+                f"{pad}    ok = False",
+            ]
+
+        if origin is typing.Union and type(None) in args:
+            inner = [arg for arg in args if arg is not type(None)]
+            inner_tp = inner[0] if len(inner) == 1 else Any
+            body = self._check(inner_tp, var, path, depth + 1)
+            return [f"{pad}if {var} is not None:"] + body if body else []
+
+        if isinstance(tp, type) and issubclass(tp, Schema):
+            name = self._const(tp)
+            return [
+                f"{pad}{var} = {name}._from_json({var}, f\"{path}.\", errors)",
+                f"{pad}if {var} is MISSING:",
+                f"{pad}    ok = False",
+            ]
+
+        if origin in (list, tuple) or tp in (list, tuple, List, Tuple):
+            item_tp = args[0] if args else Any
+            as_tuple = origin is tuple or tp in (tuple, Tuple)
+            lines = [
+                f"{pad}if type({var}) is not list:",
+                f"{pad}    errors.append(f\"{path}: expected array, got {{_json_type({var})}}\")",
+                f"{pad}    ok = False",
+            ]
+            item, index, out = self._var("item"), self._var("i"), self._var("out")
+            body = self._check(item_tp, item, f"{path}[{{{index}}}]", depth + 2)
+            if not body:
+                if as_tuple:
+                    lines += [f"{pad}else:", f"{pad}    {var} = tuple({var})"]
+                return lines
+            lines += [
+                f"{pad}else:",
+                f"{pad}    {out} = []",
+                f"{pad}    for {index}, {item} in enumerate({var}):",
+            ]
+            lines += body
+            lines.append(f"{pad}        {out}.append({item})")
+            lines.append(f"{pad}    {var} = {'tuple(' + out + ')' if as_tuple else out}")
+            return lines
+
+        if origin is dict or tp in (dict, Dict):
+            value_tp = args[1] if len(args) == 2 else Any
+            lines = [
+                f"{pad}if type({var}) is not dict:",
+                f"{pad}    errors.append(f\"{path}: expected object, got {{_json_type({var})}}\")",
+                f"{pad}    ok = False",
+            ]
+            key, value, out = self._var("key"), self._var("value"), self._var("out")
+            body = self._check(value_tp, value, f"{path}.{{{key}}}", depth + 2)
+            if not body:
+                return lines
+            lines += [
+                f"{pad}else:",
+                f"{pad}    {out} = {{}}",
+                f"{pad}    for {key}, {value} in {var}.items():",
+            ]
+            lines += body
+            lines.append(f"{pad}        {out}[{key}] = {value}")
+            lines.append(f"{pad}    {var} = {out}")
+            return lines
+
+        raise TypeError(f"{self.cls.__name__}: unsupported schema field type {tp!r}")
+
+    # ------------------------------------------------------------------
+    # to_json
+    # ------------------------------------------------------------------
+
+    def _to_json_source(self) -> List[str]:
+        lines = ["def to_json(self):", "    out = {}"]
+        for f in self.fields:
+            key = self.cls.JSON_KEYS[f.name]
+            tp = self.hints[f.name]
+            omit_none = f.default is None
+            if omit_none:
+                lines.append(f"    value = self.{f.name}")
+                lines.append("    if value is not None:")
+                lines.append(f"        out[{key!r}] = {self._dump(tp, 'value')}")
+            else:
+                lines.append(f"    out[{key!r}] = {self._dump(tp, 'self.' + f.name)}")
+        lines.append("    return out")
+        return lines
+
+    def _dump(self, tp: Any, expr: str) -> str:
+        """Expression converting `expr` (of type tp) to JSON values."""
+        origin = typing.get_origin(tp)
+        args = typing.get_args(tp)
+
+        if origin is typing.Union and type(None) in args:
+            inner = [arg for arg in args if arg is not type(None)]
+            if len(inner) != 1:
+                return expr
+            dumped = self._dump(inner[0], expr)
+            return expr if dumped == expr else f"(None if {expr} is None else {dumped})"
+
+        if isinstance(tp, type) and issubclass(tp, Schema):
+            return f"{expr}.to_json()"
+
+        if origin in (list, tuple) or tp in (list, tuple, List, Tuple):
+            item = self._var("item")
+            dumped = self._dump(args[0] if args else Any, item)
+            return f"[{dumped} for {item} in {expr}]" if dumped != item else f"list({expr})"
+
+        if origin is dict and len(args) == 2:
+            key, value = self._var("key"), self._var("value")
+            dumped = self._dump(args[1], value)
+            if dumped != value:
+                return f"{{{key}: {dumped} for {key}, {value} in {expr}.items()}}"
+
+        return expr
+
+    # ------------------------------------------------------------------
+
+    def _var(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def _const(self, value: Any) -> str:
+        name = self._var("const")
+        self.namespace[name] = value
+        return name
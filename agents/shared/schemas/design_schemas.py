@@ -1,14 +1,18 @@
 """
 JSON Schemas for Design Team outputs.
 에이전트들이 생성하는 JSON의 타입 정의.
+
+All classes are frozen, slotted @schema classes (see base.py):
+Level.from_json(data), Level.validate(data), level.to_json().
 """
 
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.schemas.base import Schema, SchemaError, schema, summarize_errors
 
 
-@dataclass
-class Ability:
+@schema
+class Ability(Schema):
     """플레이어 능력."""
 
     id: str
@@ -18,17 +22,34 @@ class Ability:
     cooldown: Optional[float] = None  # seconds
 
 
-@dataclass
-class ConceptDesignOutput:
+@schema
+class Concept(Schema):
+    """게임 컨셉."""
+
+    title: str
+    genre: str
+    tagline: str
+    core_loop: Tuple[str, ...]
+    player_abilities: Tuple[Ability, ...]
+    mechanics: Dict[str, List[str]]  # primary, secondary, unique
+    win_condition: str
+    lose_condition: str
+    estimated_playtime: float  # minutes
+    progression_system: Optional[Dict[str, str]] = None
+    difficulty_curve: Optional[Dict[str, str]] = None
+
+
+@schema
+class ConceptDesignOutput(Schema):
     """Concept Designer 출력 스키마."""
 
-    concept: Dict[str, Any]  # Full concept object
+    concept: Concept
     design_rationale: str
-    reference_games: List[str]
+    reference_games: Tuple[str, ...]
 
 
-@dataclass
-class Platform:
+@schema
+class Platform(Schema):
     """레벨 플랫폼."""
 
     x: float
@@ -39,8 +60,8 @@ class Platform:
     properties: Optional[Dict[str, Any]] = None
 
 
-@dataclass
-class Enemy:
+@schema
+class Enemy(Schema):
     """레벨 적."""
 
     x: float
@@ -51,8 +72,8 @@ class Enemy:
     health: Optional[int] = None
 
 
-@dataclass
-class Collectible:
+@schema
+class Collectible(Schema):
     """수집 아이템."""
 
     x: float
@@ -62,46 +83,76 @@ class Collectible:
     required: bool = False
 
 
-@dataclass
-class Level:
+@schema
+class Point(Schema):
+    """레벨 좌표 (goal, spawn)."""
+
+    x: float
+    y: float
+
+
+@schema
+class LevelLayout(Schema):
+    """레벨 레이아웃."""
+
+    width: float
+    height: float
+    platforms: Tuple[Platform, ...]
+    goal: Point
+    enemies: Tuple[Enemy, ...] = ()
+    collectibles: Tuple[Collectible, ...] = ()
+    spawn: Optional[Point] = None
+
+
+@schema
+class Level(Schema):
     """레벨 정의."""
 
     id: str
     name: str
     difficulty: int  # 1-10
     theme: str
-    layout: Dict[str, Any]  # Platforms, enemies, collectibles
+    layout: LevelLayout
     mechanics: Dict[str, List[str]]  # introduced, required
     estimated_completion_time: str
-    skill_requirements: List[str]
+    skill_requirements: Tuple[str, ...]
 
 
-@dataclass
-class LevelDesignOutput:
+@schema
+class LevelDesignOutput(Schema):
     """Level Designer 출력 스키마."""
 
-    levels: List[Level]
+    levels: Tuple[Level, ...]
     difficulty_progression: Dict[str, str]
     total_estimated_playtime: int  # minutes
 
 
-@dataclass
-class Character:
+@schema
+class Character(Schema):
     """캐릭터 정의."""
 
     name: str
     description: str
-    personality: List[str]
-    motivation: str
+    personality: Tuple[str, ...]
+    motivation: Optional[str] = None  # NPCs may only have a role
     backstory: Optional[str] = None
+    role: Optional[str] = None
+
+
+@schema
+class Cast(Schema):
+    """등장인물 (주인공 + NPC)."""
+
+    protagonist: Character
+    npcs: Tuple[Character, ...] = ()
 
 
-@dataclass
-class NarrativeOutput:
+@schema
+class NarrativeOutput(Schema):
     """Narrative Designer 출력 스키마."""
 
     world_setting: Dict[str, str]
-    characters: Dict[str, Character]
+    characters: Cast
     dialogue: Dict[str, Any]
     story_beats: Optional[Dict[str, str]] = None
 
@@ -0,0 +1,148 @@
+"""
+Prompt Templates - Compiled {{ variable }} templates for agent prompt files
+
+Prompt files are parsed once into a list of literal segments plus variable
+slots. Rendering fills the slots and joins the list, so each render is a
+single pass no matter how many variables or how long the prompt is
+(chained str.replace() rescans the whole prompt once per variable).
+
+Templates are cached per file and reloaded only when the file's mtime or
+size changes, so prompts can still be edited while agents are running.
+
+Rendering is strict: a variable the template uses but the caller did not
+pass, or a value the template never uses, raises TemplateError. Both are
+almost always a typo on one side.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Tuple, Union
+
+
+_VARIABLE = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+class TemplateError(ValueError):
+    """Template syntax error, or render() variables that do not match."""
+
+
+class PromptTemplate:
+    """One compiled template."""
+
+    __slots__ = ("name", "variables", "_parts", "_slots")
+
+    def __init__(self, source: str, name: str = "<template>"):
+        self.name = name
+        parts: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        position = 0
+        for match in _VARIABLE.finditer(source):
+            parts.append(source[position:match.start()])
+            slots.append((len(parts), match.group(1)))
+            parts.append("")
+            position = match.end()
+        parts.append(source[position:])
+
+        # "{{" left in a literal means a placeholder that did not parse
+        for index, literal in enumerate(parts):
+            if "{{" in literal:
+                offset = literal.index("{{")
+                line = "".join(parts[:index]).count("\n") + literal[:offset].count("\n") + 1
+                raise TemplateError(f"{name}:{line}: malformed placeholder {literal[offset:offset + 20]!r}")
+
+        self._parts = tuple(parts)
+        self._slots = tuple(slots)
+        self.variables: FrozenSet[str] = frozenset(variable for _, variable in slots)
+
+    def render(self, values: Dict[str, Any] = None, **kwargs: Any) -> str:
+        """
+        Fill every placeholder.
+
+        Args:
+            values: Variable values (merged with keyword arguments);
+                non-string values are converted with str()
+
+        Raises:
+            TemplateError: If a variable is missing or a value is unused
+        """
+        if values:
+            kwargs = {**values, **kwargs}
+        if kwargs.keys() != self.variables:
+            missing = sorted(self.variables - kwargs.keys())
+            unused = sorted(kwargs.keys() - self.variables)
+            problems = []
+            if missing:
+                problems.append(f"missing {', '.join(missing)}")
+            if unused:
+                problems.append(f"unused {', '.join(unused)}")
+            raise TemplateError(f"{self.name}: {'; '.join(problems)}")
+
+        out = list(self._parts)
+        for index, variable in self._slots:
+            value = kwargs[variable]
+            out[index] = value if isinstance(value, str) else str(value)
+        return "".join(out)
+
+    def prefix(self, values: Dict[str, Any] = None, **kwargs: Any) -> str:
+        """
+        Rendered text up to the first placeholder not given in values.
+
+        Pass the variables that stay the same across calls to get the
+        prompt prefix those calls share (for LLMService cache_prefix).
+        """
+        if values:
+            kwargs = {**values, **kwargs}
+        unused = sorted(kwargs.keys() - self.variables)
+        if unused:
+            raise TemplateError(f"{self.name}: unused {', '.join(unused)}")
+
+        out = []
+        for index, variable in self._slots:
+            out.append(self._parts[index - 1])
+            if variable not in kwargs:
+                return "".join(out)
+            value = kwargs[variable]
+            out.append(value if isinstance(value, str) else str(value))
+        out.append(self._parts[-1])
+        return "".join(out)
+
+    def __repr__(self):
+        return f"PromptTemplate({self.name!r}, variables={sorted(self.variables)})"
+
+
+class TemplateLoader:
+    """Loads and caches the *.txt templates of one prompts directory."""
+
+    # Shared by all loaders: path -> ((mtime_ns, size), template)
+    _cache: Dict[Path, Tuple[Tuple[int, int], PromptTemplate]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, directory: Union[str, Path], suffix: str = ".txt", preload: bool = True):
+        self.directory = Path(directory)
+        self.suffix = suffix
+        if preload and self.directory.is_dir():
+            for path in sorted(self.directory.glob(f"*{suffix}")):
+                self.get(path.stem)
+
+    def get(self, name: str) -> PromptTemplate:
+        """Compiled template `name` (recompiled if the file changed)."""
+        path = self.directory / f"{name}{self.suffix}"
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Prompt not found: {path}") from None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        template = PromptTemplate(path.read_text(encoding="utf-8"), name=path.name)
+        with self._lock:
+            self._cache[path] = (stamp, template)
+        return template
+
+    def render(self, name: str, values: Dict[str, Any] = None, **kwargs: Any) -> str:
+        """Shortcut for get(name).render(...)."""
+        return self.get(name).render(values, **kwargs)
@@ -0,0 +1,224 @@
+"""
+Token Budget - Fit prompt input sections into per-section token budgets
+
+Downstream agents put upstream designs into their prompts (the narrative
+designer gets the concept and every level). Rendered in full, those
+sections grow with the design: every platform coordinate of every level
+ends up in a prompt that only needs names, themes and mechanics.
+
+An agent declares a Section per prompt input: a token budget, a render
+function (data -> prompt text) and reduction steps ordered from the least
+to the most important information:
+
+    Summarize("levels[*].layout", describe_layout)   # coordinates -> one line
+    Drop("levels[*].skillRequirements")
+    Truncate("levels[*].*", 80)                      # long strings
+    Limit("levels", 10)                              # first N items
+
+fit() renders the full data and, while it is over budget, applies the next
+step to a copy and renders again. If every step has been applied and the
+text is still too long, whole lines are cut from the end. The result only
+depends on the data, so the same design always produces the same prompt.
+
+estimate_tokens() is a local approximation of Gemini's tokenizer (short
+word pieces, up to 3 digits per number token, one token per symbol),
+computed with a single regex pass.
+"""
+
+import copy
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+
+_TOKEN = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[^\sA-Za-z\d]")
+_PATTERN_PART = re.compile(r"\[(\*|\d+)\]|\.?([^.\[]+)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text."""
+    return len(_TOKEN.findall(text))
+
+
+def _parse_pattern(pattern: str) -> Tuple[Union[str, int], ...]:
+    """"levels[*].layout" -> ("levels", "*", "layout")."""
+    return tuple(
+        (index if index == "*" else int(index)) if index else key
+        for index, key in _PATTERN_PART.findall(pattern)
+    )
+
+
+def _matches(data: Any, parts: Tuple[Union[str, int], ...]) -> Iterator[Tuple[Any, Any]]:
+    """(container, key) of every value matching parts ("*" = any key or index)."""
+    if not parts:
+        return
+    head, rest = parts[0], parts[1:]
+    if head == "*":
+        if isinstance(data, dict):
+            keys = list(data)
+        elif isinstance(data, list):
+            keys = range(len(data))
+        else:
+            return
+    elif isinstance(data, dict) and head in data:
+        keys = [head]
+    elif isinstance(data, list) and isinstance(head, int) and head < len(data):
+        keys = [head]
+    else:
+        return
+    for key in keys:
+        if rest:
+            yield from _matches(data[key], rest)
+        else:
+            yield data, key
+
+
+class Step:
+    """One deterministic reduction; apply() modifies data in place."""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.parts = _parse_pattern(pattern)
+
+    def apply(self, data: Any):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__.lower()} {self.pattern}"
+
+
+class Summarize(Step):
+    """Replace each match with summarize(value)."""
+
+    def __init__(self, pattern: str, summarize: Callable[[Any], Any]):
+        super().__init__(pattern)
+        self.summarize = summarize
+
+    def apply(self, data: Any):
+        for container, key in list(_matches(data, self.parts)):
+            container[key] = self.summarize(container[key])
+
+
+class Drop(Step):
+    """Remove each matching dict key."""
+
+    def apply(self, data: Any):
+        for container, key in list(_matches(data, self.parts)):
+            if isinstance(container, dict):
+                container.pop(key, None)
+
+
+class Truncate(Step):
+    """Shorten matching strings to max_chars (with an ellipsis)."""
+
+    def __init__(self, pattern: str, max_chars: int):
+        super().__init__(pattern)
+        self.max_chars = max_chars
+
+    def apply(self, data: Any):
+        for container, key in list(_matches(data, self.parts)):
+            value = container[key]
+            if isinstance(value, str) and len(value) > self.max_chars:
+                container[key] = value[:self.max_chars - 1].rstrip() + "…"
+
+
+class Limit(Step):
+    """Keep the first max_items of matching lists."""
+
+    def __init__(self, pattern: str, max_items: int):
+        super().__init__(pattern)
+        self.max_items = max_items
+
+    def apply(self, data: Any):
+        for container, key in list(_matches(data, self.parts)):
+            if isinstance(container[key], list):
+                del container[key][self.max_items:]
+
+
+@dataclass
+class Section:
+    """Budget declaration for one prompt input."""
+
+    name: str
+    budget: int                                  # tokens
+    render: Callable[[Any], str]
+    steps: Sequence[Step] = ()
+
+
+@dataclass
+class FitResult:
+    """One fitted section."""
+
+    name: str
+    text: str
+    tokens: int
+    original_tokens: int
+    applied: List[str] = field(default_factory=list)
+    lines_cut: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+def fit_section(section: Section, data: Any) -> FitResult:
+    """Render data within section.budget (see module docstring)."""
+    text = section.render(data)
+    original = tokens = estimate_tokens(text)
+    applied: List[str] = []
+
+    if tokens > section.budget and section.steps:
+        data = copy.deepcopy(data)
+        for step in section.steps:
+            step.apply(data)
+            applied.append(repr(step))
+            text = section.render(data)
+            tokens = estimate_tokens(text)
+            if tokens <= section.budget:
+                break
+
+    lines_cut = 0
+    if tokens > section.budget:
+        lines = text.split("\n")
+        while len(lines) > 1 and tokens > section.budget:
+            tokens -= estimate_tokens(lines.pop())
+            lines_cut += 1
+        note = f"... ({lines_cut} more lines omitted)"
+        text = "\n".join(lines + [note])
+        tokens += estimate_tokens(note)
+
+    return FitResult(section.name, text, tokens, original, applied, lines_cut)
+
+
+class TokenBudget:
+    """An agent's per-section prompt budgets."""
+
+    def __init__(self, sections: Sequence[Section]):
+        self.sections = {section.name: section for section in sections}
+
+    def fit(self, values: Dict[str, Any]) -> Dict[str, FitResult]:
+        """Fit every declared section; values maps section name -> data."""
+        return {
+            name: fit_section(section, values[name])
+            for name, section in self.sections.items()
+        }
+
+    @staticmethod
+    def render(results: Dict[str, FitResult]) -> Dict[str, str]:
+        """Template variables (section name -> fitted text)."""
+        return {name: result.text for name, result in results.items()}
+
+    @staticmethod
+    def report(results: Dict[str, FitResult]) -> str:
+        """One-line summary of tokens saved per section."""
+        parts = []
+        for result in results.values():
+            detail = f"{result.name} {result.original_tokens:,}→{result.tokens:,}"
+            if result.applied or result.lines_cut:
+                steps = list(result.applied)
+                if result.lines_cut:
+                    steps.append(f"cut {result.lines_cut} lines")
+                detail += f" ({', '.join(steps)})"
+            parts.append(detail)
+        saved = sum(result.saved for result in results.values())
+        return f"{saved:,} tokens saved: {'; '.join(parts)}"
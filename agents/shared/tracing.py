@@ -0,0 +1,291 @@
+"""
+Tracing - Hot-path spans with Chrome trace and flame graph export
+
+Spans time the hot paths of a run: LLM calls, JSON extraction, schema and
+quality validation, context saves and event dispatch.
+
+    with span("level.plan", levels=5):
+        ...
+
+    @traced("llm.generate")
+    def generate(...): ...
+
+The current span is held in a contextvar, so nested spans link to their
+parent without passing anything around. asyncio tasks inherit the context
+of the code that created them. Threads do not, so work handed to a pool
+is wrapped with bind(fn), which carries the submitting span into the
+worker thread.
+
+Tracing is off unless CAISO_TRACE=1 (or `tracer.enabled = True`). When it
+is off, span() returns a shared no-op object and @traced functions only
+check one attribute before calling the original, so spans can stay on
+hot paths.
+
+Export formats:
+
+- chrome_trace(): trace-event JSON for chrome://tracing or Perfetto.
+  Spans are complete ("X") events per thread. Spans whose parent is on
+  another thread get a flow arrow from the parent.
+- collapsed_stacks(): "root;child;leaf <self µs>" lines for flamegraph.pl
+  or speedscope. A span's stack includes parents on other threads, so
+  pooled work nests under the span that submitted it.
+"""
+
+import asyncio
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .constants import TRACING_ENABLED
+
+
+@dataclass
+class Span:
+    """One finished (or running) span."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    stack: Tuple[str, ...]          # names from the root span to this one
+    thread_id: int
+    thread_name: str
+    start_ns: int                   # time.perf_counter_ns()
+    end_ns: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def set(self, **args: Any):
+        """Attach values shown with the span (tokens, counts...)."""
+        self.args.update(args)
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "caiso_span", default=None
+)
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args: Any):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanScope:
+    """Context manager that opens a Span and makes it current."""
+
+    __slots__ = ("tracer", "name", "args", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        thread = threading.current_thread()
+        self.span = Span(
+            name=self.name,
+            span_id=next(self.tracer._ids),
+            parent_id=parent.span_id if parent else None,
+            stack=(parent.stack if parent else ()) + (self.name,),
+            thread_id=thread.ident,
+            thread_name=thread.name,
+            start_ns=time.perf_counter_ns(),
+            args=self.args,
+        )
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _current.reset(self.token)
+        self.tracer._finish(self.span)
+        return False
+
+
+class Tracer:
+    """Collects spans for the process (see module docstring)."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED):
+        self.enabled = enabled
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args: Any):
+        """Context manager timing a block as a child of the current span."""
+        if not self.enabled:
+            return _NOOP
+        return _SpanScope(self, name, args)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator timing every call of a function (sync or async)."""
+
+        def decorator(fn: Callable) -> Callable:
+            span_name = name or fn.__qualname__
+
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with _SpanScope(self, span_name, {}):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _SpanScope(self, span_name, {}):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def current(self) -> Optional[Span]:
+        """The innermost open span of this thread/task, or None."""
+        return _current.get()
+
+    def bind(self, fn: Callable) -> Callable:
+        """
+        fn running in the caller's context (for thread pools).
+
+        Each call copies the context captured here, so one bound function
+        can run in several workers at once.
+        """
+        if not self.enabled:
+            return fn
+        context = contextvars.copy_context()
+
+        @functools.wraps(fn)
+        def bound(*args, **kwargs):
+            return context.copy().run(fn, *args, **kwargs)
+
+        return bound
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+
+    def chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        """Trace-event JSON (timestamps in µs from the first span)."""
+        with self._lock:
+            spans = list(self.spans if spans is None else spans)
+        if not spans:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+
+        pid = os.getpid()
+        origin = min(span.start_ns for span in spans)
+        by_id = {span.span_id: span for span in spans}
+        threads: Dict[int, str] = {}
+        events: List[Dict[str, Any]] = []
+
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            threads.setdefault(span.thread_id, span.thread_name)
+            args = {**span.args, "span_id": span.span_id}
+            if span.parent_id is not None:
+                args["parent_id"] = span.parent_id
+            if span.error:
+                args["error"] = span.error
+            ts = (span.start_ns - origin) / 1000
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": ts,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+
+            parent = by_id.get(span.parent_id)
+            if parent is not None and parent.thread_id != span.thread_id:
+                flow = {"name": "handoff", "cat": "thread", "id": span.span_id, "pid": pid}
+                events.append({**flow, "ph": "s", "ts": ts, "tid": parent.thread_id})
+                events.append({**flow, "ph": "f", "bp": "e", "ts": ts, "tid": span.thread_id})
+
+        for thread_id, thread_name in threads.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def collapsed_stacks(self, spans: Optional[List[Span]] = None) -> str:
+        """
+        Folded stacks weighted by self time in µs.
+
+        Children running in parallel can add up to more than their parent's
+        duration; the parent's self time is then 0, not negative.
+        """
+        with self._lock:
+            spans = list(self.spans if spans is None else spans)
+
+        child_ns: Dict[int, int] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_ns[span.parent_id] = child_ns.get(span.parent_id, 0) + span.duration_ns
+
+        folded: Dict[Tuple[str, ...], int] = {}
+        for span in spans:
+            self_ns = max(span.duration_ns - child_ns.get(span.span_id, 0), 0)
+            folded[span.stack] = folded.get(span.stack, 0) + self_ns
+
+        return "\n".join(
+            f"{';'.join(stack)} {ns // 1000}"
+            for stack, ns in sorted(folded.items())
+            if ns >= 1000
+        )
+
+    def export(self, directory: Union[str, Path], stem: str = "trace") -> List[Path]:
+        """Write <stem>.json (Chrome trace) and <stem>.folded; returns the paths."""
+        directory = Path(directory)
+        chrome_path = directory / f"{stem}.json"
+        folded_path = directory / f"{stem}.folded"
+        with open(chrome_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed_stacks() + "\n")
+        return [chrome_path, folded_path]
+
+
+# Process-wide tracer
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+bind = tracer.bind
@@ -0,0 +1,491 @@
+"""
+Transports - How LLMService requests reach (or stand in for) the Vercel proxy
+
+LLMService builds proxy payloads (see api/gemini/*.js) and hands them to a
+Transport, which returns the proxy's HTTP response. All transports speak
+that same wire format, so everything above them (parsing, prefix caching,
+metering, error handling) runs unchanged in every mode:
+
+- HTTPTransport ("live"): POST to the proxy (timed with http.client),
+  routed over the primary and fallback proxies by FailoverTransport
+  (circuit breakers, latency-weighted selection; see endpoints.py)
+- SyntheticTransport ("synthetic"): answers locally like the proxy would.
+  Text comes from the canned responses in mock_responses/ (routes.json
+  maps prompt markers to response files). JSON repair prompts get their
+  requested shape filled in. Imagen, Vision and cachedContents get
+  placeholder answers (prefixes below the model's minimum cacheable size
+  are refused, as Gemini does).
+- ReplayTransport ("replay"): serves responses recorded earlier from a
+  FixtureStore, either instantly or with the recorded timing
+- RecordingTransport ("record"): live calls whose responses are written
+  to a FixtureStore for later replay
+
+Sends can be aborted from another thread through a Cancellation (used by
+HedgedTransport in hedging.py to cancel the slower of two requests).
+
+Fixtures are keyed by a hash of the endpoint path and the request payload,
+so a recording replays against any proxy URL. Recorded runs make
+performance tests realistic and deterministic, and offline runs free.
+
+make_transport() picks the transport from configuration: CAISO_LLM_TRANSPORT
+(default "synthetic", or "live" with MOCK_MODE=false), CAISO_LLM_FIXTURES and
+CAISO_REPLAY_TIMING.
+"""
+
+import base64
+import functools
+import hashlib
+import http.client
+import json
+import random
+import socket
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .constants import (
+    LLM_FIXTURES_DIR,
+    LLM_REPLAY_TIMING,
+    LLM_TRANSPORT,
+    PROXY_CONNECT_TIMEOUT_SECONDS,
+    VISION_TOKENS_PER_IMAGE,
+)
+from .metering import Timing, timed_post
+from .token_budget import estimate_tokens
+
+
+MOCK_RESPONSES_DIR = Path(__file__).parent / "mock_responses"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+VISION_CRITERIA = ("style_consistency", "technical_quality", "transparency", "game_fit", "composition")
+
+
+class ReplayMiss(LookupError):
+    """No recorded response for a replayed request."""
+
+
+class Cancelled(OSError):
+    """The send was aborted through its Cancellation."""
+
+
+class Cancellation:
+    """Lets another thread abort an in-flight send."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run callback on cancel (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to seconds; True if cancelled meanwhile."""
+        return self._event.wait(seconds)
+
+
+@dataclass
+class TransportResponse:
+    """The proxy's HTTP response to one request."""
+
+    status: int
+    reason: str
+    body: bytes
+    timing: Timing
+    hedged: bool = False        # a duplicate request was sent (hedging.py)
+
+
+class Transport:
+    """Sends one proxy request; see module docstring."""
+
+    name = "transport"
+    live = False                # calls reach (and are billed by) Gemini
+    synthetic = False           # canned answers instead of real model output
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        """
+        Response to payload POSTed to url.
+
+        Raises:
+            OSError / http.client.HTTPException: On connection failures
+            Cancelled: If cancel was cancelled before the response arrived
+            ReplayMiss: If a replayed request was never recorded
+        """
+        raise NotImplementedError
+
+
+class HTTPTransport(Transport):
+    """POST to the Vercel proxy."""
+
+    name = "live"
+    live = True
+
+    def __init__(self, connect_timeout: Optional[float] = PROXY_CONNECT_TIMEOUT_SECONDS):
+        self.connect_timeout = connect_timeout
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        on_connection = None
+        if cancel is not None:
+            if cancel.cancelled:
+                raise Cancelled(f"Request to {endpoint_name(url)} cancelled")
+            on_connection = lambda connection: cancel.on_cancel(lambda: _abort(connection))
+        try:
+            status, reason, body, timing = timed_post(
+                url,
+                json.dumps(payload).encode("utf-8"),
+                {"Content-Type": "application/json"},
+                timeout=timeout,
+                on_connection=on_connection,
+                connect_timeout=self.connect_timeout,
+            )
+        except (OSError, http.client.HTTPException) as e:
+            if cancel is not None and cancel.cancelled:
+                raise Cancelled(f"Request to {endpoint_name(url)} cancelled") from e
+            raise
+        return TransportResponse(status, reason, body, timing)
+
+
+class SyntheticTransport(Transport):
+    """Local stand-in for the proxy (mock mode)."""
+
+    name = "synthetic"
+    synthetic = True
+
+    def __init__(self, image_bytes: int = 1024, seed: Optional[int] = None):
+        self.image_bytes = image_bytes
+        self._rng = random.Random(seed)
+        self._cached: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        started = time.perf_counter()
+        status, result = self.respond(endpoint_name(url), payload)
+        elapsed = (time.perf_counter() - started) * 1000
+        reason = "OK" if status < 400 else "Error"
+        body = json.dumps(result).encode("utf-8")
+        return TransportResponse(status, reason, body, Timing(0.0, elapsed, elapsed))
+
+    def respond(self, endpoint: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """(status, JSON body) the proxy would answer for endpoint ("generate", ...)."""
+        handlers = {
+            "generate": self._generate,
+            "imagen": self._imagen,
+            "vision": self._vision,
+            "cache": self._cache,
+        }
+        if endpoint not in handlers:
+            return 404, {"success": False, "error": f"Unknown endpoint: {endpoint}"}
+        if endpoint != "cache" and not body.get("prompt"):
+            return 400, {"success": False, "error": "Missing required field: prompt"}
+        if endpoint == "vision" and not body.get("image_data"):
+            return 400, {"success": False, "error": "Missing required parameter: image_data (base64 encoded)"}
+        if endpoint == "cache":
+            return self._cache(body)
+        return 200, handlers[endpoint](body)
+
+    def _generate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = body["prompt"]
+        with self._lock:
+            cached = self._cached.get(body.get("cached_content", ""))
+        if cached is not None:
+            prompt = cached + prompt
+        text = synthetic_text(prompt)
+        result = {
+            "success": True,
+            "text": text,
+            "tokens_used": estimate_tokens(prompt) + estimate_tokens(text),
+            "model": body.get("model") or "gemini-2.0-flash-exp",
+            "timestamp": datetime.now().isoformat(),
+        }
+        if cached is not None:
+            result["cached_content"] = body["cached_content"]   # as generate.js echoes it
+        return result
+
+    def _imagen(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        count = int(body.get("number_of_images", 1))
+        seed = hashlib.sha256(body["prompt"].encode("utf-8")).digest()
+        images = []
+        for index in range(count):
+            noise = random.Random(seed + bytes([index])).randbytes(
+                max(self.image_bytes - len(PNG_SIGNATURE), 0)
+            )
+            images.append({
+                "image_data": base64.b64encode(PNG_SIGNATURE + noise).decode("ascii"),
+                "mime_type": "image/png",
+            })
+        return {"success": True, "images": images, "usage": {"images_generated": count}}
+
+    def _vision(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            scores = {criterion: self._rng.randint(84, 99) for criterion in VISION_CRITERIA}
+        metrics = {
+            criterion: {
+                "score": score,
+                "feedback": "Matches the style guide." if score >= 90 else "Mostly matches the style guide.",
+                "suggestions": [] if score >= 90 else [f"Improve {criterion.replace('_', ' ')}"],
+            }
+            for criterion, score in scores.items()
+        }
+        text = json.dumps({
+            "overall_score": round(sum(scores.values()) / len(scores), 2),
+            "metrics": metrics,
+            "improvement_suggestions": [s for metric in metrics.values() for s in metric["suggestions"]],
+        }, indent=2)
+        prompt_tokens = estimate_tokens(body["prompt"]) + VISION_TOKENS_PER_IMAGE
+        completion_tokens = estimate_tokens(text)
+        return {
+            "success": True,
+            "text": f"```json\n{text}\n```",
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _cache(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        from .prefix_cache import min_cacheable_tokens   # prefix_cache imports this module
+
+        contents = body.get("contents", "")
+        if not contents or not body.get("ttl_seconds"):
+            return 400, {"success": False, "error": "Missing required fields: contents, ttl_seconds"}
+        tokens = estimate_tokens(contents)
+        minimum = min_cacheable_tokens(body.get("model") or "gemini-2.0-flash-exp")
+        if tokens < minimum:
+            # Gemini's answer for prefixes below the model's minimum
+            return 400, {
+                "success": False,
+                "error": "Gemini API error: Bad Request",
+                "details": f"Cached content is too small. total_token_count={tokens}, "
+                           f"min_total_token_count={minimum}",
+            }
+        name = "cachedContents/" + hashlib.sha256(contents.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self._cached[name] = contents
+        return 200, {"success": True, "name": name, "tokens": tokens}
+
+
+def synthetic_text(prompt: str) -> str:
+    """Canned answer for a text prompt (first matching route in routes.json)."""
+    if prompt.startswith("REPAIR A JSON FRAGMENT"):
+        # JSON repair: fill the requested shape with placeholder values
+        shape = prompt.rsplit("```json", 1)[1].split("```", 1)[0]
+        for placeholder, value in (
+            ('"<string>"', '"TBD"'),
+            ('"<integer>"', "0"),
+            ('"<number>"', "0"),
+            ('"<boolean>"', "false"),
+            ('"<any>"', "null"),
+        ):
+            shape = shape.replace(placeholder, value)
+        return f"```json{shape}```"
+
+    for route in _routes():
+        if all(marker in prompt for marker in route["contains"]) and not any(
+            marker in prompt for marker in route.get("excludes", ())
+        ):
+            return _mock_response(route["response"])
+
+    return f"""Mock LLM Response for Phase 1 Testing
+
+Prompt received: {prompt[:100]}...
+
+This is a placeholder response.
+In production, this would call Vercel proxy → Gemini API.
+
+Timestamp: {datetime.now().isoformat()}
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _routes() -> List[Dict[str, Any]]:
+    return json.loads((MOCK_RESPONSES_DIR / "routes.json").read_text(encoding="utf-8"))
+
+
+@functools.lru_cache(maxsize=None)
+def _mock_response(name: str) -> str:
+    return (MOCK_RESPONSES_DIR / name).read_text(encoding="utf-8").rstrip("\n")
+
+
+class FixtureStore:
+    """Recorded proxy responses, one JSON file per request hash."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(url: str, payload: Dict[str, Any]) -> str:
+        """Hash of the endpoint path and the payload (independent of the proxy host)."""
+        request = json.dumps(
+            {"endpoint": urllib.parse.urlsplit(url).path, "payload": payload},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.directory / f"{key}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def put(self, key: str, url: str, payload: Dict[str, Any], response: TransportResponse):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fixture = {
+            "request": {"endpoint": urllib.parse.urlsplit(url).path, "payload": payload},
+            "response": {
+                "status": response.status,
+                "reason": response.reason,
+                "body": response.body.decode("utf-8", "replace"),
+                "timing": {
+                    "connect_ms": response.timing.connect_ms,
+                    "ttfb_ms": response.timing.ttfb_ms,
+                    "total_ms": response.timing.total_ms,
+                },
+            },
+            "recorded_at": datetime.now().isoformat(),
+        }
+        # Write then rename, so concurrent replays never read half a fixture
+        path = self.directory / f"{key}.json"
+        partial = path.with_suffix(f".{threading.get_ident()}.tmp")
+        partial.write_text(json.dumps(fixture, indent=2), encoding="utf-8")
+        partial.replace(path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.json")) if self.directory.is_dir() else 0
+
+
+class ReplayTransport(Transport):
+    """Serves recorded responses ("instant", or "original" timing)."""
+
+    name = "replay"
+
+    def __init__(self, store: FixtureStore, timing: str = "instant"):
+        if timing not in ("instant", "original"):
+            raise ValueError(f"Unknown replay timing: {timing}")
+        self.store = store
+        self.timing = timing
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        started = time.perf_counter()
+        key = self.store.key(url, payload)
+        fixture = self.store.get(key)
+        if fixture is None:
+            raise ReplayMiss(
+                f"No recorded response for {endpoint_name(url)} request {key[:12]} in {self.store.directory}"
+            )
+
+        response = fixture["response"]
+        body = response["body"].encode("utf-8")
+        if self.timing == "original":
+            recorded = Timing(**response["timing"])
+            remaining = max(recorded.total_ms / 1000 - (time.perf_counter() - started), 0)
+            if cancel is None:
+                time.sleep(remaining)
+            elif cancel.wait(remaining):
+                raise Cancelled(f"Replay of {endpoint_name(url)} request {key[:12]} cancelled")
+            return TransportResponse(response["status"], response["reason"], body, recorded)
+
+        elapsed = (time.perf_counter() - started) * 1000
+        return TransportResponse(response["status"], response["reason"], body, Timing(0.0, elapsed, elapsed))
+
+
+class RecordingTransport(Transport):
+    """Wraps a transport and records its responses (server errors are not recorded)."""
+
+    name = "record"
+
+    def __init__(self, inner: Transport, store: FixtureStore):
+        self.inner = inner
+        self.store = store
+        self.live = inner.live
+
+    def send(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float = 30,
+        cancel: Optional[Cancellation] = None,
+    ) -> TransportResponse:
+        response = self.inner.send(url, payload, timeout, cancel)
+        if response.status < 500:
+            self.store.put(self.store.key(url, payload), url, payload, response)
+        return response
+
+
+def make_transport(
+    name: str = LLM_TRANSPORT,
+    fixtures_dir: Union[str, Path] = LLM_FIXTURES_DIR,
+    replay_timing: str = LLM_REPLAY_TIMING,
+) -> Transport:
+    """Transport for a configured name (synthetic, live, replay, record)."""
+    if name == "synthetic":
+        return SyntheticTransport()
+    from .endpoints import FailoverTransport    # endpoints.py builds on this module
+
+    if name == "live":
+        return FailoverTransport(HTTPTransport())
+    if name == "replay":
+        return ReplayTransport(FixtureStore(fixtures_dir), replay_timing)
+    if name == "record":
+        return RecordingTransport(FailoverTransport(HTTPTransport()), FixtureStore(fixtures_dir))
+    raise ValueError(f"Unknown LLM transport: {name} (expected synthetic, live, replay or record)")
+
+
+def _abort(connection: http.client.HTTPConnection):
+    """Unblock a thread waiting on connection (its read then fails)."""
+    if connection.sock is not None:
+        try:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def endpoint_name(url: str) -> str:
+    """Last path segment of a proxy URL ("generate", "imagen", ...)."""
+    return urllib.parse.urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
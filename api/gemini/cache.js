@@ -0,0 +1,125 @@
+/**
+ * Vercel Serverless Function - Gemini Context Cache Proxy
+ *
+ * Registers a prompt prefix as Gemini cached content, so later
+ * /api/gemini/generate calls can reference it by name (cached_content)
+ * instead of resending it. See agents/shared/prefix_cache.py.
+ *
+ * Endpoint: POST /api/gemini/cache
+ *
+ * Request Body:
+ * {
+ *   "model": "gemini-2.0-flash-exp",
+ *   "contents": "prefix text",
+ *   "ttl_seconds": 600
+ * }
+ *
+ * Response:
+ * {
+ *   "success": true,
+ *   "name": "cachedContents/...",
+ *   "tokens": 4096
+ * }
+ *
+ * ttl_seconds is required: the client (PREFIX_CACHE_TTL_SECONDS in
+ * agents/shared/constants.py) is the only source of the TTL, so its
+ * handles expire together with the cached content.
+ *
+ * Gemini refuses prefixes below its minimum cacheable size; the error
+ * status is passed through and the caller sends full prompts instead.
+ */
+
+export default async function handler(req, res) {
+  // Only allow POST requests
+  if (req.method !== 'POST') {
+    return res.status(405).json({
+      success: false,
+      error: 'Method not allowed. Use POST.'
+    });
+  }
+
+  try {
+    const { model, contents, ttl_seconds } = req.body;
+
+    // Validate required fields
+    if (!contents || !ttl_seconds) {
+      return res.status(400).json({
+        success: false,
+        error: 'Missing required fields: contents, ttl_seconds'
+      });
+    }
+
+    // Get API key from environment (set in Vercel dashboard)
+    const GEMINI_API_KEY = process.env.GEMINI_API_KEY;
+
+    if (!GEMINI_API_KEY) {
+      console.error('GEMINI_API_KEY not found in environment variables');
+      return res.status(500).json({
+        success: false,
+        error: 'Server configuration error: API key not found'
+      });
+    }
+
+    // Must match the model of the generate calls that use the cache
+    const selectedModel = model || 'gemini-2.0-flash-exp';
+
+    const geminiUrl = `https://generativelanguage.googleapis.com/v1beta/cachedContents?key=${GEMINI_API_KEY}`;
+
+    const geminiRequest = {
+      model: `models/${selectedModel}`,
+      contents: [{
+        role: 'user',
+        parts: [{
+          text: contents
+        }]
+      }],
+      ttl: `${ttl_seconds}s`
+    };
+
+    // Call Gemini API
+    const geminiResponse = await fetch(geminiUrl, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(geminiRequest)
+    });
+
+    if (!geminiResponse.ok) {
+      const errorData = await geminiResponse.text();
+      console.error('Gemini API error:', errorData);
+      return res.status(geminiResponse.status).json({
+        success: false,
+        error: `Gemini API error: ${geminiResponse.statusText}`,
+        details: errorData
+      });
+    }
+
+    const data = await geminiResponse.json();
+
+    if (!data.name) {
+      console.error('Unexpected Gemini API response format:', data);
+      return res.status(500).json({
+        success: false,
+        error: 'Unexpected API response format'
+      });
+    }
+
+    // Return success response
+    return res.status(200).json({
+      success: true,
+      name: data.name,
+      tokens: data.usageMetadata?.totalTokenCount || 0,
+      model: selectedModel,
+      expire_time: data.expireTime
+    });
+
+  } catch (error) {
+    console.error('Error in cache handler:', error);
+    return res.status(500).json({
+      success: false,
+      error: 'Internal server error',
+      message: error.message
+    });
+  }
+}
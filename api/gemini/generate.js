@@ -5,6 +5,11 @@
  * The GEMINI_API_KEY is stored only in Vercel environment variables.
  *
  * Endpoint: POST /api/gemini/generate
+ *
+ * cached_content (optional) names a prefix registered through
+ * /api/gemini/cache; prompt then holds only the rest of the prompt. Gemini
+ * does not accept a system instruction together with cached content. The
+ * response echoes cached_content when it was used.
  */
 
 export default async function handler(req, res) {
@@ -17,7 +22,7 @@ export default async function handler(req, res) {
   }
 
   try {
-    const { model, prompt, system_instruction, temperature, max_tokens } = req.body;
+    const { model, prompt, system_instruction, temperature, max_tokens, cached_content } = req.body;
 
     // Validate required fields
     if (!prompt) {
@@ -27,6 +32,13 @@ export default async function handler(req, res) {
       });
     }
 
+    if (cached_content && system_instruction) {
+      return res.status(400).json({
+        success: false,
+        error: 'system_instruction cannot be combined with cached_content'
+      });
+    }
+
     // Get API key from environment (set in Vercel dashboard)
     const GEMINI_API_KEY = process.env.GEMINI_API_KEY;
 
@@ -65,6 +77,11 @@ export default async function handler(req, res) {
       };
     }
 
+    // Reference a prefix registered through /api/gemini/cache
+    if (cached_content) {
+      geminiRequest.cachedContent = cached_content;
+    }
+
     // Call Gemini API
     const geminiResponse = await fetch(geminiUrl, {
       method: 'POST',
@@ -105,6 +122,10 @@ export default async function handler(req, res) {
       success: true,
       text: generatedText,
       tokens_used: tokensUsed,
+      prompt_tokens: data.usageMetadata?.promptTokenCount,
+      cached_tokens: data.usageMetadata?.cachedContentTokenCount || 0,
+      output_tokens: data.usageMetadata?.candidatesTokenCount,
+      cached_content: cached_content || undefined,
       model: selectedModel,
       timestamp: new Date().toISOString()
     });